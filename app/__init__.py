@@ -10,6 +10,18 @@ def create_app():
     app.secret_key = os.getenv("FLASK_SECRET_KEY")
     app.permanent_session_lifetime = timedelta(days=7)
 
+    from .config import SESSION_STORE, TEMPLATE_CACHE_DIR
+    if TEMPLATE_CACHE_DIR:
+        from jinja2 import FileSystemBytecodeCache
+        os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+        app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)}
+
+    if SESSION_STORE == 'sqlite':
+        from .sessions import SQLiteSessionInterface
+        app.session_interface = SQLiteSessionInterface()
+    elif SESSION_STORE != 'cookie':
+        raise ValueError(f"Unknown SESSION_STORE '{SESSION_STORE}'. Use 'cookie' or 'sqlite'.")
+
     if not app.debug:
         import logging
         from logging import FileHandler
@@ -18,7 +30,11 @@ def create_app():
         app.logger.addHandler(file_handler)
 
     with app.app_context():
-        from . import routes
+        from . import routes, instrumentation, scheduler, issue_index, warmup
+        instrumentation.init_app(app)
         app.register_blueprint(routes.bp)
+        scheduler.init_app(app)
+        issue_index.init_app(app)
+        warmup.init_app(app)
 
     return app
\ No newline at end of file
@@ -0,0 +1,252 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from .config import CACHE_BACKEND, CACHE_MAX_ENTRIES, CACHE_SQLITE_PATH
+
+
+# --- Backends ---
+class MemoryBackend:
+    """In-process LRU store. Entries are (value, stored_at) pairs."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key, value, stored_at):
+        with self._lock:
+            self._data[key] = (value, stored_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteBackend:
+    """
+    File-backed store shared by every worker process on the host.
+    Values must be JSON-serialisable; least recently stored entries are pruned past `max_entries`.
+    Each `table` is a separate store with its own limit.
+    """
+
+    def __init__(self, path=CACHE_SQLITE_PATH, max_entries=CACHE_MAX_ENTRIES, table="cache"):
+        self.path = path
+        self.max_entries = max_entries
+        self.table = table
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_stored_at ON {table} (stored_at)")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute(f"SELECT value, stored_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, stored_at):
+        with self._connect() as conn:
+            conn.execute(f"INSERT OR REPLACE INTO {self.table} (key, value, stored_at) VALUES (?, ?, ?)",
+                         (key, json.dumps(value), stored_at))
+            conn.execute(f"DELETE FROM {self.table} WHERE key NOT IN "
+                         f"(SELECT key FROM {self.table} ORDER BY stored_at DESC LIMIT ?)", (self.max_entries,))
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute(f"DELETE FROM {self.table}")
+
+
+_backends = {}
+_backend_lock = threading.Lock()
+
+def get_cache_backend(name=None, max_entries=CACHE_MAX_ENTRIES):
+    """
+    Returns the process-wide backend selected by CACHE_BACKEND ('memory' or 'sqlite'). Caches that
+    pass a `name` get a store of their own, limited to `max_entries`, so filling one cannot evict
+    the entries of the others; with 'sqlite' it is a separate table in the same file.
+    """
+    with _backend_lock:
+        backend = _backends.get(name)
+        if backend is None:
+            if CACHE_BACKEND == 'sqlite':
+                backend = SQLiteBackend(max_entries=max_entries, table=f"cache_{name}" if name else "cache")
+            elif CACHE_BACKEND == 'memory':
+                backend = MemoryBackend(max_entries=max_entries)
+            else:
+                raise ValueError(f"Unknown CACHE_BACKEND '{CACHE_BACKEND}'. Use 'memory' or 'sqlite'.")
+            _backends[name] = backend
+        return backend
+
+def clear_cache_backends():
+    """Empties every backend created so far, e.g. to measure cold runs."""
+    with _backend_lock:
+        backends = list(_backends.values())
+    for backend in backends:
+        backend.clear()
+
+
+# --- TTL cache ---
+class _Flight:
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """
+    Namespaced TTL cache on top of a shared backend.
+
+    - Fresh entries (younger than `ttl`) are returned directly.
+    - Stale entries (younger than `ttl + stale_ttl`) are returned immediately while a
+      background thread reloads them (stale-while-revalidate).
+    - Concurrent misses for the same key within this process share a single load.
+
+    With `max_entries`, the namespace gets its own backend of that size instead of sharing
+    the CACHE_MAX_ENTRIES one, for caches with many or large entries.
+    """
+
+    def __init__(self, namespace, ttl, stale_ttl=0, backend=None, max_entries=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._backend = backend
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refresh_errors': 0}
+
+    @property
+    def backend(self):
+        if self._backend is not None:
+            return self._backend
+        if self.max_entries:
+            return get_cache_backend(self.namespace, self.max_entries)
+        return get_cache_backend()
+
+    def _full_key(self, key):
+        return f"{self.namespace}:{key}"
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def get(self, key, ttl=None):
+        """Returns the cached value if it is still fresh, else None."""
+        ttl = self.ttl if ttl is None else ttl
+        entry = self.backend.get(self._full_key(key))
+        if entry is not None and time.time() - entry[1] < ttl:
+            return entry[0]
+        return None
+
+    def lookup(self, key, ttl=None, refresh=False):
+        """
+        get(), counted in `stats` as a hit or a miss the way get_or_load() counts, for callers
+        that produce and set() the value themselves (e.g. streamed pages). `refresh=True`
+        skips the lookup and counts a miss.
+        """
+        value = None if refresh else self.get(key, ttl=ttl)
+        self._count('misses' if value is None else 'hits')
+        return value
+
+    def get_entry(self, key):
+        """Returns (value, stored_at) regardless of age, or None."""
+        return self.backend.get(self._full_key(key))
+
+    def set(self, key, value):
+        self.backend.set(self._full_key(key), value, time.time())
+
+    def delete(self, key):
+        self.backend.delete(self._full_key(key))
+
+    def get_or_load(self, key, loader, ttl=None, refresh=False):
+        """
+        Returns the cached value for `key`, calling `loader()` on a miss.
+        `refresh=True` bypasses any cached value and reloads synchronously.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if not refresh:
+            entry = self.backend.get(self._full_key(key))
+            if entry is not None:
+                value, stored_at = entry
+                age = time.time() - stored_at
+                if age < ttl:
+                    self._count('hits')
+                    return value
+                if age < ttl + self.stale_ttl:
+                    self._count('stale_hits')
+                    self._refresh_in_background(key, loader)
+                    return value
+        self._count('misses')
+        return self._load(key, loader)
+
+    def _load(self, key, loader):
+        with self._lock:
+            flight = self._inflight.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = self._inflight[key] = _Flight()
+        if not is_leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = loader()
+            self.set(key, flight.value)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def _refresh_in_background(self, key, loader):
+        with self._lock:
+            if key in self._inflight:
+                return
+
+        def refresh():
+            try:
+                self._load(key, loader)
+            except Exception as e:
+                self._count('refresh_errors')
+                print(f"Warning: Background refresh of '{self._full_key(key)}' failed: {e}")
+
+        threading.Thread(target=refresh, name=f"cache-refresh-{self.namespace}", daemon=True).start()
@@ -0,0 +1,123 @@
+import time
+from .cache import TTLCache
+from .executor import jira_executor
+from .utils import parse_jira_datetime
+from .config import CHANGELOG_PAGE_SIZE, CHANGELOG_FETCH_WORKERS, CHANGELOG_CACHE_TTL_SECONDS, CHANGELOG_CACHE_MAX_ENTRIES
+
+# Reduced changelogs per issue version ("<server>|<key>|<updated>"); an edited issue gets a new key.
+changelog_cache = TTLCache("issue_changelog", ttl=CHANGELOG_CACHE_TTL_SECONDS, max_entries=CHANGELOG_CACHE_MAX_ENTRIES)
+
+# Value the "Flagged" field takes while an issue is flagged.
+_FLAGGED_VALUE = "Impediment"
+
+
+class StatusTimeline:
+    """
+    Folds an issue's change histories, oldest first, into seconds spent per status and seconds
+    flagged per status, so a changelog never has to be held in memory as a whole.
+    """
+
+    def __init__(self, created):
+        self.status = None
+        self.status_since = created
+        self.flagged = False
+        self.last_at = created
+        self.seconds = {}
+        self.flagged_seconds = {}
+
+    def _advance(self, at):
+        if at is None:
+            return
+        if self.last_at is not None and at > self.last_at:
+            elapsed = at - self.last_at
+            self.seconds[self.status] = self.seconds.get(self.status, 0) + elapsed
+            if self.flagged:
+                self.flagged_seconds[self.status] = self.flagged_seconds.get(self.status, 0) + elapsed
+        self.last_at = at
+
+    def _name_initial_status(self, status):
+        # Time before the first status change belongs to the status the issue was created in.
+        self.status = status
+        for totals in (self.seconds, self.flagged_seconds):
+            if None in totals:
+                totals[status] = totals.get(status, 0) + totals.pop(None)
+
+    def add(self, history):
+        """Applies one history entry ({'created', 'items': [...]}) of /issue/{key}/changelog."""
+        at = parse_jira_datetime(history.get('created'))
+        self._advance(at)
+        for item in history.get('items') or ():
+            field = item.get('field')
+            if field == 'status':
+                if self.status is None:
+                    self._name_initial_status(item.get('fromString'))
+                self.status = item.get('toString')
+                self.status_since = at
+            elif field == 'Flagged':
+                self.flagged = _FLAGGED_VALUE in (item.get('toString') or '')
+
+    def summary(self, current_status):
+        """JSON-serialisable totals up to the last change; the current status and flag are still open."""
+        if self.status is None:
+            self._name_initial_status(current_status)
+        return {
+            'status': self.status, 'status_since': self.status_since, 'flagged': self.flagged,
+            'last_at': self.last_at, 'seconds': self.seconds, 'flagged_seconds': self.flagged_seconds,
+        }
+
+
+def seconds_in_status(summary, now=None):
+    """How long the issue has been in its current status, or None if that is unknown."""
+    if summary['status_since'] is None:
+        return None
+    return max(0.0, (now or time.time()) - summary['status_since'])
+
+def seconds_blocked(summary, blocked_statuses, now=None):
+    """Time spent in one of `blocked_statuses` or flagged as an impediment, counting overlaps once."""
+    blocked_statuses = set(blocked_statuses)
+    total = sum(seconds if status in blocked_statuses else summary['flagged_seconds'].get(status, 0)
+                for status, seconds in summary['seconds'].items())
+    if summary['last_at'] is not None and (summary['status'] in blocked_statuses or summary['flagged']):
+        total += max(0.0, (now or time.time()) - summary['last_at'])
+    return total
+
+
+def iter_changelog(jira_client, issue_key, page_size=CHANGELOG_PAGE_SIZE):
+    """
+    Yields an issue's change histories oldest first, holding one page at a time. Jira Cloud pages
+    them through /issue/{key}/changelog; Server/Data Center only offers `expand=changelog`.
+    """
+    if not getattr(jira_client, '_is_cloud', False):
+        issue = jira_executor.get_json(jira_client, f"issue/{issue_key}", {"fields": "status", "expand": "changelog"})
+        yield from (issue.get('changelog') or {}).get('histories', ())
+        return
+    start_at = 0
+    while True:
+        page = jira_executor.get_json(jira_client, f"issue/{issue_key}/changelog",
+                                      {"startAt": start_at, "maxResults": page_size})
+        values = page.get('values', [])
+        yield from values
+        start_at += len(values)
+        if page.get('isLast', True) or not values:
+            return
+
+def summarize_changelog(jira_client, issue):
+    """Reads the changelog of an IssueRecord (with `created` and `status`) into a StatusTimeline summary."""
+    timeline = StatusTimeline(parse_jira_datetime(issue.created))
+    for history in iter_changelog(jira_client, issue.key):
+        timeline.add(history)
+    return timeline.summary(issue.status)
+
+def changelog_summary(jira_client, issue):
+    """summarize_changelog, cached per issue version so unchanged issues are never read again."""
+    if issue.updated is None:
+        return summarize_changelog(jira_client, issue)
+    server_url = jira_client._options['server'].rstrip('/')
+    return changelog_cache.get_or_load(f"{server_url}|{issue.key}|{issue.updated}",
+                                       lambda: summarize_changelog(jira_client, issue))
+
+def changelog_summaries(jira_client, issues, workers=CHANGELOG_FETCH_WORKERS):
+    """Yields (issue, summary) in order, reading up to `workers` changelogs concurrently."""
+    issues = list(issues)
+    summaries = jira_executor.map(lambda issue: changelog_summary(jira_client, issue), issues, window=workers)
+    yield from zip(issues, summaries)
@@ -0,0 +1,149 @@
+import hashlib
+import threading
+import time
+from . import jira_lib
+from .cache import TTLCache
+from .executor import jira_executor
+from .instrumentation import record_response
+from .config import CLIENT_POOL_IDLE_SECONDS, CLIENT_VERIFY_TTL_SECONDS, HTTP_POOL_MAXSIZE
+
+
+class _PoolEntry:
+    __slots__ = ('client', 'verified_at', 'last_used', 'display_name')
+
+    def __init__(self, client):
+        self.client = client
+        self.verified_at = 0.0
+        self.last_used = time.monotonic()
+        self.display_name = None
+
+
+class JiraClientPool:
+    """
+    Process-wide cache of authenticated JIRA clients.
+
+    Clients are keyed by (server, email, sha256(token)) so the raw token is never
+    used as a dict key. Each client keeps its own keep-alive connection pool; the
+    `myself()` verification is only repeated once `verify_ttl` has elapsed, and
+    clients unused for `idle_timeout` seconds are closed and dropped.
+
+    Verifications are also recorded in a shared cache, so a worker that builds its
+    own client for credentials another worker verified recently skips `myself()`.
+    Concurrent requests that miss on the same credentials build and verify one client.
+    """
+
+    def __init__(self, idle_timeout=CLIENT_POOL_IDLE_SECONDS, verify_ttl=CLIENT_VERIFY_TTL_SECONDS,
+                 pool_maxsize=HTTP_POOL_MAXSIZE):
+        self.idle_timeout = idle_timeout
+        self.verify_ttl = verify_ttl
+        self.pool_maxsize = pool_maxsize
+        self._entries = {}
+        self._lock = threading.Lock()
+        # Per-key locks held while a client is built and verified.
+        self._building = {}
+        self._verified = TTLCache("client_verification", ttl=verify_ttl)
+
+    @staticmethod
+    def _key(server, email, token):
+        token_hash = hashlib.sha256(token.encode('utf-8')).hexdigest()
+        return (server.rstrip('/'), email.strip().lower(), token_hash)
+
+    def _build_client(self, server, email, token):
+        # The executor retries throttled calls itself, holding back the whole server; the session's
+        # own retries would sleep while occupying one of the executor's per-server slots.
+        client = jira_lib.JIRA(options={'server': server}, basic_auth=(email, token), max_retries=0)
+        adapter = jira_lib.HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+        client._session.mount('https://', adapter)
+        client._session.mount('http://', adapter)
+        client._session.hooks['response'].append(record_response)
+        return client
+
+    def _evict_idle(self, now):
+        expired = [key for key, entry in self._entries.items() if now - entry.last_used > self.idle_timeout]
+        for key in expired:
+            self._entries.pop(key).client.close()
+
+    def get(self, server, email, token):
+        """
+        Returns a verified client for the credentials, building one if needed.
+        Raises JIRAError if construction or verification fails; a failed client is not kept.
+        """
+        key = self._key(server, email, token)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._entries.get(key)
+        if entry is None or now - entry.verified_at > self.verify_ttl:
+            entry = self._verified_entry(key, server, email, token, now)
+        entry.last_used = now
+        return entry.client
+
+    def _verified_entry(self, key, server, email, token, now):
+        """Builds and/or re-verifies the entry for `key`, once for all requests waiting on it."""
+        with self._lock:
+            build_lock = self._building.setdefault(key, threading.Lock())
+        try:
+            with build_lock:
+                with self._lock:
+                    entry = self._entries.get(key)
+                if entry is not None and now - entry.verified_at <= self.verify_ttl:
+                    # Another request built or verified it while this one waited.
+                    return entry
+                pooled = entry is not None
+                if not pooled:
+                    entry = _PoolEntry(self._build_client(server, email, token))
+                shared_key = "|".join(key)
+                display_name = self._verified.get(shared_key)
+                if display_name is None:
+                    try:
+                        user = jira_executor.get_json(entry.client, "myself")
+                    except jira_lib.JIRAError:
+                        # Closes a pooled client; a new one was never shared.
+                        self.invalidate(server, email, token)
+                        if not pooled:
+                            entry.client.close()
+                        raise
+                    display_name = user.get('displayName', email)
+                    self._verified.set(shared_key, display_name)
+                entry.verified_at = now
+                entry.display_name = display_name
+                with self._lock:
+                    self._entries[key] = entry
+                return entry
+        finally:
+            with self._lock:
+                self._building.pop(key, None)
+
+    def login(self, server, email, token):
+        """
+        Builds and verifies a fresh client for a login attempt, replacing any cached one.
+        Returns the `myself()` payload; raises JIRAError on bad credentials.
+        """
+        self.invalidate(server, email, token)
+        entry = _PoolEntry(self._build_client(server, email, token))
+        user = jira_executor.get_json(entry.client, "myself")
+        entry.verified_at = time.monotonic()
+        entry.display_name = user.get('displayName', email)
+        key = self._key(server, email, token)
+        self._verified.set("|".join(key), entry.display_name)
+        with self._lock:
+            self._entries[key] = entry
+        return user
+
+    def invalidate(self, server, email, token):
+        """Drops the cached client, e.g. after Jira answered 401 for these credentials."""
+        key = self._key(server, email, token)
+        self._verified.delete("|".join(key))
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry.client.close()
+
+    def clear(self):
+        with self._lock:
+            entries, self._entries = list(self._entries.values()), {}
+        for entry in entries:
+            entry.client.close()
+
+
+client_pool = JiraClientPool()
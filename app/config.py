@@ -1,5 +1,144 @@
+import os
+
 USER_SELECT_GROUP = "PMO" 
 
+# --- Jira client pool ---
+# Authenticated clients are reused across requests for the same credentials. Successful verifications
+# are recorded in the shared cache, so with CACHE_BACKEND=sqlite other workers skip their own check.
+CLIENT_POOL_IDLE_SECONDS = int(os.getenv("CLIENT_POOL_IDLE_SECONDS", 900))
+CLIENT_VERIFY_TTL_SECONDS = int(os.getenv("CLIENT_VERIFY_TTL_SECONDS", 300))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", 10))
+
+# --- Outbound Jira calls ---
+# One thread pool serves every filter; each Jira server sees at most JIRA_MAX_CONCURRENCY_PER_SERVER
+# concurrent requests from this process. Identical GETs in flight for the same client are sent once.
+# 429/503 responses and dropped connections are retried after Retry-After, or with jittered exponential
+# backoff, and a Retry-After holds back every request to that server, so the app adapts to whatever
+# rate Jira allows. JIRA_RATE_LIMIT_PER_SECOND (bursts up to JIRA_RATE_LIMIT_BURST) additionally caps
+# the request rate up front; it is off (0) by default, since a fixed cap slows every cold run whether
+# Jira needs it or not. gunicorn.conf.py splits host-wide totals across workers.
+EXECUTOR_MAX_WORKERS = int(os.getenv("EXECUTOR_MAX_WORKERS", 16))
+JIRA_MAX_CONCURRENCY_PER_SERVER = int(os.getenv("JIRA_MAX_CONCURRENCY_PER_SERVER", 8))
+JIRA_RATE_LIMIT_PER_SECOND = float(os.getenv("JIRA_RATE_LIMIT_PER_SECOND", 0))
+JIRA_RATE_LIMIT_BURST = int(os.getenv("JIRA_RATE_LIMIT_BURST", 20))
+JIRA_THROTTLE_RETRIES = 4
+JIRA_BACKOFF_BASE_SECONDS = 1.0
+JIRA_BACKOFF_MAX_SECONDS = 60.0
+
+# --- Issue search ---
+# A filter's own "max_results" overrides SEARCH_MAX_RESULTS; 0 means no cap.
+SEARCH_PAGE_SIZE = 100
+# Pages (or key chunks) of one search kept in flight at once, within the executor limits.
+SEARCH_PAGE_WORKERS = 4
+SEARCH_MAX_RESULTS = 1000
+# Issue keys per `key in (...)` lookup; keeps the JQL well inside Jira's URL length limits.
+JQL_KEY_CHUNK_SIZE = 100
+# Account ids per `assignee in (...)` search when a filter runs for the whole USER_SELECT_GROUP.
+GROUP_ASSIGNEE_CHUNK_SIZE = 50
+# Upper bound for the 'blocker_depth' parameter of transitive Ready Tasks.
+MAX_BLOCKER_DEPTH = 6
+# Upper bound for the 'hierarchy_depth' parameter of completion rollups.
+MAX_HIERARCHY_DEPTH = 4
+# Filters with "pushdown": True can first ask Jira which candidates cannot match (e.g. issues with
+# unresolved blockers) and only fetch and process the rest. Full runs use it when that probe query matches
+# at most this share of the candidates. Runs refreshed incrementally from a snapshot never need it, so for
+# "incremental" filters it only applies where they cannot be (e.g. Ready Tasks with a blocker_depth above 1).
+JQL_PUSHDOWN_MAX_PROBE_RATIO = float(os.getenv("JQL_PUSHDOWN_MAX_PROBE_RATIO", 0.25))
+# Ruled-out keys are sent back as `key not in (...)`; beyond this many the query gets too long for a GET.
+JQL_PUSHDOWN_MAX_EXCLUDED_KEYS = 200
+# How long the planner's choice for a query is reused before its two count queries are sent again.
+JQL_PUSHDOWN_PLAN_TTL_SECONDS = int(os.getenv("JQL_PUSHDOWN_PLAN_TTL_SECONDS", 3600))
+# Changelog entries per page of /issue/{key}/changelog, and issues whose changelogs are read at once.
+CHANGELOG_PAGE_SIZE = 100
+CHANGELOG_FETCH_WORKERS = 8
+
+# --- Sessions ---
+# "cookie" keeps the session (including the Jira API token) in Flask's signed cookie. "sqlite" keeps it
+# server-side in SESSION_SQLITE_PATH, shared by all workers on the host; the cookie only holds a random id.
+SESSION_STORE = os.getenv("SESSION_STORE", "cookie")
+SESSION_SQLITE_PATH = os.getenv("SESSION_SQLITE_PATH", "instance/sessions.sqlite3")
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", 10000))
+
+# --- Results page ---
+# Render results progressively as pages arrive; `?stream=0` / `?stream=1` overrides per request.
+STREAM_RESULTS = os.getenv("STREAM_RESULTS", "1") == "1"
+
+# --- Exports ---
+# /run_filter/<id>/export streams rows as they are processed, so it is not bound by a filter's
+# "max_results"; this caps how many issues one export evaluates (0 means no cap).
+EXPORT_MAX_RESULTS = int(os.getenv("EXPORT_MAX_RESULTS", 0))
+
+# --- Caching ---
+# "memory" keeps a per-process LRU; "sqlite" shares entries between gunicorn workers on one host.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", "instance/cache.sqlite3")
+# Entries shared by the caches below, except snapshots and changelog summaries, which are kept apart
+# with limits of their own so that neither can evict the rest.
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 512))
+# Group members are served from cache for the TTL, then served stale while refreshed in the background.
+GROUP_MEMBERS_TTL_SECONDS = int(os.getenv("GROUP_MEMBERS_TTL_SECONDS", 900))
+GROUP_MEMBERS_STALE_SECONDS = int(os.getenv("GROUP_MEMBERS_STALE_SECONDS", 86400))
+# Processed filter results; a filter's own "cache_ttl" overrides this, 0 disables caching for it.
+RESULTS_CACHE_TTL_SECONDS = int(os.getenv("RESULTS_CACHE_TTL_SECONDS", 120))
+# Filters with "incremental": True keep a snapshot of their issues and only re-fetch what changed.
+# Snapshots older than this are discarded and rebuilt with a full search.
+SNAPSHOT_MAX_AGE_SECONDS = int(os.getenv("SNAPSHOT_MAX_AGE_SECONDS", 3600))
+SNAPSHOT_CACHE_MAX_ENTRIES = int(os.getenv("SNAPSHOT_CACHE_MAX_ENTRIES", 128))
+# Statuses, status categories, issue types and issue link types, per Jira server. Loaded at login and
+# on first use, then refreshed in the background once older than the TTL.
+JIRA_METADATA_TTL_SECONDS = int(os.getenv("JIRA_METADATA_TTL_SECONDS", os.getenv("ISSUE_LINK_TYPES_TTL_SECONDS", 86400)))
+JIRA_METADATA_STALE_SECONDS = int(os.getenv("JIRA_METADATA_STALE_SECONDS", 7 * 86400))
+# Per-issue changelog summaries are keyed on the issue's `updated`, so they never go stale;
+# the TTL only bounds how long summaries of issues nobody looks at any more are kept.
+CHANGELOG_CACHE_TTL_SECONDS = int(os.getenv("CHANGELOG_CACHE_TTL_SECONDS", 14 * 86400))
+# One entry per issue version; summaries are small, so this holds the candidates of many large runs.
+CHANGELOG_CACHE_MAX_ENTRIES = int(os.getenv("CHANGELOG_CACHE_MAX_ENTRIES", 20000))
+
+# --- Scheduled filters ---
+# Saved parameter sets re-run in the background so /run_filter can serve them instantly.
+# Entries look like {"filter_id": "ready_tasks", "params": {"projects": "STM"}, "interval_seconds": 900};
+# "params" are the query arguments /run_filter would receive. They run as SCHEDULER_JIRA_EMAIL on
+# JIRA_SERVER and are served to that user only. SCHEDULED_FILTERS_FILE may hold a JSON list of entries.
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "0") == "1"
+SCHEDULER_JIRA_EMAIL = os.getenv("SCHEDULER_JIRA_EMAIL")
+SCHEDULER_JIRA_TOKEN = os.getenv("SCHEDULER_JIRA_TOKEN")
+SCHEDULED_FILTERS_FILE = os.getenv("SCHEDULED_FILTERS_FILE")
+SCHEDULED_FILTERS = []
+SCHEDULER_DEFAULT_INTERVAL_SECONDS = 900
+SCHEDULER_POLL_SECONDS = 30
+# Only one process per host runs the scheduler; gunicorn workers race for this lock file.
+SCHEDULER_LOCK_PATH = os.getenv("SCHEDULER_LOCK_PATH", "instance/scheduler.lock")
+# A materialized result is served while younger than this many of its entry's intervals.
+SCHEDULED_RESULT_MAX_INTERVALS = 2
+
+# --- Local issue index ---
+# Optional SQLite mirror of ISSUE_INDEX_PROJECTS on JIRA_SERVER: bulk-synced with the account below
+# (the scheduler's by default) and kept current by Jira webhooks posted to /webhooks/jira. Filters whose
+# JQL it can answer are then evaluated locally. It holds what that account can see, so only enable it
+# where every user of the app may browse these projects. A periodic full re-sync repairs missed webhooks.
+ISSUE_INDEX_ENABLED = os.getenv("ISSUE_INDEX_ENABLED", "0") == "1"
+ISSUE_INDEX_PATH = os.getenv("ISSUE_INDEX_PATH", "instance/issue_index.sqlite3")
+ISSUE_INDEX_PROJECTS = [p.strip() for p in os.getenv("ISSUE_INDEX_PROJECTS", "STM,DEL").split(",") if p.strip()]
+ISSUE_INDEX_JIRA_EMAIL = os.getenv("ISSUE_INDEX_JIRA_EMAIL", SCHEDULER_JIRA_EMAIL)
+ISSUE_INDEX_JIRA_TOKEN = os.getenv("ISSUE_INDEX_JIRA_TOKEN", SCHEDULER_JIRA_TOKEN)
+# Webhooks must carry this secret, as `?secret=` in the URL or as an X-Hub-Signature HMAC of the body.
+ISSUE_INDEX_WEBHOOK_SECRET = os.getenv("ISSUE_INDEX_WEBHOOK_SECRET")
+ISSUE_INDEX_RESYNC_SECONDS = int(os.getenv("ISSUE_INDEX_RESYNC_SECONDS", 86400))
+ISSUE_INDEX_POLL_SECONDS = 60
+ISSUE_INDEX_LOCK_PATH = os.getenv("ISSUE_INDEX_LOCK_PATH", "instance/issue_index.lock")
+# Account ids behind currentUser(), per user.
+CURRENT_ACCOUNT_TTL_SECONDS = 86400
+
+# --- Startup ---
+# Directory for compiled templates (Jinja bytecode cache). The Docker image fills it at build time
+# with `flask --app run precompile-templates`, so a fresh instance does not compile them again.
+TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR")
+# GET /warmup loads the Jira client library and the templates and, with the account below (the issue
+# index's by default), opens a client to JIRA_SERVER and loads its metadata. Meant for startup probes.
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "0") == "1"
+WARMUP_JIRA_EMAIL = os.getenv("WARMUP_JIRA_EMAIL", ISSUE_INDEX_JIRA_EMAIL)
+WARMUP_JIRA_TOKEN = os.getenv("WARMUP_JIRA_TOKEN", ISSUE_INDEX_JIRA_TOKEN)
+
 FILTERS = {
     "ready_tasks": {
         "name": "Ready Tasks (Blockers Resolved)",
@@ -29,16 +168,26 @@ FILTERS = {
                  "type": "user_select",
                  "help_text": "Select the assignee. Defaults to the current user."
              },
+             {
+                 "id": "blocker_depth",
+                 "label": "Blocker Depth",
+                 "type": "number",
+                 "help_text": "1 checks direct blockers only. Higher values also require the blockers' own blockers to be resolved, up to that many levels."
+             },
         ],
         "defaults": { 
             "projects": ["STM", "DEL"], #
             "assignee": "currentUser()", 
             "exclude_types": ["Epic"],   
             "resolved_category": "Done", 
-            "blocking_link_type": "Blocks" 
+            "blocking_link_type": "Blocks",
+            "blocker_depth": 1
         },
         "base_jql_template": "statusCategory != '{resolved_category}'", 
-        "fields": "key,summary,issuelinks,status,issuetype", 
+        "max_results": 2000,
+        "cache_ttl": 120,
+        "incremental": True,
+        "pushdown": True,
         "result_title": "My Tasks Ready for Work", 
         "order_by": "ORDER BY updated DESC"
     },
@@ -72,9 +221,96 @@ FILTERS = {
             "exclude_types": ["Epic", "Sub-task"], 
             "resolved_category": "Done" 
         },
-        "base_jql_template": "assignee = {assignee} AND statusCategory != '{resolved_category}'",
-        "fields": "key,summary,issuetype,status,subtasks",
+        "base_jql_template": "statusCategory != '{resolved_category}'",
+        "max_results": 2000,
+        "cache_ttl": 300,
+        "incremental": True,
         "result_title": "My Tasks with All Sub-tasks Resolved",
         "order_by": "ORDER BY updated DESC"
+    },
+    "epic_rollup": {
+        "name": "Epic Completion Rollup",
+        "description": "Open Epics with how much of everything beneath them (Stories, Tasks and their Sub-tasks) is resolved, and which parents in each tree could be closed.",
+        "configurable_params": [
+             {
+                 "id": "projects",
+                 "label": "Projects (comma-separated)",
+                 "type": "text",
+                 "help_text": "Limit the top-level issues to these projects. Leave blank for defaults."
+             },
+             {
+                 "id": "include_types",
+                 "label": "Top-level Issue Types (comma-separated)",
+                 "type": "text",
+                 "help_text": "Issue types at the top of each tree (e.g., Epic, Initiative)."
+             },
+             {
+                 "id": "assignee",
+                 "label": "Assignee",
+                 "type": "user_select",
+                 "help_text": "Only trees whose top-level issue is assigned to this user. Defaults to any assignee."
+             },
+             {
+                 "id": "hierarchy_depth",
+                 "label": "Hierarchy Depth",
+                 "type": "number",
+                 "help_text": "Levels fetched below each top-level issue. 1 covers Epic > Story > Sub-task, since Sub-tasks come with their parent; use 2 when the top level is above Epics."
+             },
+        ],
+        "defaults": {
+            "projects": ["STM", "DEL"],
+            "assignee": "__any__",
+            "include_types": ["Epic"],
+            "resolved_category": "Done",
+            "hierarchy_depth": 1
+        },
+        "base_jql_template": "statusCategory != '{resolved_category}'",
+        "max_results": 500,
+        "cache_ttl": 300,
+        "result_title": "Epic Completion",
+        "order_by": "ORDER BY updated DESC"
+    },
+    "stale_tasks": {
+        "name": "Stale Tasks",
+        "description": "Open tasks that have sat in their current status for a while, with how long they have spent blocked or flagged.",
+        "configurable_params": [
+             {
+                 "id": "projects",
+                 "label": "Projects (comma-separated)",
+                 "type": "text",
+                 "help_text": "Limit search to these projects. Leave blank for defaults."
+             },
+             {
+                 "id": "assignee",
+                 "label": "Assignee",
+                 "type": "user_select",
+                 "help_text": "Select the user whose tasks to check. Defaults to 'Me'."
+             },
+             {
+                 "id": "stale_days",
+                 "label": "Days in Status",
+                 "type": "number",
+                 "help_text": "Only tasks whose status has not changed for at least this many days."
+             },
+             {
+                 "id": "blocked_statuses",
+                 "label": "Blocked Statuses (comma-separated)",
+                 "type": "text",
+                 "help_text": "Time in these statuses counts as blocked, as does time flagged as an impediment."
+             },
+        ],
+        "defaults": {
+            "projects": ["STM", "DEL"],
+            "assignee": "currentUser()",
+            "exclude_types": ["Epic"],
+            "resolved_category": "Done",
+            "stale_days": 14,
+            "blocked_statuses": ["Blocked"]
+        },
+        "base_jql_template": "statusCategory != '{resolved_category}' AND NOT status CHANGED AFTER -{stale_days}d AND created <= -{stale_days}d",
+        "max_results": 300,
+        "cache_ttl": 300,
+        "result_title": "Stale Tasks",
+        "order_by": "ORDER BY updated ASC"
     }
 }
\ No newline at end of file
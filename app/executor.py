@@ -0,0 +1,253 @@
+import contextvars
+import email.utils
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from . import jira_lib
+from .instrumentation import record_retry, record_coalesced, record_rate_limit_wait
+from .config import (
+    EXECUTOR_MAX_WORKERS, JIRA_MAX_CONCURRENCY_PER_SERVER, JIRA_RATE_LIMIT_PER_SECOND, JIRA_RATE_LIMIT_BURST,
+    JIRA_THROTTLE_RETRIES, JIRA_BACKOFF_BASE_SECONDS, JIRA_BACKOFF_MAX_SECONDS
+)
+
+_THROTTLED_STATUS_CODES = (429, 503)
+
+
+def _retry_after_seconds(response):
+    """Parses a Retry-After header given either as delta-seconds or as an HTTP date."""
+    if response is None:
+        return None
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Request rate limit for one Jira server: `rate` tokens per second, up to `burst` saved up.
+
+    acquire() reserves a token and sleeps until it is due, outside the lock, so concurrent
+    callers queue up in arrival order instead of waking together. penalize() holds back
+    every caller until a Retry-After has passed.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Takes one token; returns the seconds slept waiting for it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def penalize(self, seconds):
+        """Lets no new request through for `seconds`, e.g. after the server sent Retry-After."""
+        with self._lock:
+            now = time.monotonic()
+            # Throttled responses arriving together hold back once, they do not add up.
+            self._tokens = min(self._tokens + (now - self._updated) * self.rate, -seconds * self.rate)
+            self._updated = now
+
+
+class _InFlight:
+    """One GET in progress, shared by identical requests that arrive before it completes."""
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class JiraExecutor:
+    """
+    Process-wide engine for outbound Jira REST calls.
+
+    All filters share one bounded thread pool, and at most
+    `per_server_limit` requests are in flight against any one Jira server
+    regardless of how many users or filters are running; an optional token
+    bucket also caps the request rate per server. Throttled responses (429/503)
+    and dropped connections are retried after the server's Retry-After, or
+    with jittered exponential backoff when it sends none, and a Retry-After
+    holds back every new request to that server until it has passed.
+    Identical GETs (same client, URL and parameters) in flight at once are
+    sent only once.
+
+    Tasks handed to submit()/map() must not wait on other pool tasks.
+    """
+
+    def __init__(self, max_workers=EXECUTOR_MAX_WORKERS, per_server_limit=JIRA_MAX_CONCURRENCY_PER_SERVER,
+                 rate_limit=JIRA_RATE_LIMIT_PER_SECOND, rate_burst=JIRA_RATE_LIMIT_BURST,
+                 retries=JIRA_THROTTLE_RETRIES, backoff_base=JIRA_BACKOFF_BASE_SECONDS,
+                 backoff_max=JIRA_BACKOFF_MAX_SECONDS, coalesce=True):
+        self.max_workers = max_workers
+        self.per_server_limit = per_server_limit
+        self.rate_limit = rate_limit
+        self.rate_burst = rate_burst
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.coalesce = coalesce
+        self._pool = None
+        self._server_slots = {}
+        self._server_buckets = {}
+        # Without a bucket, Retry-After deadlines (time.monotonic()) per server.
+        self._held_until = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="jira")
+            return self._pool
+
+    def _slots_for(self, server_url):
+        with self._lock:
+            slots = self._server_slots.get(server_url)
+            if slots is None:
+                slots = self._server_slots[server_url] = threading.BoundedSemaphore(self.per_server_limit)
+            return slots
+
+    def _bucket_for(self, server_url):
+        if not self.rate_limit or self.rate_limit <= 0:
+            return None
+        with self._lock:
+            bucket = self._server_buckets.get(server_url)
+            if bucket is None:
+                bucket = self._server_buckets[server_url] = TokenBucket(self.rate_limit, self.rate_burst)
+            return bucket
+
+    def _hold(self, server_url, seconds):
+        with self._lock:
+            self._held_until[server_url] = max(self._held_until.get(server_url, 0.0), time.monotonic() + seconds)
+
+    def _wait_for_hold(self, server_url):
+        """Sleeps until a Retry-After received for `server_url` has passed; returns the seconds slept."""
+        with self._lock:
+            wait = self._held_until.get(server_url, 0.0) - time.monotonic()
+        if wait <= 0:
+            return 0.0
+        time.sleep(wait)
+        return wait
+
+    def _backoff_delay(self, attempt, error):
+        """
+        Returns (delay, retry_after). Retry-After is honoured plus up to one backoff base of jitter;
+        otherwise the exponential delay is jittered over its upper half, so clients throttled
+        together do not all come back at the same moment.
+        """
+        retry_after = _retry_after_seconds(getattr(error, 'response', None))
+        if retry_after is not None:
+            return min(retry_after + random.uniform(0, self.backoff_base), self.backoff_max), retry_after
+        delay = min(self.backoff_base * (2 ** attempt), self.backoff_max)
+        return delay / 2 + random.uniform(0, delay / 2), None
+
+    def get_json(self, jira_client, path, params=None):
+        """
+        GETs /rest/api/2/<path> through the per-server limits, retrying throttled responses.
+        If the same client already has this exact request in flight, waits for it and returns its
+        result (the same object, so callers must not modify it) or raises its error.
+        """
+        server_url = jira_client._options['server'].rstrip('/')
+        url = f"{server_url}/rest/api/2/{path}"
+        if not self.coalesce:
+            return self._get_json(jira_client, server_url, url, path, params)
+        key = (id(jira_client), url, tuple(sorted((name, tuple(value) if isinstance(value, list) else value)
+                                                  for name, value in (params or {}).items())))
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            leader = in_flight is None
+            if leader:
+                in_flight = self._in_flight[key] = _InFlight()
+        if not leader:
+            record_coalesced(url)
+            in_flight.done.wait()
+            if in_flight.error is not None:
+                raise in_flight.error
+            return in_flight.value
+        try:
+            in_flight.value = self._get_json(jira_client, server_url, url, path, params)
+            return in_flight.value
+        except Exception as e:
+            in_flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            in_flight.done.set()
+
+    def _get_json(self, jira_client, server_url, url, path, params):
+        slots = self._slots_for(server_url)
+        bucket = self._bucket_for(server_url)
+        attempt = 0
+        while True:
+            try:
+                waited = bucket.acquire() if bucket is not None else self._wait_for_hold(server_url)
+                if waited:
+                    record_rate_limit_wait(server_url, waited)
+                with slots:
+                    response = jira_client._session.get(url, params=params)
+                    response.raise_for_status()
+                    return response.json()
+            except (jira_lib.JIRAError, jira_lib.RequestsConnectionError) as e:
+                status_code = getattr(e, 'status_code', None)
+                if isinstance(e, jira_lib.JIRAError) and status_code not in _THROTTLED_STATUS_CODES:
+                    raise
+                if attempt >= self.retries:
+                    raise
+                delay, retry_after = self._backoff_delay(attempt, e)
+                if retry_after and bucket is not None:
+                    bucket.penalize(retry_after)
+                elif retry_after:
+                    self._hold(server_url, retry_after)
+                print(f"Jira GET {path} failed ({status_code or type(e).__name__}); retrying in {delay:.1f}s")
+                record_retry(url)
+                time.sleep(delay)
+                attempt += 1
+
+    def submit(self, fn, *args, **kwargs):
+        """Runs `fn` on the pool inside a copy of the caller's context (keeps per-request metrics)."""
+        return self.pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+    def map(self, fn, *iterables, window=None):
+        """
+        Like ThreadPoolExecutor.map: runs concurrently and yields results in input order.
+        `window` caps how many calls of this map are queued or running at once.
+        """
+        pending = deque()
+        arguments = zip(*iterables)
+        try:
+            for args in arguments:
+                pending.append(self.submit(fn, *args))
+                if window and len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+jira_executor = JiraExecutor()
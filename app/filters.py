@@ -1,14 +1,59 @@
-from .config import FILTERS
-from .utils import sanitize_jql_list
+import contextvars
+import hashlib
+import itertools
+import json
+import math
+import re
+import time
+from .config import (
+    FILTERS, SEARCH_MAX_RESULTS, SEARCH_PAGE_SIZE, RESULTS_CACHE_TTL_SECONDS, SNAPSHOT_MAX_AGE_SECONDS, SNAPSHOT_CACHE_MAX_ENTRIES,
+    MAX_BLOCKER_DEPTH, MAX_HIERARCHY_DEPTH, JQL_PUSHDOWN_MAX_PROBE_RATIO, JQL_PUSHDOWN_MAX_EXCLUDED_KEYS, JQL_PUSHDOWN_PLAN_TTL_SECONDS,
+    EXPORT_MAX_RESULTS, USER_SELECT_GROUP, GROUP_ASSIGNEE_CHUNK_SIZE
+)
+from concurrent.futures import ThreadPoolExecutor
+from . import jira_lib
+from .utils import sanitize_jql_list, split_jql_conjuncts
+from .jql import compile_filter_jql, builder_clause, ANY_ASSIGNEE, CURRENT_USER, GROUP_ASSIGNEE
+from .issue_index import get_issue_index, current_account
+from .search import IssueSearch, ChainedSearch, search_issues_by_keys, count_issues
+from .records import IssueRecord
+from .metadata import get_jira_metadata
+from .cache import TTLCache
 from .jira_service import (
     _extract_basic_issue_data,
+    fetch_users_for_app_dropdown_cached,
     process_ready_tasks,
-    process_parent_tasks_with_resolved_children
+    process_parent_tasks_with_resolved_children,
+    process_hierarchy_rollup,
+    process_stale_tasks
 )
 
+results_cache = TTLCache("filter_results", ttl=RESULTS_CACHE_TTL_SECONDS)
+snapshot_cache = TTLCache("filter_snapshots", ttl=SNAPSHOT_MAX_AGE_SECONDS, max_entries=SNAPSHOT_CACHE_MAX_ENTRIES)
+# Payloads written by the background scheduler as {'payload': ..., 'fresh_until': timestamp}.
+materialized_cache = TTLCache("filter_materialized", ttl=SNAPSHOT_MAX_AGE_SECONDS)
+# plan() decisions ('pushdown' or 'post_filter') per server, filter JQL and probe query.
+pushdown_plan_cache = TTLCache("pushdown_plans", ttl=JQL_PUSHDOWN_PLAN_TTL_SECONDS)
+
+# Slack added to `updated >= -Nm` windows to absorb clock rounding and in-flight edits.
+_DELTA_MARGIN_MINUTES = 1
+# The only filter JQL the local issue index can answer, besides the builder's own clauses.
+_INDEXED_TEMPLATE = "statusCategory != '{resolved_category}'"
+_INDEXED_ORDER_BY = "ORDER BY updated DESC"
+
 class BaseFilter:
     """A base class for all Jira filters."""
 
+    # effective_params that change what process_results returns for the same issues.
+    processor_params = ('resolved_category', 'blocking_link_type', 'blocker_depth', 'hierarchy_depth', 'stale_days',
+                        'blocked_statuses')
+    # Minimal fields the processor reads; a FILTERS entry may override them with its own "fields".
+    # The status category is embedded in `status`, so no expand is needed by default.
+    fields = "summary,issuetype,status"
+    expand = None
+    # Result fields written to CSV exports, in order; JSON Lines exports carry every field.
+    export_columns = ('key', 'summary', 'issuetype', 'status', 'reason', 'url')
+
     def __init__(self, filter_id, user_params, jira_client):
         if filter_id not in FILTERS:
             raise ValueError(f"Filter ID '{filter_id}' not found.")
@@ -18,45 +63,526 @@ class BaseFilter:
         self.user_params = user_params
         self.jira_client = jira_client
         self.server_url = self.jira_client._options['server']
-        self.effective_params = self._get_effective_params()
-        self.jql = self._build_jql()
-
-    def _get_effective_params(self):
-        defaults = self.config.get('defaults', {})
-        params = defaults.copy()
-        params.update(self.user_params)
-        for key in ['projects', 'exclude_types', 'include_types']:
-            if key in params:
-                value = params[key]
-                if isinstance(value, str):
-                    params[key] = [p.strip() for p in value.split(',') if p.strip()]
+        # Whole-group runs: {account_id: display name} of USER_SELECT_GROUP, and the per-chunk
+        # JQL when the members do not fit in one `assignee in (...)` clause.
+        self.group_members = None
+        self.chunk_jqls = None
+        if user_params.get('assignee') == GROUP_ASSIGNEE:
+            user_params = self._expand_group(user_params)
+        user_params = self._canonical_names(user_params)
+        self.jql, params = compile_filter_jql(filter_id, user_params)
+        self.effective_params = self._get_effective_params(params)
+        self.search = None
+        self.payload = None
+        self._snapshot_key = None
+        # Who the run is for (see run()); part of the pushdown plan key, since currentUser() differs per user.
+        self._identity = None
+        self._candidate_count = None
+        # How processors look up further issues by key; the local index answers from SQLite.
+        self.fetch_issues = search_issues_by_keys
+
+    def _get_effective_params(self, params):
+        """Hook for filters to validate or derive processor params; `params` is a private copy."""
         return params
 
-    def _build_jql(self):
-        if 'assignee' not in self.effective_params or not self.effective_params['assignee']:
-            self.effective_params['assignee'] = 'currentUser()'
-        assignee_val = self.effective_params.get('assignee')
-        if isinstance(assignee_val, str) and assignee_val not in ["currentUser()", "__any__"] and not assignee_val.startswith('"'):
-             self.effective_params['assignee'] = f'"{assignee_val}"'
-        jql_parts = []
-        base_template = self.config.get('base_jql_template', '')
-        if base_template:
-            jql_parts.append(f"({base_template.format(**self.effective_params)})")
-        if assignee_val and assignee_val != '__any__':
-            jql_parts.append(f"assignee = {self.effective_params['assignee']}")
-        if self.effective_params.get('projects'):
-            jql_parts.append(f"project in ({sanitize_jql_list(self.effective_params['projects'])})")
-        jql_string = " AND ".join(filter(None, jql_parts))
-        order_by = self.config.get('order_by', 'ORDER BY updated DESC')
-        if jql_string and order_by:
-            jql_string += f" {order_by}"
-        return jql_string
-        
+    def _canonical_names(self, user_params):
+        """
+        Matches a requested 'resolved_category' or 'blocking_link_type' against the server's metadata,
+        so e.g. 'done' or a category id becomes the 'Done' that the JQL, processors and cache keys use.
+        Unknown names are kept as given. The filters' own defaults are used as configured.
+        """
+        requested = [name for name in ('resolved_category', 'blocking_link_type') if user_params.get(name)]
+        if not requested:
+            return user_params
+        try:
+            metadata = get_jira_metadata(self.jira_client)
+        except jira_lib.JIRAError as e:
+            print(f"Jira Error loading metadata for filter '{self.filter_id}': {e}")
+            return user_params
+        user_params = dict(user_params)
+        for name in requested:
+            if name == 'resolved_category':
+                canonical = metadata.category_name(user_params[name])
+            else:
+                canonical = (metadata.link_type(user_params[name]) or {}).get('name')
+            if canonical is None:
+                print(f"Warning: unknown {name.replace('_', ' ')} '{user_params[name]}' for filter '{self.filter_id}'.")
+            else:
+                user_params[name] = canonical
+        return user_params
+
+    def _expand_group(self, user_params):
+        """
+        Resolves USER_SELECT_GROUP's members (cached, like the assignee dropdown) into the
+        'assignees' list the JQL builder turns into `assignee in (...)`, so one search covers
+        the whole team. Result dicts then carry the assignee's display name.
+        """
+        members = fetch_users_for_app_dropdown_cached(self.jira_client, USER_SELECT_GROUP)
+        if not members:
+            raise ValueError(f"Group '{USER_SELECT_GROUP}' has no active members to run the filter for.")
+        self.group_members = {member['id']: member['text'] for member in members}
+        account_ids = sorted(self.group_members)
+        if len(account_ids) > GROUP_ASSIGNEE_CHUNK_SIZE:
+            self.chunk_jqls = [
+                compile_filter_jql(self.filter_id, dict(user_params, assignees=account_ids[start:start + GROUP_ASSIGNEE_CHUNK_SIZE]))[0]
+                for start in range(0, len(account_ids), GROUP_ASSIGNEE_CHUNK_SIZE)]
+        self.export_columns = self.export_columns + ('assignee',)
+        return dict(user_params, assignees=account_ids)
+
+    def display_params(self):
+        """effective_params as shown on the results page; a whole-group run names the group, not every id."""
+        params = dict(self.effective_params)
+        if self.group_members is not None:
+            params.pop('assignees', None)
+            params['assignee'] = f"Everyone in {USER_SELECT_GROUP} ({len(self.group_members)} members)"
+        return params
+
+    def new_search(self, fields, expand=None, max_results=SEARCH_MAX_RESULTS):
+        """An IssueSearch over this filter's JQL, or a ChainedSearch over its chunks in whole-group runs."""
+        if self.chunk_jqls:
+            return ChainedSearch(self.jira_client, self.chunk_jqls, fields, expand=expand, max_results=max_results)
+        return IssueSearch(self.jira_client, self.jql, fields, expand=expand, max_results=max_results)
+
     def execute_search(self):
+        """Returns a lazy IssueSearch over every matching issue, up to the filter's 'max_results' cap."""
         if not self.jql: return []
-        fields = self.config.get('fields', 'key,summary,status')
-        expand = self.config.get('expand', 'fields.status.statusCategory')
-        return self.jira_client.search_issues(self.jql, maxResults=50, fields=fields, expand=expand)
+        fields, expand = self.search_fields()
+        max_results = self.config.get('max_results', SEARCH_MAX_RESULTS)
+        self.search = self.new_search(fields, expand=expand, max_results=max_results)
+        return self.search
+
+    def process(self, issues):
+        """process_results(), plus the assignee's display name on every result of a whole-group run."""
+        if self.group_members is None:
+            return self.process_results(issues)
+        assignees = {}
+
+        def remember_assignees(issues):
+            for issue in issues:
+                assignees[issue.key] = issue.assignee
+                yield issue
+
+        results = self.process_results(remember_assignees(issues))
+        for result in results:
+            account_id = assignees.get(result['key'])
+            result['assignee'] = self.group_members.get(account_id, account_id)
+        return results
+
+    def search_fields(self):
+        """Returns the (fields, expand) pair to request from Jira for this filter."""
+        fields = self.config.get('fields', self.fields)
+        if self.group_members is not None:
+            fields += ",assignee"
+        return fields, self.config.get('expand', self.expand)
+
+    def cache_key(self, identity):
+        """Stable key for this filter's output: canonical JQL, search shape, processor params and user."""
+        fields, expand = self.search_fields()
+        key_parts = {
+            'filter_id': self.filter_id,
+            'jql': self.jql,
+            'fields': sorted(f.strip() for f in fields.split(',') if f.strip()),
+            'expand': expand,
+            'max_results': self.config.get('max_results', SEARCH_MAX_RESULTS),
+            'params': {name: self.effective_params.get(name) for name in self.processor_params},
+            'identity': identity,
+        }
+        return hashlib.sha256(json.dumps(key_parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def jql_where(self):
+        """The filter's JQL without its ORDER BY clause, for composing into larger queries."""
+        return re.split(r"\s+ORDER\s+BY\s+", self.jql, maxsplit=1, flags=re.IGNORECASE)[0]
+
+    def search_signature(self):
+        """
+        Identifies the issue set this filter searches: its distinct top-level JQL terms and
+        ordering. Filters with equal signatures can share one search.
+        """
+        order_by = " ".join(self.jql[len(self.jql_where()):].split()).upper()
+        return frozenset(split_jql_conjuncts(self.jql_where())), order_by
+
+    def local_conjuncts(self):
+        """
+        {term: predicate} for the terms of search_signature() that can be checked on a fetched
+        IssueRecord instead: the builder's issuetype clauses. A shared search may leave them out
+        of its JQL and apply them per filter. Chunked whole-group runs keep their exact JQL.
+        """
+        if self.chunk_jqls:
+            return {}
+        terms = self.search_signature()[0]
+        predicates = {}
+        for key, wanted in (('include_types', True), ('exclude_types', False)):
+            names = self.effective_params.get(key)
+            if not names:
+                continue
+            term = " ".join(builder_clause(key, names).split())
+            if term in terms:
+                type_names = frozenset(name.casefold() for name in names)
+                predicates[term] = (lambda issue, type_names=type_names, wanted=wanted:
+                                    ((issue.issuetype or '').casefold() in type_names) == wanted)
+        return predicates
+
+    def dependency_keys(self, issue):
+        """
+        Keys of other issues whose changes can alter this issue's result without
+        touching its own `updated` timestamp. Used by incremental refresh.
+        """
+        return []
+
+    def supports_incremental(self):
+        # Snapshots track one search; chunked whole-group runs are several.
+        return bool(self.config.get('incremental')) and not self.chunk_jqls
+
+    def _execute(self):
+        if self.supports_incremental() and self._snapshot_key is not None:
+            return self._execute_incremental()
+        if self.plan() == 'pushdown':
+            return self.execute_pushdown()
+        return self.execute_post_filter()
+
+    def execute_post_filter(self):
+        """Fetches every candidate issue and lets the processor decide which ones match."""
+        return self._payload(self.process(self.execute_search()))
+
+    def _payload(self, results):
+        search = self.search
+        return {
+            'results': results,
+            'truncated': bool(search and search.truncated),
+            'fetched': search.fetched if search else len(results),
+            'total': search.total if search else len(results),
+            'generated_at': time.time(),
+        }
+
+    def scheduled_payload(self, cache_key, ttl):
+        """
+        Returns the scheduler's materialized payload for `cache_key`, marked 'scheduled', while it
+        is fresh and no newer entry sits in the results cache (e.g. after a manual refresh).
+        """
+        entry = materialized_cache.get_entry(cache_key)
+        if entry is None or time.time() >= entry[0]['fresh_until']:
+            return None
+        payload = entry[0]['payload']
+        cached = results_cache.get(cache_key, ttl=ttl) if ttl else None
+        if cached is not None and cached['generated_at'] > payload['generated_at']:
+            return None
+        return dict(payload, scheduled=True)
+
+    def run(self, identity, refresh=False):
+        """
+        Executes the search and processor, returning a payload dict with 'results',
+        'truncated', 'fetched', 'total' and 'generated_at'. Filters the local issue index
+        can answer are evaluated there, uncached. Otherwise a fresh scheduled result
+        (marked 'scheduled') is served first, then the results cache when an entry for
+        the same key is younger than the filter's 'cache_ttl'; `refresh=True` always re-executes.
+        """
+        local = self.execute_local(identity)
+        if local is not None:
+            return local
+        ttl = self.config.get('cache_ttl', RESULTS_CACHE_TTL_SECONDS)
+        cache_key = self.cache_key(identity)
+        self._snapshot_key = cache_key
+        self._identity = identity
+        if not refresh:
+            scheduled = self.scheduled_payload(cache_key, ttl)
+            if scheduled is not None:
+                return scheduled
+        if not ttl:
+            return self._execute()
+        return results_cache.get_or_load(cache_key, self._execute, ttl=ttl, refresh=refresh)
+
+    def stream(self, identity, refresh=False, batch_size=SEARCH_PAGE_SIZE):
+        """
+        Generator form of run() for progressively rendered pages: yields lists of results as
+        each batch of issues arrives from Jira and is processed. Local-index, scheduled, cached
+        and incremental runs are already fast and yield everything at once. Once exhausted,
+        `self.payload` holds the same payload run() would return, which is also cached.
+        """
+        ttl = self.config.get('cache_ttl', RESULTS_CACHE_TTL_SECONDS)
+        cache_key = self.cache_key(identity)
+        self._snapshot_key = cache_key
+        self._identity = identity
+        self.payload = self.execute_local(identity)
+        if self.payload is None and not refresh:
+            self.payload = self.scheduled_payload(cache_key, ttl)
+        if self.payload is None and ttl:
+            self.payload = results_cache.lookup(cache_key, ttl=ttl, refresh=refresh)
+        if self.payload is None and self.supports_incremental():
+            entry = snapshot_cache.get_entry(cache_key)
+            if entry is not None and time.time() - entry[1] <= SNAPSHOT_MAX_AGE_SECONDS:
+                self.payload = self._execute()
+                if ttl:
+                    results_cache.set(cache_key, self.payload)
+        keep_snapshot = self.supports_incremental()
+        if self.payload is None and not keep_snapshot and self.plan() == 'pushdown':
+            self.payload = self.execute_pushdown()
+            if ttl:
+                results_cache.set(cache_key, self.payload)
+        if self.payload is not None:
+            yield self.payload['results']
+            return
+
+        run_started = time.time()
+        ordered_keys, records, results_by_key = [], {}, {}
+        issues = iter(self.execute_search())
+        while True:
+            batch = list(itertools.islice(issues, batch_size))
+            if not batch:
+                break
+            batch_results = self._process_by_key(batch)
+            ordered_keys.extend(issue.key for issue in batch)
+            results_by_key.update(batch_results)
+            if keep_snapshot:
+                records.update((issue.key, issue) for issue in batch)
+            yield [batch_results[issue.key] for issue in batch if batch_results[issue.key]]
+
+        if keep_snapshot:
+            self.payload = self._store_snapshot(run_started, ordered_keys, records, results_by_key)
+        else:
+            self.payload = self._payload([results_by_key[key] for key in ordered_keys if results_by_key[key]])
+        if ttl:
+            results_cache.set(cache_key, self.payload)
+
+    def export_batches(self, identity, refresh=False, max_results=EXPORT_MAX_RESULTS, batch_size=SEARCH_PAGE_SIZE):
+        """
+        Yields lists of results for an export without holding on to them: each batch of issues
+        is processed and handed on as it arrives, so memory stays flat however many match.
+        A fresh scheduled or cached payload that covers every match is reused; exports write
+        nothing to the caches. `max_results` replaces the filter's own cap (0 means none).
+        """
+        self.payload = self.execute_local(identity, max_results=max_results)
+        if self.payload is not None:
+            yield self.payload['results']
+            return
+        if not refresh:
+            ttl = self.config.get('cache_ttl', RESULTS_CACHE_TTL_SECONDS)
+            cache_key = self.cache_key(identity)
+            payload = self.scheduled_payload(cache_key, ttl) or (results_cache.get(cache_key, ttl=ttl) if ttl else None)
+            if payload is not None and not payload['truncated']:
+                self.payload = payload
+                yield payload['results']
+                return
+        fields, expand = self.search_fields()
+        self.search = self.new_search(fields, expand=expand, max_results=max_results)
+        issues = iter(self.search)
+        while True:
+            batch = list(itertools.islice(issues, batch_size))
+            if not batch:
+                break
+            yield self.process(batch)
+
+    # --- Local issue index ---
+    def index_query(self, identity):
+        """
+        Keyword arguments for IssueIndex.query() that select what this filter's JQL would, or None
+        when the index is disabled, lacks one of the filter's projects, or the JQL goes beyond the
+        standard template, the builder's clauses and `ORDER BY updated DESC`.
+        """
+        index = get_issue_index()
+        params = self.effective_params
+        if (index is None or self.config.get('base_jql_template') != _INDEXED_TEMPLATE
+                or " ".join(self.config.get('order_by', '').split()).upper() != _INDEXED_ORDER_BY.upper()
+                or not index.covers(self.server_url, params.get('projects'))):
+            return None
+        if params['assignee'] == ANY_ASSIGNEE:
+            assignees = None
+        elif params['assignee'] == GROUP_ASSIGNEE:
+            assignees = sorted(self.group_members)
+        elif params['assignee'] == CURRENT_USER:
+            assignees = [current_account(self.jira_client, identity)]
+        else:
+            assignees = [params['assignee'].strip('"')]
+        return {
+            'projects': params['projects'],
+            'resolved_category': params.get('resolved_category', 'Done'),
+            'assignees': assignees,
+            'include_types': params.get('include_types') or (),
+            'exclude_types': params.get('exclude_types') or (),
+            'limit': self.config.get('max_results', SEARCH_MAX_RESULTS),
+        }
+
+    def execute_local(self, identity, max_results=None):
+        """
+        Evaluates the filter against the local issue index, or returns None when the index
+        cannot answer it (see index_query) or is missing linked issues the processor needs.
+        `max_results` overrides the filter's cap.
+        """
+        query = self.index_query(identity)
+        if query is None:
+            return None
+        if max_results is not None:
+            query['limit'] = max_results
+        index = get_issue_index()
+        records, total, missing = index.query(**query)
+        if missing:
+            print(f"Issue index lacks {len(missing)} linked issue(s) for '{self.filter_id}'; querying Jira instead.")
+            return None
+        self.search = None
+        self.fetch_issues = index.lookup_records
+        results = self.process(records)
+        return {
+            'results': results,
+            'truncated': len(records) < total,
+            'fetched': len(records),
+            'total': total,
+            'generated_at': time.time(),
+        }
+
+    # --- JQL pushdown ---
+    def pushdown_probe(self):
+        """
+        Returns (jql, fields) of a query whose issues rule candidates out, e.g. unresolved
+        sub-tasks whose parents cannot match, or None if this filter has no pushdown.
+        """
+        return None
+
+    def excluded_keys(self, probe_issues):
+        """Keys of candidates that the probe query's issues prove cannot match."""
+        return set()
+
+    def plan(self):
+        """
+        Chooses how a full run evaluates the filter: 'pushdown' when the filter enables it,
+        the candidates span more than one page but fit under its 'max_results' cap, and the
+        probe query matches at most JQL_PUSHDOWN_MAX_PROBE_RATIO of them (and no more than
+        JQL_PUSHDOWN_MAX_EXCLUDED_KEYS); otherwise 'post_filter'. Deciding costs up to two
+        count queries, so the decision and the candidate count are cached per server, JQL,
+        probe query and user. Jira errors while planning fall back to 'post_filter'.
+        """
+        self._candidate_count = None
+        # The probe composes onto self.jql, which chunked whole-group runs cannot send as one query.
+        if not self.config.get('pushdown') or not self.jql or self.chunk_jqls:
+            return 'post_filter'
+        try:
+            probe = self.pushdown_probe()
+            if probe is None:
+                return 'post_filter'
+            plan_key = f"{self.server_url.rstrip('/')}|{self.jql}|{probe[0]}|{self._identity}"
+            plan, self._candidate_count = pushdown_plan_cache.get_or_load(plan_key, lambda: self._choose_plan(probe[0]))
+            return plan
+        except jira_lib.JIRAError as e:
+            print(f"Jira Error planning JQL pushdown for '{self.filter_id}', post-filtering instead: {e}")
+            return 'post_filter'
+
+    def _choose_plan(self, probe_jql):
+        """Returns [plan, candidate count] (a list, so it survives the sqlite cache unchanged)."""
+        candidates = count_issues(self.jira_client, self.jql)
+        max_results = self.config.get('max_results', SEARCH_MAX_RESULTS)
+        if candidates is None or candidates <= SEARCH_PAGE_SIZE or (max_results and candidates > max_results):
+            return ['post_filter', candidates]
+        probe_matches = count_issues(self.jira_client, probe_jql)
+        if probe_matches > candidates * JQL_PUSHDOWN_MAX_PROBE_RATIO or probe_matches > JQL_PUSHDOWN_MAX_EXCLUDED_KEYS:
+            return ['post_filter', candidates]
+        return ['pushdown', candidates]
+
+    def execute_pushdown(self):
+        """
+        Evaluates the filter in two narrow steps: the probe query collects the keys that
+        cannot match, then one search for `<filter JQL> AND key not in (...)` fetches only
+        the rest, in the filter's order and under its 'max_results' cap. The processor still
+        runs on those, so the results match execute_post_filter(); 'fetched' and 'total'
+        count the narrowed search. Falls back to it when the candidates exceed the cap or
+        too many keys are ruled out to fit in the query. The candidate count comes from
+        plan() when it has one (possibly as old as its cached decision).
+        """
+        max_results = self.config.get('max_results', SEARCH_MAX_RESULTS)
+        candidates = self._candidate_count
+        if candidates is None:
+            candidates = count_issues(self.jira_client, self.jql)
+        if candidates is None or (max_results and candidates > max_results):
+            print(f"JQL pushdown for '{self.filter_id}' skipped: {candidates} candidates, over the cap of {max_results}.")
+            return self.execute_post_filter()
+        probe_jql, probe_fields = self.pushdown_probe()
+        excluded = self.excluded_keys(IssueSearch(self.jira_client, probe_jql, probe_fields, max_results=0))
+        if len(excluded) > JQL_PUSHDOWN_MAX_EXCLUDED_KEYS:
+            print(f"JQL pushdown for '{self.filter_id}' skipped: {len(excluded)} keys ruled out, "
+                  f"more than fit in one query.")
+            return self.execute_post_filter()
+        jql = self.jql
+        if excluded:
+            order_by = self.jql[len(self.jql_where()):]
+            jql = f"({self.jql_where()}) AND key not in ({sanitize_jql_list(sorted(excluded))}){order_by}"
+        fields, expand = self.search_fields()
+        self.search = IssueSearch(self.jira_client, jql, fields, expand=expand, max_results=max_results,
+                                  validate_query="warn")
+        payload = self._payload(self.process(self.search))
+        print(f"JQL pushdown for '{self.filter_id}': fetched {self.search.fetched} of {candidates} candidates.")
+        return payload
+
+    # --- Incremental refresh ---
+    def _process_by_key(self, issues):
+        """Runs the processor and returns {issue_key: result or None} for every input issue."""
+        issues = list(issues)
+        results_by_key = dict.fromkeys((issue.key for issue in issues), None)
+        for result in self.process(issues):
+            results_by_key[result['key']] = result
+        return results_by_key
+
+    def _execute_incremental(self):
+        """
+        Re-runs the filter against its last snapshot: one key-only search to learn the
+        current membership and order, one `updated >= -Nm` delta search, and a key lookup
+        for issues whose dependencies changed. Only those issues are re-processed.
+        Falls back to a full run (and a fresh snapshot) when no usable snapshot exists.
+        """
+        run_started = time.time()
+        entry = snapshot_cache.get_entry(self._snapshot_key)
+        if entry is None or run_started - entry[1] > SNAPSHOT_MAX_AGE_SECONDS:
+            return self._execute_full_snapshot(run_started)
+        snapshot = entry[0]
+        fields, expand = self.search_fields()
+        max_results = self.config.get('max_results', SEARCH_MAX_RESULTS)
+        minutes = math.ceil((run_started - snapshot['run_started']) / 60) + _DELTA_MARGIN_MINUTES
+        updated_clause = f"updated >= -{minutes}m"
+
+        self.search = IssueSearch(self.jira_client, self.jql, "key", max_results=max_results)
+        current_keys = [issue.key for issue in self.search]
+        current_key_set = set(current_keys)
+
+        records = {key: IssueRecord.from_dict(data) for key, data in snapshot['issues'].items() if key in current_key_set}
+        results_by_key = {key: result for key, result in snapshot['results'].items() if key in current_key_set}
+
+        delta_jql = f"({self.jql_where()}) AND {updated_clause}"
+        changed = {issue.key: issue for issue in IssueSearch(self.jira_client, delta_jql, fields, expand=expand, max_results=0)
+                   if issue.key in current_key_set}
+
+        dependents = {}
+        for key, record in records.items():
+            for dependency in self.dependency_keys(record):
+                dependents.setdefault(dependency, set()).add(key)
+        affected_keys = {key for key in current_keys if key not in records}
+        if dependents:
+            for dependency in search_issues_by_keys(self.jira_client, dependents, "key", extra_jql=updated_clause):
+                affected_keys |= dependents.get(dependency.key, set())
+        affected_keys -= changed.keys()
+        if affected_keys:
+            changed.update((issue.key, issue) for issue in search_issues_by_keys(self.jira_client, affected_keys, fields, expand=expand))
+
+        records.update(changed)
+        results_by_key.update(self._process_by_key(changed.values()))
+        print(f"Incremental refresh of '{self.filter_id}': {len(changed)} of {len(current_keys)} issues re-processed.")
+        return self._store_snapshot(run_started, current_keys, records, results_by_key)
+
+    def _execute_full_snapshot(self, run_started):
+        issues = list(self.execute_search())
+        records = {issue.key: issue for issue in issues}
+        return self._store_snapshot(run_started, [issue.key for issue in issues], records, self._process_by_key(issues))
+
+    def _store_snapshot(self, run_started, ordered_keys, records, results_by_key):
+        snapshot_cache.set(self._snapshot_key, {
+            'run_started': run_started,
+            'issues': {key: record.to_dict() for key, record in records.items()},
+            'results': results_by_key,
+        })
+        results = [results_by_key[key] for key in ordered_keys if results_by_key.get(key)]
+        search = self.search
+        return {
+            'results': results,
+            'truncated': bool(search and search.truncated),
+            'fetched': len(ordered_keys),
+            'total': search.total if search else len(ordered_keys),
+            'generated_at': time.time(),
+        }
 
     def process_results(self, issues):
         results = []
@@ -66,17 +592,202 @@ class BaseFilter:
             results.append(data)
         return results
 
+    def export_records(self, result):
+        """The rows one result contributes to an export."""
+        return [result]
+
 class ReadyTasksFilter(BaseFilter):
+    fields = "summary,issuetype,status,issuelinks"
+
+    def pushdown_probe(self):
+        # Unresolved issues that block something: whatever they block is not ready, at any depth.
+        link_type = get_jira_metadata(self.jira_client).link_type(self.effective_params.get('blocking_link_type', 'Blocks'))
+        if not link_type or not link_type.get('outward'):
+            return None
+        resolved_category = self.effective_params.get('resolved_category', 'Done')
+        outward = link_type['outward'].replace('"', '\\"')
+        return f"statusCategory != '{resolved_category}' AND issueLinkType = \"{outward}\"", "issuelinks"
+
+    def excluded_keys(self, probe_issues):
+        blocking_link_type = self.effective_params.get('blocking_link_type', 'Blocks')
+        return {link.outward.key for blocker in probe_issues for link in blocker.links
+                if link.type_name == blocking_link_type and link.outward is not None}
+
+    def _get_effective_params(self, params):
+        params = super()._get_effective_params(params)
+        try:
+            depth = int(params.get('blocker_depth') or 1)
+        except (TypeError, ValueError):
+            depth = 1
+        params['blocker_depth'] = max(1, min(depth, MAX_BLOCKER_DEPTH))
+        return params
+
+    def supports_incremental(self):
+        # Snapshots only track direct blockers, so deeper chains always need a full run.
+        return super().supports_incremental() and self.effective_params['blocker_depth'] == 1
+
+    def dependency_keys(self, issue):
+        blocking_link_type = self.effective_params.get('blocking_link_type', 'Blocks')
+        return [link.inward.key for link in issue.links if link.type_name == blocking_link_type and link.inward is not None]
+
     def process_results(self, issues):
-        return process_ready_tasks(self.jira_client, issues, self.effective_params, self.server_url)
+        return process_ready_tasks(self.jira_client, issues, self.effective_params, self.server_url,
+                                   fetch_issues=self.fetch_issues)
 
 class ParentsWithResolvedChildrenFilter(BaseFilter):
+    fields = "summary,issuetype,status,subtasks"
+
+    def pushdown_probe(self):
+        # Unresolved sub-tasks rule out their parents. Sub-tasks live in their parent's project.
+        resolved_category = self.effective_params.get('resolved_category', 'Done')
+        jql = f"issuetype in subTaskIssueTypes() AND statusCategory != '{resolved_category}'"
+        if self.effective_params.get('projects'):
+            jql += f" AND project in ({sanitize_jql_list(self.effective_params['projects'])})"
+        return jql, "parent"
+
+    def excluded_keys(self, probe_issues):
+        return {subtask.parent for subtask in probe_issues if subtask.parent}
+
+    def dependency_keys(self, issue):
+        return [subtask.key for subtask in issue.subtasks]
+
     def process_results(self, issues):
         return process_parent_tasks_with_resolved_children(self.jira_client, issues, self.effective_params, self.server_url)
 
+class HierarchyRollupFilter(BaseFilter):
+    fields = "summary,issuetype,status,subtasks"
+    export_columns = ('key', 'summary', 'issuetype', 'status', 'depth', 'done', 'total', 'percent_done', 'closable',
+                      'url')
+
+    def _get_effective_params(self, params):
+        params = super()._get_effective_params(params)
+        try:
+            depth = int(params.get('hierarchy_depth') or 1)
+        except (TypeError, ValueError):
+            depth = 1
+        params['hierarchy_depth'] = max(1, min(depth, MAX_HIERARCHY_DEPTH))
+        return params
+
+    def process_results(self, issues):
+        return process_hierarchy_rollup(self.jira_client, issues, self.effective_params, self.server_url)
+
+    def export_records(self, result):
+        # One row per parent: the top-level issue, then the parents beneath it with their depth.
+        return [{name: value for name, value in result.items() if name != 'rollup'}] + result.get('rollup', [])
+
+class StaleTasksFilter(BaseFilter):
+    # The JQL narrows the candidates to issues whose status has not changed for 'stale_days';
+    # their changelogs, read concurrently and cached per issue version, give the exact times.
+    fields = "summary,issuetype,status,created,updated"
+    export_columns = ('key', 'summary', 'issuetype', 'status', 'days_in_status', 'days_blocked', 'reason', 'url')
+
+    def process_results(self, issues):
+        return process_stale_tasks(self.jira_client, issues, self.effective_params, self.server_url)
+
+def run_filters_shared(filter_instances, identity, refresh=False):
+    """
+    Runs several filters for one page and returns {filter_id: payload} (see BaseFilter.run).
+
+    Filters the local issue index can answer are evaluated there; fresh scheduled or
+    cached payloads are reused. The remaining filters are grouped by search_signature(),
+    leaving out their local_conjuncts(); each group runs a single search over its filters'
+    common terms, requesting the union of their fields, and all processors then run in
+    parallel over their group's shared, read-only issue list, minus what their own issue
+    type clauses rule out.
+    New payloads are written back to the results cache so single-filter runs reuse them.
+    """
+    payloads = {}
+    pending = []
+    for filter_instance in filter_instances:
+        local = filter_instance.execute_local(identity)
+        if local is not None:
+            payloads[filter_instance.filter_id] = local
+            continue
+        ttl = filter_instance.config.get('cache_ttl', RESULTS_CACHE_TTL_SECONDS)
+        filter_instance._snapshot_key = filter_instance.cache_key(identity)
+        cached = None
+        if not refresh:
+            cached = filter_instance.scheduled_payload(filter_instance._snapshot_key, ttl)
+        if cached is None and ttl:
+            cached = results_cache.lookup(filter_instance._snapshot_key, ttl=ttl, refresh=refresh)
+        if cached is not None:
+            payloads[filter_instance.filter_id] = cached
+        else:
+            pending.append(filter_instance)
+    if not pending:
+        return payloads
+
+    # Filters whose searches differ only in terms they can check locally (issue types) share one
+    # search over their common terms; each then drops the fetched issues its own terms rule out.
+    groups = {}
+    for filter_instance in pending:
+        terms, order_by = filter_instance.search_signature()
+        shared_terms = terms.difference(filter_instance.local_conjuncts())
+        groups.setdefault((shared_terms, order_by), []).append(filter_instance)
+    groups = list(groups.values())
+
+    def fetch_group(group):
+        lead = group[0]
+        fields, expands = [], []
+        for filter_instance in group:
+            group_fields, group_expand = filter_instance.search_fields()
+            fields.extend(f.strip() for f in group_fields.split(',') if f.strip())
+            if group_expand:
+                expands.extend(e.strip() for e in group_expand.split(',') if e.strip())
+        caps = [filter_instance.config.get('max_results', SEARCH_MAX_RESULTS) for filter_instance in group]
+        common_terms = frozenset.intersection(*(filter_instance.search_signature()[0] for filter_instance in group))
+        if len({filter_instance.search_signature() for filter_instance in group}) == 1:
+            search = lead.new_search(",".join(dict.fromkeys(fields)), expand=",".join(dict.fromkeys(expands)) or None,
+                                     max_results=0 if 0 in caps else max(caps))
+        else:
+            order_by = lead.jql[len(lead.jql_where()):]
+            jql = " AND ".join(f"({term})" for term in sorted(common_terms)) + order_by
+            search = IssueSearch(lead.jira_client, jql, ",".join(dict.fromkeys(fields + ['issuetype'])),
+                                 expand=",".join(dict.fromkeys(expands)) or None,
+                                 max_results=0 if 0 in caps else max(caps))
+        issues = list(search)
+        return search, common_terms, issues
+
+    def process(filter_instance, search, common_terms, issues):
+        predicates = [predicate for term, predicate in filter_instance.local_conjuncts().items()
+                      if term not in common_terms]
+        fetched, total = search.fetched, search.total
+        if predicates:
+            issues = [issue for issue in issues if all(predicate(issue) for predicate in predicates)]
+            fetched = len(issues)
+            total = None if search.truncated else len(issues)
+        results = filter_instance.process(issues)
+        payload = {
+            'results': results,
+            'truncated': search.truncated,
+            'fetched': fetched,
+            'total': total,
+            'generated_at': time.time(),
+        }
+        if filter_instance.config.get('cache_ttl', RESULTS_CACHE_TTL_SECONDS):
+            results_cache.set(filter_instance._snapshot_key, payload)
+        return payload
+
+    # Both stages wait on JiraExecutor tasks (page fetches, batched sub-task lookups),
+    # so they run on short-lived local pools rather than on the executor itself.
+    with ThreadPoolExecutor(max_workers=len(groups)) as fetch_pool:
+        fetched = [future.result() for future in
+                   [fetch_pool.submit(contextvars.copy_context().run, fetch_group, group) for group in groups]]
+    with ThreadPoolExecutor(max_workers=len(pending)) as process_pool:
+        futures = {}
+        for group, (search, common_terms, issues) in zip(groups, fetched):
+            for filter_instance in group:
+                futures[filter_instance.filter_id] = process_pool.submit(
+                    contextvars.copy_context().run, process, filter_instance, search, common_terms, issues)
+        for filter_id, future in futures.items():
+            payloads[filter_id] = future.result()
+    return payloads
+
 FILTER_CLASS_MAP = {
     "ready_tasks": ReadyTasksFilter,
     "parents_resolved_children": ParentsWithResolvedChildrenFilter,
+    "epic_rollup": HierarchyRollupFilter,
+    "stale_tasks": StaleTasksFilter,
 }
 
 def get_filter_by_id(filter_id, user_params, jira_client):
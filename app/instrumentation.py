@@ -0,0 +1,259 @@
+import contextvars
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from flask import current_app, g, request
+
+_ISSUE_KEY_PATH = re.compile(r"/issue/[A-Za-z][A-Za-z0-9_]*-\d+")
+_current_metrics = contextvars.ContextVar('jira_request_metrics', default=None)
+
+
+def endpoint_name(url):
+    """Normalises an outbound URL to a low-cardinality label, e.g. '/rest/api/2/issue/{key}'."""
+    return _ISSUE_KEY_PATH.sub("/issue/{key}", urlsplit(url).path)
+
+
+# --- Prometheus-style registry ---
+class _Metric:
+    def __init__(self, name, help_text, kind):
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self._values = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _label_key(labels):
+        return tuple(sorted(labels.items()))
+
+    @staticmethod
+    def _format_labels(label_key, extra=()):
+        pairs = list(label_key) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in pairs) + "}"
+
+
+class Counter(_Metric):
+    def __init__(self, name, help_text):
+        super().__init__(name, help_text, 'counter')
+
+    def inc(self, amount=1, **labels):
+        key = self._label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            return [f"{self.name}{self._format_labels(key)} {value}" for key, value in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self, name, help_text):
+        super().__init__(name, help_text, 'histogram')
+
+    def observe(self, value, **labels):
+        key = self._label_key(labels)
+        with self._lock:
+            counts, total, observations = self._values.get(key, ([0] * len(self.BUCKETS), 0.0, 0))
+            counts = [c + (value <= bound) for c, bound in zip(counts, self.BUCKETS)]
+            self._values[key] = (counts, total + value, observations + 1)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for key, (counts, total, observations) in sorted(self._values.items()):
+                for bound, count in zip(self.BUCKETS, counts):
+                    lines.append(f"{self.name}_bucket{self._format_labels(key, [('le', bound)])} {count}")
+                lines.append(f"{self.name}_bucket{self._format_labels(key, [('le', '+Inf')])} {observations}")
+                lines.append(f"{self.name}_sum{self._format_labels(key)} {total:.6f}")
+                lines.append(f"{self.name}_count{self._format_labels(key)} {observations}")
+        return lines
+
+
+JIRA_REQUESTS = Counter("jira_requests_total", "Outbound Jira REST calls.")
+JIRA_REQUEST_SECONDS = Histogram("jira_request_duration_seconds", "Latency of outbound Jira REST calls.")
+JIRA_RESPONSE_BYTES = Counter("jira_response_bytes_total", "Bytes received from Jira.")
+JIRA_RETRIES = Counter("jira_retries_total", "Throttled Jira calls retried by the executor.")
+JIRA_COALESCED = Counter("jira_coalesced_total", "Jira GETs answered by an identical request already in flight.")
+JIRA_RATE_LIMIT_WAIT_SECONDS = Counter("jira_rate_limit_wait_seconds_total", "Time Jira calls waited for the rate limiter.")
+HTTP_REQUESTS = Counter("http_requests_total", "Requests served by this app.")
+HTTP_REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Time to serve a request, excluding streaming.")
+_METRICS = [JIRA_REQUESTS, JIRA_REQUEST_SECONDS, JIRA_RESPONSE_BYTES, JIRA_RETRIES, JIRA_COALESCED,
+            JIRA_RATE_LIMIT_WAIT_SECONDS, HTTP_REQUESTS, HTTP_REQUEST_SECONDS]
+
+
+def render_metrics(caches=()):
+    """Prometheus text exposition of this process's metrics plus the given TTLCaches' stats."""
+    lines = []
+    for metric in _METRICS:
+        lines.append(f"# HELP {metric.name} {metric.help_text}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    lines.append("# HELP cache_events_total Lookups per application cache and outcome.")
+    lines.append("# TYPE cache_events_total counter")
+    for cache in caches:
+        for event, value in sorted(cache.stats.items()):
+            lines.append(f'cache_events_total{{cache="{cache.namespace}",event="{event}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+# --- Per-request aggregation ---
+class RequestMetrics:
+    """Outbound Jira calls and timed phases of one Flask request."""
+
+    def __init__(self):
+        self.calls = []
+        self.phases = {}
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def add_call(self, endpoint, seconds, size, status):
+        with self._lock:
+            self.calls.append((endpoint, seconds, size, status))
+
+    def add_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def add_phase(self, name, seconds):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def by_endpoint(self):
+        summary = {}
+        with self._lock:
+            for endpoint, seconds, size, _ in self.calls:
+                entry = summary.setdefault(endpoint, {'calls': 0, 'ms': 0.0, 'bytes': 0})
+                entry['calls'] += 1
+                entry['ms'] += seconds * 1000
+                entry['bytes'] += size
+        return summary
+
+    def server_timing(self):
+        """Value for the Server-Timing response header."""
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.phases.items()]
+        jira_ms = sum(call[1] for call in self.calls) * 1000
+        parts.append(f'jira;dur={jira_ms:.1f};desc="{len(self.calls)} calls, {self.retries} retries"')
+        return ", ".join(parts)
+
+
+def record_response(response, *args, **kwargs):
+    """requests response hook installed on every pooled Jira session."""
+    endpoint = endpoint_name(response.url)
+    seconds = response.elapsed.total_seconds()
+    size = len(response.content or b"")
+    JIRA_REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+    JIRA_REQUEST_SECONDS.observe(seconds, endpoint=endpoint)
+    JIRA_RESPONSE_BYTES.inc(size, endpoint=endpoint)
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.add_call(endpoint, seconds, size, response.status_code)
+    return response
+
+
+def record_retry(url):
+    JIRA_RETRIES.inc(endpoint=endpoint_name(url))
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.add_retry()
+
+
+def record_coalesced(url):
+    JIRA_COALESCED.inc(endpoint=endpoint_name(url))
+
+
+def record_rate_limit_wait(server_url, seconds):
+    JIRA_RATE_LIMIT_WAIT_SECONDS.inc(round(seconds, 6), server=server_url)
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.add_phase('rate_limit', seconds)
+
+
+@contextmanager
+def timed(phase):
+    """Times a phase of the current request (e.g. 'auth', 'filter', 'render') for Server-Timing."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics = _current_metrics.get()
+        if metrics is not None:
+            metrics.add_phase(phase, time.perf_counter() - started)
+
+
+@contextmanager
+def request_metrics_bound():
+    """
+    Attaches the current request's metrics while a streamed body is generated: by then the
+    view has returned, so Jira calls made from the generator would otherwise go unrecorded.
+    """
+    token = _current_metrics.set(g.get('request_metrics'))
+    try:
+        yield
+    finally:
+        try:
+            _current_metrics.reset(token)
+        except ValueError:
+            _current_metrics.set(None)
+
+
+def init_app(app):
+    """Registers per-request collection, the Server-Timing header and the structured log line."""
+
+    @app.before_request
+    def start_request_metrics():
+        g.request_metrics = RequestMetrics()
+        g.request_metrics_token = _current_metrics.set(g.request_metrics)
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def finish_request_metrics(response):
+        metrics = g.get('request_metrics')
+        if metrics is None:
+            return response
+        started = g.request_started
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        path, status, logger = request.path, response.status_code, current_app.logger
+        HTTP_REQUESTS.inc(route=route, status=status)
+
+        def record(duration):
+            HTTP_REQUEST_SECONDS.observe(duration, route=route)
+            if route != '/metrics':
+                logger.info(json.dumps({
+                    'event': 'request_timing',
+                    'route': route,
+                    'path': path,
+                    'status': status,
+                    'streamed': response.is_streamed,
+                    'duration_ms': round(duration * 1000, 1),
+                    'phases_ms': {name: round(seconds * 1000, 1) for name, seconds in metrics.phases.items()},
+                    'jira_calls': len(metrics.calls),
+                    'jira_retries': metrics.retries,
+                    'jira_endpoints': metrics.by_endpoint(),
+                }))
+
+        duration = time.perf_counter() - started
+        # Server-Timing goes out with the headers, so for a streamed body it only covers the time to them.
+        response.headers['Server-Timing'] = f"total;dur={duration * 1000:.1f}, {metrics.server_timing()}"
+        if response.is_streamed:
+            # The body's Jira calls happen while it is sent; log and time the request once it is done.
+            response.call_on_close(lambda: record(time.perf_counter() - started))
+        else:
+            record(duration)
+        return response
+
+    @app.teardown_request
+    def reset_request_metrics(exc):
+        token = g.pop('request_metrics_token', None)
+        if token is not None:
+            try:
+                _current_metrics.reset(token)
+            except ValueError:
+                # Teardown ran in a different context than before_request; just detach.
+                _current_metrics.set(None)
@@ -0,0 +1,447 @@
+import hashlib
+import hmac
+import os
+import sqlite3
+import threading
+import time
+import traceback
+from .cache import TTLCache
+from .client_pool import client_pool
+from .executor import jira_executor
+from .records import IssueLink, IssueRecord, IssueRef
+from .search import IssueSearch, search_issues_by_keys
+from .utils import sanitize_jql_list, try_lock_file, parse_jira_datetime
+from .config import (
+    ISSUE_INDEX_ENABLED, ISSUE_INDEX_PATH, ISSUE_INDEX_PROJECTS, ISSUE_INDEX_JIRA_EMAIL, ISSUE_INDEX_JIRA_TOKEN,
+    ISSUE_INDEX_WEBHOOK_SECRET, ISSUE_INDEX_RESYNC_SECONDS, ISSUE_INDEX_POLL_SECONDS, ISSUE_INDEX_LOCK_PATH,
+    CURRENT_ACCOUNT_TTL_SECONDS
+)
+
+# Everything the filters read, plus what the index needs to answer their JQL.
+INDEX_FIELDS = "summary,issuetype,status,assignee,project,parent,issuelinks,subtasks,updated"
+# subtask_pos of a sub-task its parent has not listed yet; sorts after the listed ones.
+_UNPLACED_SUBTASK = 1000000
+# Issues written per transaction during a bulk sync.
+_SYNC_BATCH_SIZE = 500
+# Stays below SQLite's default limit on bound parameters.
+_CHUNK_SIZE = 500
+
+_SCHEMA = (
+    # synced=0 rows are stubs for issues only seen embedded in another issue (a blocker or sub-task
+    # outside the indexed projects): key, summary, type and status, but no links or assignee.
+    """CREATE TABLE IF NOT EXISTS issues (
+        id TEXT PRIMARY KEY, key TEXT NOT NULL, project TEXT COLLATE NOCASE, summary TEXT,
+        issuetype TEXT COLLATE NOCASE, status TEXT, status_category TEXT COLLATE NOCASE,
+        assignee TEXT, assignee_key TEXT, assignee_email TEXT, parent_key TEXT, subtask_pos INTEGER,
+        updated TEXT, updated_ts REAL, synced INTEGER NOT NULL, written_at REAL NOT NULL)""",
+    "CREATE INDEX IF NOT EXISTS issues_key ON issues (key)",
+    "CREATE INDEX IF NOT EXISTS issues_assignee ON issues (assignee, status_category, updated_ts)",
+    "CREATE INDEX IF NOT EXISTS issues_project ON issues (project, status_category, updated_ts)",
+    "CREATE INDEX IF NOT EXISTS issues_parent ON issues (parent_key)",
+    # source_id is the outward side of the link ("blocks"), dest_id the inward one ("is blocked by").
+    # The positions keep each issue's own `issuelinks` order.
+    """CREATE TABLE IF NOT EXISTS links (
+        id TEXT PRIMARY KEY, type_name TEXT, source_id TEXT NOT NULL, dest_id TEXT NOT NULL,
+        source_pos INTEGER, dest_pos INTEGER)""",
+    "CREATE INDEX IF NOT EXISTS links_source ON links (source_id)",
+    "CREATE INDEX IF NOT EXISTS links_dest ON links (dest_id)",
+    "CREATE TABLE IF NOT EXISTS projects (project TEXT PRIMARY KEY COLLATE NOCASE, server TEXT NOT NULL, synced_at REAL NOT NULL)",
+)
+
+_FULL_COLUMNS = ('id', 'key', 'project', 'summary', 'issuetype', 'status', 'status_category', 'assignee',
+                 'assignee_key', 'assignee_email', 'parent_key', 'updated', 'updated_ts')
+_UPSERT_ISSUE = f"""
+    INSERT INTO issues ({', '.join(_FULL_COLUMNS)}, synced, written_at)
+    VALUES ({', '.join('?' * len(_FULL_COLUMNS))}, 1, ?)
+    ON CONFLICT(id) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in _FULL_COLUMNS[1:])},
+        synced = 1, written_at = excluded.written_at
+    WHERE issues.synced = 0 OR issues.updated_ts IS NULL OR excluded.updated_ts IS NULL
+        OR excluded.updated_ts >= issues.updated_ts"""
+_UPSERT_STUB = """
+    INSERT INTO issues (id, key, project, summary, issuetype, status, status_category, parent_key, subtask_pos,
+                        synced, written_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?)
+    ON CONFLICT(id) DO UPDATE SET key = excluded.key, summary = excluded.summary, issuetype = excluded.issuetype,
+        status = excluded.status, status_category = excluded.status_category,
+        parent_key = COALESCE(excluded.parent_key, issues.parent_key),
+        subtask_pos = COALESCE(excluded.subtask_pos, issues.subtask_pos), written_at = excluded.written_at
+    WHERE issues.synced = 0"""
+_UPSERT_LINK = """
+    INSERT INTO links (id, type_name, source_id, dest_id, source_pos, dest_pos) VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET type_name = excluded.type_name, source_id = excluded.source_id,
+        dest_id = excluded.dest_id, source_pos = COALESCE(excluded.source_pos, links.source_pos),
+        dest_pos = COALESCE(excluded.dest_pos, links.dest_pos)"""
+
+
+def _marks(values):
+    return ", ".join("?" * len(values))
+
+def _chunks(values):
+    values = list(values)
+    return [values[start:start + _CHUNK_SIZE] for start in range(0, len(values), _CHUNK_SIZE)]
+
+
+class IssueIndex:
+    """
+    Local SQLite copy of the issues of a few projects, with their links and sub-task relations,
+    shared by every worker on the host.
+
+    sync() bulk-loads projects from Jira; apply_webhook() applies Jira's issue and issue link
+    events as they happen. Writes never replace an issue with an older `updated` version, so a
+    sync page fetched before a webhook arrived cannot undo it. query() answers the filters' JQL
+    with indexed lookups and returns IssueRecords carrying the same embedded link and sub-task
+    statuses a Jira search would.
+    """
+
+    def __init__(self, path=ISSUE_INDEX_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- Writes ---
+    def _write_stub(self, conn, ref, now, parent_key=None, subtask_pos=None):
+        fields = ref.get('fields') or {}
+        status = fields.get('status') or {}
+        conn.execute(_UPSERT_STUB, (
+            str(ref['id']), ref['key'], ref['key'].rsplit('-', 1)[0], fields.get('summary'),
+            (fields.get('issuetype') or {}).get('name'), status.get('name'),
+            (status.get('statusCategory') or {}).get('name'), parent_key, subtask_pos, now))
+
+    def _write_issue(self, conn, raw, now):
+        fields = raw.get('fields') or {}
+        issue_id, key = str(raw['id']), raw['key']
+        status = fields.get('status') or {}
+        assignee = fields.get('assignee') or {}
+        row = (
+            issue_id, key, (fields.get('project') or {}).get('key') or key.rsplit('-', 1)[0], fields.get('summary'),
+            (fields.get('issuetype') or {}).get('name'), status.get('name'),
+            (status.get('statusCategory') or {}).get('name'), assignee.get('accountId') or assignee.get('name'),
+            assignee.get('key'), (assignee.get('emailAddress') or '').lower() or None,
+            (fields.get('parent') or {}).get('key'), fields.get('updated'), parse_jira_datetime(fields.get('updated')),
+        )
+        if conn.execute(_UPSERT_ISSUE, row + (now,)).rowcount == 0:
+            # We already hold a newer version; keep it, but count the issue as seen by this sync.
+            conn.execute("UPDATE issues SET written_at = ? WHERE id = ?", (now, issue_id))
+            return
+        if (fields.get('issuetype') or {}).get('subtask') and fields.get('parent'):
+            # Listed among its parent's sub-tasks before the parent's own `subtasks` field places it.
+            conn.execute("UPDATE issues SET subtask_pos = COALESCE(subtask_pos, ?) WHERE id = ?",
+                         (_UNPLACED_SUBTASK, issue_id))
+
+        link_ids = []
+        for position, link in enumerate(fields.get('issuelinks') or ()):
+            other = link.get('outwardIssue') or link.get('inwardIssue')
+            if other is None or link.get('id') is None:
+                continue
+            self._write_stub(conn, other, now)
+            if 'outwardIssue' in link:
+                values = (issue_id, str(other['id']), position, None)
+            else:
+                values = (str(other['id']), issue_id, None, position)
+            conn.execute(_UPSERT_LINK, (str(link['id']), (link.get('type') or {}).get('name')) + values)
+            link_ids.append(str(link['id']))
+        conn.execute(f"DELETE FROM links WHERE (source_id = ? OR dest_id = ?) AND id NOT IN ({_marks(link_ids)})",
+                     [issue_id, issue_id] + link_ids)
+
+        subtasks = fields.get('subtasks') or ()
+        for position, subtask in enumerate(subtasks):
+            self._write_stub(conn, subtask, now, parent_key=key, subtask_pos=position)
+            conn.execute("UPDATE issues SET subtask_pos = ? WHERE id = ?", (position, str(subtask['id'])))
+
+    def upsert_issues(self, raw_issues):
+        """Writes issues as returned by a search or webhook (with INDEX_FIELDS). Returns how many were given."""
+        raw_issues = list(raw_issues)
+        if not raw_issues:
+            return 0
+        now = time.time()
+        with self._connect() as conn:
+            for raw in raw_issues:
+                self._write_issue(conn, raw, now)
+        return len(raw_issues)
+
+    def delete_issue(self, issue_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM links WHERE source_id = ? OR dest_id = ?", (issue_id, issue_id))
+            return conn.execute("DELETE FROM issues WHERE id = ?", (issue_id,)).rowcount > 0
+
+    def apply_webhook(self, event):
+        """
+        Applies one Jira webhook payload: jira:issue_created/updated/deleted or
+        issuelink_created/deleted. Returns False for events the index does not track.
+        """
+        name = event.get('webhookEvent', '')
+        issue = event.get('issue') or {}
+        link = event.get('issueLink') or {}
+        if name in ('jira:issue_created', 'jira:issue_updated') and issue.get('key'):
+            self.upsert_issues([issue])
+            return True
+        if name == 'jira:issue_deleted' and issue.get('id') is not None:
+            self.delete_issue(str(issue['id']))
+            return True
+        if name == 'issuelink_created' and link.get('id') is not None:
+            with self._connect() as conn:
+                conn.execute(_UPSERT_LINK, (str(link['id']), (link.get('issueLinkType') or {}).get('name'),
+                                            str(link['sourceIssueId']), str(link['destinationIssueId']), None, None))
+            return True
+        if name == 'issuelink_deleted' and link.get('id') is not None:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM links WHERE id = ?", (str(link['id']),))
+            return True
+        return False
+
+    def sync(self, jira_client, projects, server):
+        """
+        Re-reads every issue of `projects` from Jira, then drops indexed issues of those projects
+        that the search no longer returned (deleted, moved or no longer visible). Returns the count read.
+        """
+        started = time.time()
+        search = IssueSearch(jira_client, f"project in ({sanitize_jql_list(projects)}) ORDER BY key ASC",
+                             INDEX_FIELDS, max_results=0, parse=lambda raw: raw)
+        batch, count = [], 0
+        for raw in search:
+            batch.append(raw)
+            if len(batch) >= _SYNC_BATCH_SIZE:
+                count += self.upsert_issues(batch)
+                batch = []
+        count += self.upsert_issues(batch)
+        gone = f"SELECT id FROM issues WHERE project IN ({_marks(projects)}) AND synced = 1 AND written_at < ?"
+        with self._connect() as conn:
+            conn.execute(f"DELETE FROM links WHERE source_id IN ({gone}) OR dest_id IN ({gone})",
+                         list(projects) + [started] + list(projects) + [started])
+            conn.execute(f"DELETE FROM issues WHERE id IN ({gone})", list(projects) + [started])
+            conn.executemany("INSERT OR REPLACE INTO projects (project, server, synced_at) VALUES (?, ?, ?)",
+                             [(project, server.rstrip('/'), started) for project in projects])
+        return count
+
+    # --- Reads ---
+    def synced_projects(self, server):
+        """{project: synced_at} of the projects fully loaded from `server`."""
+        rows = self._connect().execute("SELECT project, synced_at FROM projects WHERE server = ?", (server.rstrip('/'),))
+        return {project.upper(): synced_at for project, synced_at in rows}
+
+    def covers(self, server, projects):
+        synced = self.synced_projects(server)
+        return bool(projects) and all(project.upper() in synced for project in projects)
+
+    def query(self, projects, resolved_category, assignees=None, include_types=(), exclude_types=(), limit=0):
+        """
+        Unresolved issues of `projects`, most recently updated first, optionally only those assigned
+        to one of `assignees` (account ids, user names/keys or emails) and of the given issue types.
+        Returns (records, total, missing_ids): at most `limit` records (0 = all), the number of matches,
+        and ids of linked issues the index has never seen, without which the records are incomplete.
+        """
+        where = [f"project IN ({_marks(projects)})", "synced = 1", "status_category != ?"]
+        args = list(projects) + [resolved_category]
+        if assignees is not None:
+            where.append(f"(assignee IN ({_marks(assignees)}) OR assignee_key IN ({_marks(assignees)}) "
+                         f"OR assignee_email IN ({_marks(assignees)}))")
+            args += list(assignees) * 2 + [a.lower() for a in assignees]
+        if include_types:
+            where.append(f"issuetype IN ({_marks(include_types)})")
+            args += list(include_types)
+        if exclude_types:
+            where.append(f"issuetype NOT IN ({_marks(exclude_types)})")
+            args += list(exclude_types)
+        conn = self._connect()
+        condition = " AND ".join(where)
+        total = conn.execute(f"SELECT COUNT(*) FROM issues WHERE {condition}", args).fetchone()[0]
+        rows = conn.execute(f"SELECT id, key, summary, issuetype, status, status_category, updated, parent_key, assignee "
+                            f"FROM issues WHERE {condition} ORDER BY updated_ts DESC, id DESC LIMIT ?",
+                            args + [limit or -1]).fetchall()
+        records, missing = self._records(conn, rows)
+        return records, total, missing
+
+    def records_by_keys(self, keys):
+        """IssueRecords for the given keys that the index holds in full (stubs are left out)."""
+        conn = self._connect()
+        rows = []
+        for chunk in _chunks(set(keys)):
+            rows += conn.execute(f"SELECT id, key, summary, issuetype, status, status_category, updated, parent_key, assignee "
+                                 f"FROM issues WHERE key IN ({_marks(chunk)}) AND synced = 1", chunk).fetchall()
+        return self._records(conn, rows)[0]
+
+    def lookup_records(self, jira_client, keys, fields):
+        """Drop-in for search_issues_by_keys(): indexed issues come from here, the rest from Jira."""
+        keys = set(keys)
+        records = self.records_by_keys(keys)
+        yield from records
+        rest = keys - {record.key for record in records}
+        if rest:
+            yield from search_issues_by_keys(jira_client, rest, fields)
+
+    def _records(self, conn, rows):
+        ids = [row[0] for row in rows]
+        links, missing = {}, set()
+        for chunk in _chunks(ids):
+            marks, chunk_ids = _marks(chunk), set(chunk)
+            link_rows = conn.execute(
+                f"SELECT l.type_name, l.source_id, l.dest_id, l.source_pos, l.dest_pos, "
+                f"s.key, s.status_category, d.key, d.status_category FROM links l "
+                f"LEFT JOIN issues s ON s.id = l.source_id LEFT JOIN issues d ON d.id = l.dest_id "
+                f"WHERE l.source_id IN ({marks}) OR l.dest_id IN ({marks})", chunk + chunk)
+            for type_name, source_id, dest_id, source_pos, dest_pos, source_key, source_cat, dest_key, dest_cat in link_rows:
+                if source_id in chunk_ids:
+                    if dest_key is None:
+                        missing.add(dest_id)
+                    else:
+                        links.setdefault(source_id, []).append(
+                            (source_pos, IssueLink(type_name, outward=IssueRef(dest_key, dest_cat))))
+                if dest_id in chunk_ids:
+                    if source_key is None:
+                        missing.add(source_id)
+                    else:
+                        links.setdefault(dest_id, []).append(
+                            (dest_pos, IssueLink(type_name, inward=IssueRef(source_key, source_cat))))
+        # Issues under an Epic also carry its key in parent_key; only placed sub-tasks count as sub-tasks.
+        subtasks = {}
+        keys = [row[1] for row in rows]
+        for chunk in _chunks(keys):
+            for parent_key, key, status_category in conn.execute(
+                    f"SELECT parent_key, key, status_category FROM issues WHERE parent_key IN ({_marks(chunk)}) "
+                    f"AND subtask_pos IS NOT NULL ORDER BY subtask_pos, id", chunk):
+                subtasks.setdefault(parent_key, []).append(IssueRef(key, status_category))
+
+        def ordered(entries):
+            return tuple(link for _, link in sorted(entries, key=lambda entry: (entry[0] is None, entry[0] or 0)))
+
+        records = [IssueRecord(key, summary=summary, issuetype=issuetype, status=status,
+                               status_category=status_category, updated=updated,
+                               links=ordered(links.get(issue_id, ())), subtasks=tuple(subtasks.get(key, ())),
+                               parent=parent_key, assignee=assignee)
+                   for issue_id, key, summary, issuetype, status, status_category, updated, parent_key, assignee in rows]
+        return records, missing
+
+
+account_cache = TTLCache("current_account", ttl=CURRENT_ACCOUNT_TTL_SECONDS)
+
+def current_account(jira_client, identity):
+    """The account id (Cloud) or user name (Server) that currentUser() means for `identity`."""
+    def load():
+        user = jira_executor.get_json(jira_client, "myself")
+        return user.get('accountId') or user.get('name') or user.get('key')
+    return account_cache.get_or_load(identity, load)
+
+
+def verify_webhook(body, secret_param, signature_header, secret=ISSUE_INDEX_WEBHOOK_SECRET):
+    """
+    True if the request carries the webhook secret: as the `secret` query parameter (Jira Server
+    and Data Center) or as an `X-Hub-Signature: sha256=<hmac of body>` header (Jira Cloud).
+    """
+    if not secret:
+        return False
+    if secret_param and hmac.compare_digest(secret_param, secret):
+        return True
+    if signature_header and signature_header.startswith('sha256='):
+        expected = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(signature_header[len('sha256='):], expected)
+    return False
+
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_issue_index():
+    """The process's IssueIndex when ISSUE_INDEX_ENABLED, else None."""
+    global _index
+    if not ISSUE_INDEX_ENABLED:
+        return None
+    with _index_lock:
+        if _index is None:
+            _index = IssueIndex()
+        return _index
+
+
+class IndexSyncer:
+    """
+    Keeps the index's projects loaded: syncs each one that was never synced or whose last
+    full sync is older than ISSUE_INDEX_RESYNC_SECONDS. Like the filter scheduler, only the
+    process holding `lock_path` runs it.
+    """
+
+    def __init__(self, index, server, email, token, projects, poll_seconds=ISSUE_INDEX_POLL_SECONDS,
+                 lock_path=ISSUE_INDEX_LOCK_PATH):
+        self.index = index
+        self.server = server
+        self.email = email
+        self.token = token
+        self.projects = projects
+        self.poll_seconds = poll_seconds
+        self.lock_path = lock_path
+        self._lock_file = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sync_due(self):
+        synced = self.index.synced_projects(self.server)
+        due = [p for p in self.projects if time.time() - synced.get(p.upper(), 0) >= ISSUE_INDEX_RESYNC_SECONDS]
+        if not due:
+            return 0
+        started = time.time()
+        jira_client = client_pool.get(self.server, self.email, self.token)
+        count = self.index.sync(jira_client, due, self.server)
+        print(f"Issue index synced {count} issues of {', '.join(due)} in {time.time() - started:.1f}s.")
+        return count
+
+    def _loop(self):
+        self._lock_file = try_lock_file(self.lock_path)
+        if self._lock_file is None:
+            return
+        while not self._stop.is_set():
+            try:
+                self.sync_due()
+            except Exception as e:
+                print(f"Warning: Issue index sync failed: {e}\n{traceback.format_exc()}")
+            self._stop.wait(self.poll_seconds)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="issue-index-sync", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+syncer = None
+
+def init_app(app):
+    """Adds the `flask sync-index` command and starts the background sync when the index is enabled."""
+    global syncer
+
+    @app.cli.command('sync-index')
+    def sync_index_command():
+        """Loads ISSUE_INDEX_PROJECTS into the local issue index now."""
+        server = os.getenv("JIRA_SERVER")
+        jira_client = client_pool.get(server, ISSUE_INDEX_JIRA_EMAIL, ISSUE_INDEX_JIRA_TOKEN)
+        count = (get_issue_index() or IssueIndex()).sync(jira_client, ISSUE_INDEX_PROJECTS, server)
+        print(f"Synced {count} issues of {', '.join(ISSUE_INDEX_PROJECTS)}.")
+
+    index = get_issue_index()
+    if index is None or syncer is not None:
+        return
+    server = os.getenv("JIRA_SERVER")
+    if not (server and ISSUE_INDEX_JIRA_EMAIL and ISSUE_INDEX_JIRA_TOKEN and ISSUE_INDEX_PROJECTS):
+        app.logger.warning("ISSUE_INDEX_ENABLED is set but no projects or sync credentials are configured.")
+        return
+    if not ISSUE_INDEX_WEBHOOK_SECRET:
+        app.logger.warning("ISSUE_INDEX_WEBHOOK_SECRET is not set; the index only changes on full re-syncs.")
+    syncer = IndexSyncer(index, server, ISSUE_INDEX_JIRA_EMAIL, ISSUE_INDEX_JIRA_TOKEN, ISSUE_INDEX_PROJECTS)
+    syncer.start()
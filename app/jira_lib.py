@@ -0,0 +1,32 @@
+"""
+Lazy access to the `jira` client library and the parts of `requests` the app uses.
+
+Together they take longer to import than Flask and the rest of the app, so modules refer to
+them as `jira_lib.JIRA`, `jira_lib.JIRAError`, ... and the import happens on first use: when
+the first client is built, or when an `except jira_lib.JIRAError` clause first sees an error.
+"""
+import importlib
+
+# Attribute -> (module, name) it is loaded from.
+_LAZY = {
+    'JIRA': ('jira', 'JIRA'),
+    'JIRAError': ('jira', 'JIRAError'),
+    'HTTPAdapter': ('requests.adapters', 'HTTPAdapter'),
+    'RequestsConnectionError': ('requests.exceptions', 'ConnectionError'),
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attribute = _LAZY[name]
+    value = getattr(importlib.import_module(module_name), attribute)
+    # Later lookups find the module global and no longer come through here.
+    globals()[name] = value
+    return value
+
+
+def load():
+    """Imports everything now, e.g. while warming up an instance."""
+    for name in _LAZY:
+        __getattr__(name)
@@ -1,22 +1,24 @@
-import requests
-from jira import JIRAError
-from .utils import sanitize_jql_list
+import time
+from . import jira_lib
+from .search import search_issues_by_keys, search_issues_by_parents
+from .executor import jira_executor
+from .cache import TTLCache
+from .metadata import status_category_of
+from .changelog import changelog_summaries, seconds_in_status, seconds_blocked
+from .config import GROUP_MEMBERS_TTL_SECONDS, GROUP_MEMBERS_STALE_SECONDS
+
+group_members_cache = TTLCache("group_members", ttl=GROUP_MEMBERS_TTL_SECONDS, stale_ttl=GROUP_MEMBERS_STALE_SECONDS)
 
 
 def fetch_users_for_app_dropdown(jira_client, group_name):
     """
     Fetches members of a specific Jira group.
     """
-    server_url = jira_client._options['server'].rstrip('/')
-    api_endpoint = f"{server_url}/rest/api/2/group/member"
     formatted_users = []
     start_at = 0
     while True:
         params = {"groupname": group_name, "startAt": start_at, "maxResults": 50, "includeInactiveUsers": "false"}
-        # This is the line that crashes
-        response = jira_client._session.get(api_endpoint, params=params)
-        response.raise_for_status()
-        data = response.json()
+        data = jira_executor.get_json(jira_client, "group/member", params)
         values = data.get('values', [])
         for user_data in values:
             if user_data.get('accountId') and user_data.get('displayName'):
@@ -27,125 +29,214 @@ def fetch_users_for_app_dropdown(jira_client, group_name):
     formatted_users.sort(key=lambda x: x.get('text', '').lower())
     return formatted_users
 
-def adjust_assignee_quoting(params_dict):
+def fetch_users_for_app_dropdown_cached(jira_client, group_name, refresh=False):
     """
-    Adjusts the 'assignee' value in the parameters dictionary for JQL compatibility.
-
-    If the 'assignee' value exists, is a string, is not 'currentUser()',
-    is not '__any__', and is not already enclosed in double quotes,
-    it wraps the value in double quotes.
-
-    Returns:
-        dict: The dictionary with the assignee value potentially adjusted.
-              Note: The dictionary is modified in-place.
+    Cached variant of fetch_users_for_app_dropdown, shared by all users of the same Jira server.
     """
-    assignee_key = 'assignee'
-
-    if assignee_key in params_dict:
-        assignee_value = params_dict[assignee_key]
-
-        if isinstance(assignee_value, str):
-            if (assignee_value != "currentUser()" and
-                    assignee_value != "__any__" and
-                    not (assignee_value.startswith('"') and assignee_value.endswith('"'))):
-                print(f"Adjusting assignee: Wrapping '{assignee_value}' in quotes for JQL.")
-                params_dict[assignee_key] = f'"{assignee_value}"'
-
-    return params_dict
+    server_url = jira_client._options['server'].rstrip('/')
+    return group_members_cache.get_or_load(f"{server_url}|{group_name}",
+                                           lambda: fetch_users_for_app_dropdown(jira_client, group_name),
+                                           refresh=refresh)
 
 # --- Jira Issue Processing Helpers ---
 def _extract_basic_issue_data(issue, server_url):
-    """Extracts common fields from a Jira issue."""
-    issue_type_name = "Unknown Type"
-    status_name = "Unknown Status"
-    if hasattr(issue.fields, 'issuetype') and hasattr(issue.fields.issuetype, 'name'):
-        issue_type_name = issue.fields.issuetype.name
-    if hasattr(issue.fields, 'status') and hasattr(issue.fields.status, 'name'):
-        status_name = issue.fields.status.name
-
+    """Extracts common fields from an IssueRecord."""
     return {
         'key': issue.key,
-        'summary': issue.fields.summary,
-        'issuetype': issue_type_name,
-        'status': status_name,
+        'summary': issue.summary,
+        'issuetype': issue.issuetype or "Unknown Type",
+        'status': issue.status or "Unknown Status",
         'url': f"{server_url}/browse/{issue.key}"
     }
 
 # --- Filter Processors ---
-def process_ready_tasks(jira_client, issues, config, server_url):
+def process_ready_tasks(jira_client, issues, config, server_url, fetch_issues=search_issues_by_keys):
     """
     Processes issues for the 'Ready Tasks' filter.
     Uses 'resolved_category' and 'blocking_link_type' from the config dict.
+    A 'blocker_depth' above 1 switches to process_ready_tasks_transitive.
     """
+    if config.get('blocker_depth', 1) > 1:
+        return process_ready_tasks_transitive(jira_client, issues, config, server_url, fetch_issues=fetch_issues)
     ready_main_tasks_data = []
     resolved_category = config.get('resolved_category', 'Done') 
     blocking_link_type = config.get('blocking_link_type', 'Blocks') 
 
     for main_task in issues:
         basic_data = _extract_basic_issue_data(main_task, server_url)
-        is_ready = False
         reason_parts = []
-        has_blockers = False
         has_resolved_blockers = True 
 
-        if hasattr(main_task.fields, 'issuelinks') and main_task.fields.issuelinks:
-            for link in main_task.fields.issuelinks:
-                if hasattr(link, 'type') and link.type.name == blocking_link_type:
-                    if hasattr(link, 'inwardIssue'):
-                        has_blockers = True
-                        blocker = link.inwardIssue
-                        blocker_status_category = "Unknown"
-                        try:
-                            blocker_status_category = blocker.fields.status.statusCategory.name
-                        except AttributeError:
-                            print(f"Warning: Could not determine status category for blocker {blocker.key}")
-
-                        if blocker_status_category != resolved_category:
-                            has_resolved_blockers = False
-                            reason_parts.append(f"blocked by {blocker.key} (status: {blocker_status_category})")
-                            break
+        for link in main_task.links:
+            if link.type_name == blocking_link_type and link.inward is not None:
+                blocker = link.inward
+                blocker_status_category = blocker.status_category
+                if blocker_status_category is None:
+                    blocker_status_category = status_category_of(jira_client, blocker.status_id)
+                if blocker_status_category is None:
+                    print(f"Warning: Could not determine status category for blocker {blocker.key}")
+                    blocker_status_category = "Unknown"
+
+                if blocker_status_category != resolved_category:
+                    has_resolved_blockers = False
+                    reason_parts.append(f"blocked by {blocker.key} (status: {blocker_status_category})")
+                    break
 
         if has_resolved_blockers:
-            is_ready = True
             reason_parts.append(f"All '{blocking_link_type}' blockers are resolved (in '{resolved_category}' category)")
-
-        if is_ready:
             basic_data['reason'] = ", ".join(reason_parts)
             ready_main_tasks_data.append(basic_data)
 
     return ready_main_tasks_data
 
+# Blocker chains listed per task in the transitive 'Ready Tasks' reason.
+_MAX_REPORTED_CHAINS = 5
+
+def _blocker_keys(issue, blocking_link_type):
+    return [link.inward.key for link in issue.links if link.type_name == blocking_link_type and link.inward is not None]
+
+def build_blocker_graph(jira_client, issues, blocking_link_type, max_depth, fetch_issues=search_issues_by_keys):
+    """
+    Builds {issue_key: (status_category, [blocker_keys])} for the given issues and every
+    blocker reachable within `max_depth` levels. Each level is fetched with one batched
+    key search (`fetch_issues`); blockers on the last level keep the status embedded in
+    their link and are recorded without blockers of their own.
+    """
+    graph = {}
+    embedded = {}
+    for issue in issues:
+        graph[issue.key] = (issue.status_category, _blocker_keys(issue, blocking_link_type))
+        for link in issue.links:
+            if link.type_name == blocking_link_type and link.inward is not None:
+                embedded[link.inward.key] = link.inward.status_category
+
+    frontier = {key for _, blockers in graph.values() for key in blockers if key not in graph}
+    for _ in range(1, max_depth):
+        if not frontier:
+            break
+        next_frontier = set()
+        for blocker in fetch_issues(jira_client, frontier, fields="status,issuelinks"):
+            blocker_keys = _blocker_keys(blocker, blocking_link_type)
+            graph[blocker.key] = (blocker.status_category, blocker_keys)
+            for link in blocker.links:
+                if link.type_name == blocking_link_type and link.inward is not None:
+                    embedded.setdefault(link.inward.key, link.inward.status_category)
+            next_frontier.update(key for key in blocker_keys if key not in graph)
+        frontier = next_frontier - graph.keys()
+
+    for key, status_category in embedded.items():
+        graph.setdefault(key, (status_category, []))
+    return graph
+
+def process_ready_tasks_transitive(jira_client, issues, config, server_url, fetch_issues=search_issues_by_keys):
+    """
+    'Ready Tasks' with multi-level blockers: a blocker only counts as resolved if it is in
+    'resolved_category' and, recursively, so are its own blockers, up to 'blocker_depth'
+    levels. Shared blockers are evaluated once; cycles are reported in the reason.
+    """
+    resolved_category = config.get('resolved_category', 'Done')
+    blocking_link_type = config.get('blocking_link_type', 'Blocks')
+    max_depth = config['blocker_depth']
+    issues = list(issues)
+    graph = build_blocker_graph(jira_client, issues, blocking_link_type, max_depth, fetch_issues=fetch_issues)
+    memo = {}
+
+    def evaluate(key, remaining, path):
+        """Returns (effectively_resolved, chains); chains spell out the resolved blocker paths."""
+        status_category, blockers = graph.get(key, (None, []))
+        own_resolved = status_category == resolved_category
+        if key in path:
+            cycle = path[path.index(key):] + [key]
+            return own_resolved, [f"cycle {' → '.join(cycle)}"]
+        if not own_resolved:
+            return False, []
+        if remaining <= 1 or not blockers:
+            return True, [key]
+        memo_key = (key, remaining)
+        if memo_key not in memo:
+            chains = []
+            result = True
+            for blocker in blockers:
+                resolved, blocker_chains = evaluate(blocker, remaining - 1, path + [key])
+                if not resolved:
+                    result, chains = False, []
+                    break
+                chains.extend(f"{key} ← {chain}" for chain in blocker_chains)
+            memo[memo_key] = (result, chains[:_MAX_REPORTED_CHAINS])
+        return memo[memo_key]
+
+    ready_main_tasks_data = []
+    for main_task in issues:
+        is_ready = True
+        chains = []
+        for blocker in graph[main_task.key][1]:
+            resolved, blocker_chains = evaluate(blocker, max_depth, [main_task.key])
+            if not resolved:
+                is_ready = False
+                break
+            chains.extend(blocker_chains)
+        if not is_ready:
+            continue
+        basic_data = _extract_basic_issue_data(main_task, server_url)
+        reason = f"All '{blocking_link_type}' blockers are resolved up to {max_depth} levels deep (in '{resolved_category}' category)"
+        if chains:
+            shown = chains[:_MAX_REPORTED_CHAINS]
+            more = f", +{len(chains) - len(shown)} more" if len(chains) > len(shown) else ""
+            reason += f": {'; '.join(shown)}{more}"
+        basic_data['reason'] = reason
+        ready_main_tasks_data.append(basic_data)
+    return ready_main_tasks_data
+
+def fetch_status_categories(jira_client, issue_keys):
+    """
+    Resolves the status category name of many issues with a few batched searches.
+    Returns a dict of {issue_key: category_name}; keys Jira did not return are absent.
+    """
+    status_categories = {}
+    if not issue_keys:
+        return status_categories
+    for issue in search_issues_by_keys(jira_client, issue_keys, fields="status"):
+        if issue.status_category is None:
+            print(f"Warning: Could not determine status category for {issue.key}")
+            continue
+        status_categories[issue.key] = issue.status_category
+    return status_categories
+
 def process_parent_tasks_with_resolved_children(jira_client, issues, config, server_url):
     """
     Filters issues to find parents where all direct sub-tasks are resolved.
     Uses 'resolved_category' from the config dict.
+    Sub-tasks without an embedded status category are resolved by status id from the server's
+    metadata, and any left over in one batched lookup for all parents.
     """
     parent_tasks_data = []
     resolved_category = config.get('resolved_category', 'Done')
 
-    for issue in issues:
-        if not hasattr(issue.fields, 'subtasks') or not issue.fields.subtasks:
-            continue
-
+    parents = [issue for issue in issues if issue.subtasks]
+
+    # The issues may be shared with other processors, so resolved categories are kept aside.
+    fetched_categories = {}
+    for issue in parents:
+        for subtask_ref in issue.subtasks:
+            if subtask_ref.status_category is None and subtask_ref.status_id is not None:
+                category = status_category_of(jira_client, subtask_ref.status_id)
+                if category is not None:
+                    fetched_categories[subtask_ref.key] = category
+    missing_keys = [subtask_ref.key for issue in parents for subtask_ref in issue.subtasks
+                    if subtask_ref.status_category is None and subtask_ref.key not in fetched_categories]
+    try:
+        fetched_categories.update(fetch_status_categories(jira_client, missing_keys))
+    except jira_lib.JIRAError as e:
+        print(f"Jira Error fetching sub-task statuses: {e}")
+
+    for issue in parents:
         all_children_resolved = True
         subtask_details = []
 
-        for subtask_ref in issue.fields.subtasks:
-            subtask_status_category = "Unknown Status"
-            try:
-                if hasattr(subtask_ref, 'fields') and hasattr(subtask_ref.fields, 'status'):
-                     subtask_status_category = subtask_ref.fields.status.statusCategory.name
-                else:
-                    print(f"Fetching details for subtask {subtask_ref.key} (parent {issue.key})")
-                    subtask = jira_client.issue(subtask_ref.key, fields="status")
-                    subtask_status_category = subtask.fields.status.statusCategory.name
-
-            except AttributeError as e:
-                 print(f"Error accessing status for subtask {subtask_ref.key} (parent {issue.key}): {e}")
-                 all_children_resolved = False
-            except JIRAError as e:
-                 print(f"Jira Error fetching subtask {subtask_ref.key}: {e}")
-                 all_children_resolved = False 
+        for subtask_ref in issue.subtasks:
+            subtask_status_category = subtask_ref.status_category
+            if subtask_status_category is None:
+                subtask_status_category = fetched_categories.get(subtask_ref.key, "Unknown Status")
 
             subtask_details.append(f"{subtask_ref.key}: {subtask_status_category}")
 
@@ -160,6 +251,129 @@ def process_parent_tasks_with_resolved_children(jira_client, issues, config, ser
 
     return parent_tasks_data
 
+# Fields of the issues below a rollup's top level; sub-tasks come embedded in their parent.
+_ROLLUP_CHILD_FIELDS = "summary,issuetype,status,parent,subtasks"
+
+def fetch_hierarchy(jira_client, roots, max_depth, fetch_children=search_issues_by_parents):
+    """
+    Walks down from `roots` one level at a time: each level's children are fetched with batched
+    `parent in (...)` searches (sub-task types excluded, since every parent embeds its sub-tasks),
+    for up to `max_depth` levels. Returns ({key: IssueRecord or IssueRef}, {key: [child keys]});
+    sub-tasks appear as IssueRefs and are always leaves.
+    """
+    nodes = {root.key: root for root in roots}
+    children = {}
+
+    def add_subtasks(issue):
+        for subtask in issue.subtasks:
+            children.setdefault(issue.key, []).append(subtask.key)
+            nodes.setdefault(subtask.key, subtask)
+
+    for root in roots:
+        add_subtasks(root)
+    frontier = [root.key for root in roots]
+    for _ in range(max_depth):
+        if not frontier:
+            break
+        level = []
+        for child in fetch_children(jira_client, frontier, _ROLLUP_CHILD_FIELDS,
+                                    extra_jql="issuetype not in subTaskIssueTypes()"):
+            if child.parent not in nodes:
+                continue
+            siblings = children.setdefault(child.parent, [])
+            if child.key not in siblings:
+                siblings.append(child.key)
+            # A top issue can sit below another one (a Story under an Epic); it is only walked once.
+            if child.key not in nodes:
+                nodes[child.key] = child
+                add_subtasks(child)
+                level.append(child.key)
+        frontier = level
+    return nodes, children
+
+def process_hierarchy_rollup(jira_client, issues, config, server_url, fetch_children=search_issues_by_parents):
+    """
+    Completion rollups for hierarchies such as Epic -> Story/Task -> Sub-task.
+    Uses 'resolved_category' and 'hierarchy_depth' (levels fetched below each top issue) from the config dict.
+    Returns one result per top issue; its 'rollup' lists every parent beneath it, depth-first, with the
+    same 'done'/'total' counts (over all descendants), 'percent_done' and 'closable' (open, with every
+    descendant resolved) fields as the top issue itself.
+    """
+    resolved_category = config.get('resolved_category', 'Done')
+    roots = list(issues)
+    nodes, children = fetch_hierarchy(jira_client, roots, config.get('hierarchy_depth', 1), fetch_children)
+    # Resolved and total descendants per parent; each node is counted once however it is reached.
+    totals = {}
+
+    def status_category(node):
+        if node.status_category is None and getattr(node, 'status_id', None) is not None:
+            return status_category_of(jira_client, node.status_id)
+        return node.status_category
+
+    def rollup(key):
+        if key not in totals:
+            done = total = 0
+            for child_key in children.get(key, ()):
+                child_done, child_total = rollup(child_key)
+                done += child_done + (status_category(nodes[child_key]) == resolved_category)
+                total += child_total + 1
+            totals[key] = (done, total)
+        return totals[key]
+
+    def row(issue, depth):
+        data = _extract_basic_issue_data(issue, server_url)
+        done, total = rollup(issue.key)
+        data['depth'] = depth
+        data['done'] = done
+        data['total'] = total
+        data['percent_done'] = round(100 * done / total) if total else None
+        data['closable'] = bool(total) and done == total and issue.status_category != resolved_category
+        if not total:
+            data['reason'] = "No child issues"
+        else:
+            data['reason'] = f"{data['percent_done']}% done ({done} of {total} beneath resolved)"
+            if data['closable']:
+                data['reason'] += ", ready to close"
+        return data
+
+    def parents_below(key, depth):
+        for child_key in children.get(key, ()):
+            if children.get(child_key):
+                yield row(nodes[child_key], depth)
+                yield from parents_below(child_key, depth + 1)
+
+    results = []
+    for root in roots:
+        result = row(root, 0)
+        result['rollup'] = list(parents_below(root.key, 1))
+        results.append(result)
+    return results
+
+def process_stale_tasks(jira_client, issues, config, server_url, summaries=changelog_summaries):
+    """
+    Issues that have been in their current status for at least 'stale_days' days, according to
+    their changelogs. Also reports the days spent in 'blocked_statuses' or flagged as an impediment.
+    """
+    stale_seconds = config.get('stale_days', 14) * 86400
+    blocked_statuses = config.get('blocked_statuses') or ()
+    now = time.time()
+    stale_tasks_data = []
+    for issue, summary in summaries(jira_client, issues):
+        in_status = seconds_in_status(summary, now)
+        if in_status is None or in_status < stale_seconds:
+            continue
+        basic_data = _extract_basic_issue_data(issue, server_url)
+        basic_data['days_in_status'] = round(in_status / 86400, 1)
+        basic_data['days_blocked'] = round(seconds_blocked(summary, blocked_statuses, now) / 86400, 1)
+        reason = f"In '{summary['status']}' for {basic_data['days_in_status']:g} days"
+        if basic_data['days_blocked']:
+            reason += f", blocked for {basic_data['days_blocked']:g} days in total"
+        if summary['flagged']:
+            reason += ", flagged"
+        basic_data['reason'] = reason
+        stale_tasks_data.append(basic_data)
+    return stale_tasks_data
+
 def process_simple_list(jira_client, issues, config, server_url):
     """Generic processor for filters that just need a list of keys/summaries/status."""
     results_data = []
@@ -168,83 +382,3 @@ def process_simple_list(jira_client, issues, config, server_url):
         basic_data['reason'] = basic_data['status']
         results_data.append(basic_data)
     return results_data
-
-# --- JQL Builder ---
-def build_jql(filter_id, user_params):
-    """
-    Constructs the JQL query based on filter definition and user parameters.
-    Handles 'Any Assignee' option.
-    Returns:
-        tuple: (jql_string, effective_params)
-    """
-    from .config import FILTERS
-
-    if filter_id not in FILTERS:
-            raise ValueError(f"Filter ID '{filter_id}' not found in configuration.  ")
-
-    filter_config = FILTERS[filter_id]
-    defaults = filter_config.get('defaults', {})
-    effective_params = defaults.copy()
-    effective_params.update(user_params) 
-
-    list_params = ['projects', 'exclude_types', 'include_types']
-    for key in list_params:
-        if key in effective_params:
-            if isinstance(effective_params[key], str):
-                effective_params[key] = [p.strip() for p in effective_params[key].split(',') if p.strip()]
-            elif not isinstance(effective_params[key], list):
-                effective_params[key] = []
-        else:
-            effective_params[key] = []
-
-    if 'assignee' not in effective_params or not effective_params['assignee']:
-         effective_params['assignee'] = 'currentUser()'
-
-    adjust_assignee_quoting(effective_params)
-
-    jql_parts = []
-    assignee_jql_part = None 
-
-    selected_assignee = effective_params.get('assignee')
-    if selected_assignee and selected_assignee != '__any__':
-        assignee_jql_part = f"assignee = {selected_assignee}"
-
-
-    base_jql_template = filter_config.get('base_jql_template', '')
-    if base_jql_template:
-        try:
-            formatted_base = base_jql_template.format(**effective_params)
-            if formatted_base:
-                 jql_parts.append(f"({formatted_base})")
-        except KeyError as e:
-             print(f"Warning: JQL template '{base_jql_template}' missing key {e}. Params: {effective_params}")
-        except Exception as e:
-             print(f"Warning: Error formatting base JQL template '{base_jql_template}': {e}")
-
-
-    if assignee_jql_part:
-        jql_parts.append(assignee_jql_part)
-
-    if effective_params.get('projects'):
-        sanitized_projects = sanitize_jql_list(effective_params['projects'])
-        if sanitized_projects:
-            jql_parts.append(f"project in ({sanitized_projects})")
-    if effective_params.get('include_types'):
-        sanitized_includes = sanitize_jql_list(effective_params['include_types'])
-        if sanitized_includes:
-            jql_parts.append(f"issuetype in ({sanitized_includes})")
-    if effective_params.get('exclude_types'):
-        sanitized_excludes = sanitize_jql_list(effective_params['exclude_types'])
-        if sanitized_excludes:
-            jql_parts.append(f"issuetype not in ({sanitized_excludes})")
-
-
-    jql_string = " AND ".join(filter(None, jql_parts)) 
-
-    order_by = filter_config.get('order_by', 'ORDER BY updated DESC')
-    if jql_string and order_by:
-        jql_string += f" {order_by}"
-    elif not jql_string:
-         print("Warning: JQL string is empty after processing.")
-
-    return jql_string, effective_params
@@ -0,0 +1,126 @@
+import string
+from functools import lru_cache
+from .config import FILTERS
+from .utils import sanitize_jql_list
+
+# Parameters given as comma-separated lists; they are stripped, de-duplicated and sorted.
+LIST_PARAMS = ('projects', 'include_types', 'exclude_types', 'assignees', 'blocked_statuses')
+# Whole-number parameters templates may use (e.g. `-{stale_days}d`); anything else falls back to the default.
+INTEGER_PARAMS = ('stale_days',)
+# Clauses the builder adds itself, in this order, after the filter's own template.
+_CLAUSES = (
+    ('projects', "project in ({})"),
+    ('include_types', "issuetype in ({})"),
+    ('exclude_types', "issuetype not in ({})"),
+)
+ANY_ASSIGNEE = '__any__'
+CURRENT_USER = 'currentUser()'
+# Every member of USER_SELECT_GROUP; the filter passes their account ids as the 'assignees' list.
+GROUP_ASSIGNEE = '__group__'
+
+
+def builder_clause(key, values):
+    """The clause the builder adds for one of the _CLAUSES parameters, e.g. `issuetype not in ("Epic")`."""
+    return dict(_CLAUSES)[key].format(sanitize_jql_list(values))
+
+
+def _normalize_list(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    return sorted({str(item).strip() for item in value if str(item).strip()})
+
+
+def _normalize_assignee(value):
+    if not value:
+        return CURRENT_USER
+    if isinstance(value, str) and value not in (CURRENT_USER, ANY_ASSIGNEE, GROUP_ASSIGNEE) and not value.startswith('"'):
+        return f'"{value}"'
+    return value
+
+
+class FilterQuery:
+    """
+    The JQL recipe of one FILTERS entry, parsed once: its defaults, template fields and ordering.
+
+    compile() turns request parameters into (jql, effective_params). The JQL is canonical:
+    list parameters are sorted and de-duplicated and clauses always come in the same order,
+    so equal parameter sets yield the same string, which is used as part of cache keys.
+    """
+
+    def __init__(self, filter_id, config):
+        self.filter_id = filter_id
+        self.template = config.get('base_jql_template', '')
+        self.order_by = config.get('order_by', 'ORDER BY updated DESC')
+        self.template_fields = {name for _, name, _, _ in string.Formatter().parse(self.template) if name}
+        self.defaults = self.normalize(config.get('defaults', {}))
+        missing = self.template_fields - self.defaults.keys()
+        if missing:
+            print(f"Warning: JQL template of filter '{filter_id}' uses {sorted(missing)} without defaults.")
+
+    @staticmethod
+    def normalize(params):
+        """Canonical form of a parameter dict: lists parsed and sorted, assignee quoted for JQL."""
+        params = dict(params)
+        for key in LIST_PARAMS:
+            if key in params:
+                params[key] = _normalize_list(params[key])
+        for key in INTEGER_PARAMS:
+            if key in params:
+                try:
+                    params[key] = max(0, int(params[key]))
+                except (TypeError, ValueError):
+                    del params[key]
+        if 'assignee' in params:
+            params['assignee'] = _normalize_assignee(params['assignee'])
+        return params
+
+    def effective_params(self, user_params):
+        params = dict(self.defaults)
+        params.update(self.normalize(user_params))
+        params['assignee'] = _normalize_assignee(params.get('assignee'))
+        return params
+
+    def build(self, params):
+        """Renders the JQL for already normalized effective params."""
+        jql_parts = []
+        if self.template:
+            try:
+                jql_parts.append(f"({self.template.format_map(params)})")
+            except (KeyError, IndexError, ValueError) as e:
+                print(f"Warning: JQL template of filter '{self.filter_id}' could not be formatted: {e}")
+        if params['assignee'] == GROUP_ASSIGNEE:
+            jql_parts.append(f"assignee in ({sanitize_jql_list(params.get('assignees'))})")
+        elif params['assignee'] != ANY_ASSIGNEE:
+            jql_parts.append(f"assignee = {params['assignee']}")
+        for key, _ in _CLAUSES:
+            if params.get(key):
+                jql_parts.append(builder_clause(key, params[key]))
+        jql = " AND ".join(jql_parts)
+        if jql and self.order_by:
+            jql += f" {self.order_by}"
+        return jql
+
+    def compile(self, user_params):
+        """Returns (jql, effective_params) for the request parameters. The params dict is a fresh copy."""
+        key = tuple(sorted((name, tuple(value) if isinstance(value, list) else value)
+                           for name, value in user_params.items()))
+        jql, params = self._compile(key)
+        return jql, {name: list(value) if isinstance(value, list) else value for name, value in params.items()}
+
+    @lru_cache(maxsize=1024)
+    def _compile(self, param_items):
+        params = self.effective_params(dict(param_items))
+        return self.build(params), params
+
+
+COMPILED_QUERIES = {filter_id: FilterQuery(filter_id, config) for filter_id, config in FILTERS.items()}
+
+
+def compile_filter_jql(filter_id, user_params):
+    """Returns (jql, effective_params) for a FILTERS entry; raises ValueError for unknown filters."""
+    query = COMPILED_QUERIES.get(filter_id)
+    if query is None:
+        raise ValueError(f"Filter ID '{filter_id}' not found.")
+    return query.compile(user_params)
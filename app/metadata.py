@@ -0,0 +1,88 @@
+import threading
+import time
+from . import jira_lib
+from .cache import TTLCache
+from .executor import jira_executor
+from .config import JIRA_METADATA_TTL_SECONDS, JIRA_METADATA_STALE_SECONDS
+
+# Raw metadata lists per Jira server; refreshed in the background once older than the TTL.
+metadata_cache = TTLCache("jira_metadata", ttl=JIRA_METADATA_TTL_SECONDS, stale_ttl=JIRA_METADATA_STALE_SECONDS)
+# JiraMetadata tables built from the cached lists, per server, rebuilt when the lists are reloaded.
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+class JiraMetadata:
+    """
+    Statuses, status categories, issue types and issue link types of one Jira server,
+    indexed by id (and by lower-cased name where callers look things up by name).
+    """
+
+    def __init__(self, raw):
+        self.loaded_at = raw['loaded_at']
+        self.status_categories = {category['id']: category for category in raw['status_categories']}
+        self.statuses = {status['id']: status for status in raw['statuses']}
+        self.issue_types = {issue_type['id']: issue_type for issue_type in raw['issue_types']}
+        self.link_types = {link_type['name']: link_type for link_type in raw['link_types']}
+        self._categories_by_alias = {}
+        for category in self.status_categories.values():
+            for alias in (category['id'], category.get('key'), category.get('name')):
+                if alias:
+                    self._categories_by_alias[alias.lower()] = category
+        self._link_types_by_name = {name.lower(): link_type for name, link_type in self.link_types.items()}
+
+    def status_category_of(self, status_id):
+        """Name of the category a status id belongs to, or None for unknown statuses."""
+        status = self.statuses.get(str(status_id)) if status_id is not None else None
+        category = self.status_categories.get(status['category_id']) if status else None
+        return category['name'] if category else None
+
+    def category_name(self, value):
+        """Canonical name of a status category given by name, key or id in any case ('done' -> 'Done'), or None."""
+        category = self._categories_by_alias.get(str(value).strip().lower())
+        return category['name'] if category else None
+
+    def link_type(self, name):
+        """{'id', 'name', 'inward', 'outward'} of the link type called `name` in any case, or None."""
+        return self._link_types_by_name.get(str(name).strip().lower())
+
+
+def load_jira_metadata(jira_client):
+    """Fetches the four metadata lists, keeping only what JiraMetadata uses."""
+    statuses = jira_executor.get_json(jira_client, "status")
+    categories = jira_executor.get_json(jira_client, "statuscategory")
+    issue_types = jira_executor.get_json(jira_client, "issuetype")
+    link_types = jira_executor.get_json(jira_client, "issueLinkType").get('issueLinkTypes', [])
+    return {
+        'loaded_at': time.time(),
+        'statuses': [{'id': str(status['id']), 'name': status.get('name'),
+                      'category_id': str((status.get('statusCategory') or {}).get('id'))} for status in statuses],
+        'status_categories': [{'id': str(category['id']), 'key': category.get('key'), 'name': category.get('name')}
+                              for category in categories],
+        'issue_types': [{'id': str(issue_type['id']), 'name': issue_type.get('name'),
+                         'subtask': bool(issue_type.get('subtask'))} for issue_type in issue_types],
+        'link_types': [{'id': str(link_type.get('id')), 'name': link_type['name'], 'inward': link_type.get('inward'),
+                        'outward': link_type.get('outward')} for link_type in link_types],
+    }
+
+
+def get_jira_metadata(jira_client, refresh=False):
+    """Returns the JiraMetadata of the client's server, loading it on first use. Raises JIRAError if that fails."""
+    server_url = jira_client._options['server'].rstrip('/')
+    raw = metadata_cache.get_or_load(server_url, lambda: load_jira_metadata(jira_client), refresh=refresh)
+    with _tables_lock:
+        table = _tables.get(server_url)
+        if table is None or table.loaded_at != raw['loaded_at']:
+            table = _tables[server_url] = JiraMetadata(raw)
+    return table
+
+
+def status_category_of(jira_client, status_id):
+    """Resolves a status id to its category name from the server's metadata; None if unknown or unavailable."""
+    if status_id is None:
+        return None
+    try:
+        return get_jira_metadata(jira_client).status_category_of(status_id)
+    except jira_lib.JIRAError as e:
+        print(f"Jira Error loading metadata to resolve status {status_id}: {e}")
+        return None
@@ -0,0 +1,110 @@
+class IssueRef:
+    """
+    A linked issue or sub-task as embedded in another issue's payload. `status_id` lets processors
+    resolve the category from the server's metadata when the payload does not embed it.
+    """
+    __slots__ = ('key', 'status_category', 'status_id')
+
+    def __init__(self, key, status_category=None, status_id=None):
+        self.key = key
+        self.status_category = status_category
+        self.status_id = status_id
+
+    @classmethod
+    def from_raw(cls, raw):
+        fields = raw.get('fields') or {}
+        return cls(raw.get('key'), _status_category_name(fields), (fields.get('status') or {}).get('id'))
+
+
+class IssueLink:
+    """One entry of `issuelinks`: the link type name and whichever side points at the other issue."""
+    __slots__ = ('type_name', 'inward', 'outward')
+
+    def __init__(self, type_name, inward=None, outward=None):
+        self.type_name = type_name
+        self.inward = inward
+        self.outward = outward
+
+    @classmethod
+    def from_raw(cls, raw):
+        inward = raw.get('inwardIssue')
+        outward = raw.get('outwardIssue')
+        return cls((raw.get('type') or {}).get('name'),
+                   IssueRef.from_raw(inward) if inward else None,
+                   IssueRef.from_raw(outward) if outward else None)
+
+
+class IssueRecord:
+    """
+    Compact, read-only view of a searched issue holding only what the processors use.
+    Fields that were not requested from Jira stay None / empty.
+    """
+    __slots__ = ('key', 'summary', 'issuetype', 'status', 'status_category', 'updated', 'links', 'subtasks', 'parent',
+                 'assignee', 'created')
+
+    def __init__(self, key, summary=None, issuetype=None, status=None, status_category=None, updated=None,
+                 links=(), subtasks=(), parent=None, assignee=None, created=None):
+        self.key = key
+        self.summary = summary
+        self.issuetype = issuetype
+        self.status = status
+        self.status_category = status_category
+        self.updated = updated
+        self.links = links
+        self.subtasks = subtasks
+        self.parent = parent
+        # Account id (Cloud) or user name (Server/Data Center), as the issue index stores it.
+        self.assignee = assignee
+        self.created = created
+
+    @classmethod
+    def from_raw(cls, raw):
+        """Builds a record from one issue of a REST search/issue response."""
+        fields = raw.get('fields') or {}
+        return cls(
+            raw.get('key'),
+            summary=fields.get('summary'),
+            issuetype=(fields.get('issuetype') or {}).get('name'),
+            status=(fields.get('status') or {}).get('name'),
+            status_category=_status_category_name(fields),
+            updated=fields.get('updated'),
+            links=tuple(IssueLink.from_raw(link) for link in fields.get('issuelinks') or ()),
+            subtasks=tuple(IssueRef.from_raw(subtask) for subtask in fields.get('subtasks') or ()),
+            parent=(fields.get('parent') or {}).get('key'),
+            assignee=_user_id(fields.get('assignee')),
+            created=fields.get('created'),
+        )
+
+    def to_dict(self):
+        """JSON-serialisable form, used for snapshots in the shared cache."""
+        return {
+            'key': self.key, 'summary': self.summary, 'issuetype': self.issuetype, 'status': self.status,
+            'status_category': self.status_category, 'updated': self.updated,
+            'links': [[link.type_name, _ref_to_list(link.inward), _ref_to_list(link.outward)] for link in self.links],
+            'subtasks': [_ref_to_list(subtask) for subtask in self.subtasks],
+            'parent': self.parent, 'assignee': self.assignee, 'created': self.created,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data['key'], summary=data.get('summary'), issuetype=data.get('issuetype'), status=data.get('status'),
+            status_category=data.get('status_category'), updated=data.get('updated'),
+            links=tuple(IssueLink(type_name, _ref_from_list(inward), _ref_from_list(outward))
+                        for type_name, inward, outward in data.get('links', ())),
+            subtasks=tuple(_ref_from_list(subtask) for subtask in data.get('subtasks', ())),
+            parent=data.get('parent'), assignee=data.get('assignee'), created=data.get('created'),
+        )
+
+
+def _status_category_name(fields):
+    return ((fields.get('status') or {}).get('statusCategory') or {}).get('name')
+
+def _user_id(user):
+    return (user.get('accountId') or user.get('name')) if user else None
+
+def _ref_to_list(ref):
+    return [ref.key, ref.status_category, ref.status_id] if ref is not None else None
+
+def _ref_from_list(data):
+    return IssueRef(*data) if data is not None else None
@@ -1,31 +1,41 @@
+import csv
+import io
+import itertools
+import json
 import os 
+import time
 from datetime import timedelta 
 from flask import (
-    Blueprint, render_template, request, redirect, url_for, flash, session, current_app
+    Blueprint, render_template, request, redirect, url_for, flash, session, current_app, Response,
+    stream_template, stream_with_context
 )
-from jira import JIRA, JIRAError
 import traceback
-from .filters import get_filter_by_id
-from . import jira_service
-from .config import FILTERS, USER_SELECT_GROUP
+from .filters import (
+    get_filter_by_id, results_cache, run_filters_shared, snapshot_cache, materialized_cache, pushdown_plan_cache
+)
+from . import jira_service, jira_lib
+from .client_pool import client_pool
+from .instrumentation import timed, render_metrics, request_metrics_bound
+from .jira_service import group_members_cache
+from .metadata import get_jira_metadata, metadata_cache
+from .changelog import changelog_cache
+from .executor import jira_executor
+from .issue_index import get_issue_index, verify_webhook
+from .warmup import warm_up
+from .config import FILTERS, USER_SELECT_GROUP, STREAM_RESULTS, WARMUP_ENABLED
 
 bp = Blueprint('main', __name__)
 
 # --- Helper to get Jira Client ---
 def get_jira_client():
-    """Creates and returns an authenticated JIRA client from session data."""
+    """Returns a pooled, authenticated JIRA client for the session's credentials."""
     if 'jira_email' not in session:
         flash("Session expired or invalid. Please login again.", "warning")
         return None
     try:
-        server = session['jira_server']
-        email = session['jira_email']
-        token = session['jira_token']
-        jira_options = {'server': server}
-        jira_client = JIRA(options=jira_options, basic_auth=(email, token), max_retries=1)
-        jira_client.myself() 
-        return jira_client
-    except JIRAError as e:
+        with timed('auth'):
+            return client_pool.get(session['jira_server'], session['jira_email'], session['jira_token'])
+    except jira_lib.JIRAError as e:
         current_app.logger.error(f"Failed to create/authenticate JIRA client: {e.status_code} - {e.text}")
         flash(f"Failed to connect to Jira: {e.text} (Status: {e.status_code}). Please check credentials.", "error")
         return None
@@ -34,6 +44,11 @@ def get_jira_client():
         flash(f"An unexpected error occurred connecting to Jira: {e}", "error")
         return None
 
+def invalidate_jira_client_on_401(error):
+    """Drops the pooled client when Jira rejected the session's credentials."""
+    if isinstance(error, jira_lib.JIRAError) and error.status_code == 401 and 'jira_email' in session:
+        client_pool.invalidate(session['jira_server'], session['jira_email'], session['jira_token'])
+
 @bp.route('/')
 def login():
     if 'jira_email' in session:
@@ -56,10 +71,8 @@ def authenticate():
         return redirect(url_for('main.login'))
 
     try:
-        jira_options = {'server': server}
         current_app.logger.info(f"Attempting to authenticate {email} on {server}")
-        jira = JIRA(options=jira_options, basic_auth=(email, token), max_retries=1)
-        user = jira.myself()
+        user = client_pool.login(server, email, token)
         current_app.logger.info(f"Authentication successful for user: {user.get('displayName', email)}")
 
         session.clear()
@@ -68,12 +81,14 @@ def authenticate():
         session['jira_token'] = token
         session['user_display_name'] = user.get('displayName', email)
         session.permanent = True
+        # Have the server's statuses and link types ready before the first filter runs.
+        jira_executor.submit(get_jira_metadata, client_pool.get(server, email, token))
 
         flash(f"Login successful as {session['user_display_name']}!", "success")
 
         return redirect(url_for('main.select_filter'))
 
-    except JIRAError as e:
+    except jira_lib.JIRAError as e:
         current_app.logger.error(f"Jira Authentication Error: {e.status_code} - {e.text}")
         error_message = f"Login failed. Invalid credentials or Jira connection issue. Status: {e.status_code}."
         flash(error_message, "error")
@@ -86,6 +101,8 @@ def authenticate():
 
 @bp.route('/logout') 
 def logout():
+    if 'jira_email' in session:
+        client_pool.invalidate(session['jira_server'], session['jira_email'], session['jira_token'])
     session.clear()
     flash("You have been logged out.", "info")
     return redirect(url_for('main.login'))
@@ -141,9 +158,12 @@ def configure_filter(filter_id):
 
         current_app.logger.info(f"Filter '{filter_id}' has a user select field. Fetching users from group '{USER_SELECT_GROUP}'.")
         try:
-            user_list_for_select = jira_service.fetch_users_for_app_dropdown(jira_client, USER_SELECT_GROUP)
+            with timed('group_members'):
+                user_list_for_select = jira_service.fetch_users_for_app_dropdown_cached(
+                    jira_client, USER_SELECT_GROUP, refresh=request.args.get('refresh_users') == '1')
             current_app.logger.info(f"Successfully fetched {len(user_list_for_select)} users for the dropdown.")
-        except JIRAError as e:
+        except jira_lib.JIRAError as e:
+            invalidate_jira_client_on_401(e)
             flash(f"Jira Error fetching user list: {e.text}", "error")
             current_app.logger.error(f"Jira Error fetching group '{USER_SELECT_GROUP}': {e.text}")
         except Exception as e:
@@ -153,13 +173,62 @@ def configure_filter(filter_id):
             
     current_param_values = selected_filter.get('defaults', {}).copy()
 
-    return render_template('configure_filter.html',
-                           filter_id=filter_id,
-                           filter_data=selected_filter,
-                           current_values=current_param_values,
-                           assignable_users=user_list_for_select,
-                           username=session.get('user_display_name', 'User'))
+    with timed('render'):
+        return render_template('configure_filter.html',
+                               filter_id=filter_id,
+                               filter_data=selected_filter,
+                               current_values=current_param_values,
+                               assignable_users=user_list_for_select,
+                               user_select_group=USER_SELECT_GROUP,
+                               username=session.get('user_display_name', 'User'))
+
+
+def export_urls(filter_id, user_params):
+    return {label: url_for('main.export_filter', filter_id=filter_id, format=export_format, **user_params)
+            for export_format, label in (('csv', 'CSV'), ('jsonl', 'JSON Lines'))}
+
+def truncation_notice(payload):
+    if not payload['truncated']:
+        return None
+    of_total = f" of {payload['total']}" if payload['total'] else ""
+    return (f"Only the first {payload['fetched']}{of_total} matching issues were evaluated "
+            f"(filter limit). Narrow the parameters to see everything.")
+
+def group_by_assignee(results, group_members):
+    """
+    Splits a whole-group run's results into [(assignee name, results)] sorted by name, keeping
+    each person's results in the filter's order, plus the sorted names of members with none.
+    """
+    groups = {}
+    for result in results:
+        groups.setdefault(result.get('assignee') or "Unassigned", []).append(result)
+    idle_members = sorted((name for name in group_members.values() if name not in groups), key=str.lower)
+    return sorted(groups.items(), key=lambda item: item[0].lower()), idle_members
 
+def stream_filter_results(filter_instance, identity, refresh, summary):
+    """
+    Yields result dicts as the filter produces them, for a streamed results page.
+    `summary` is filled in once the run finishes (or fails), for the template's closing section.
+    """
+    started = time.time()
+    count = 0
+    try:
+        with request_metrics_bound():
+            for batch in filter_instance.stream(identity, refresh=refresh):
+                count += len(batch)
+                yield from batch
+    except Exception as e:
+        invalidate_jira_client_on_401(e)
+        summary['error'] = f"An unexpected error occurred: {e}"
+        current_app.logger.error(f"Error streaming filter '{filter_instance.filter_id}': {e}\n{traceback.format_exc()}")
+        return
+    payload = filter_instance.payload
+    summary['count'] = count
+    summary['notice'] = truncation_notice(payload)
+    summary['scheduled'] = payload.get('scheduled', False)
+    summary['cached_age'] = int(started - payload['generated_at']) if payload['generated_at'] < started else None
+    summary['elapsed'] = round(time.time() - started, 1)
+    current_app.logger.info(f"Streamed {count} results for '{filter_instance.filter_id}' in {summary['elapsed']}s.")
 
 @bp.route('/run_filter/<filter_id>')
 def run_filter(filter_id):
@@ -171,23 +240,229 @@ def run_filter(filter_id):
         return redirect(url_for('main.login'))
 
     user_params = request.args.to_dict()
-    results, error_message, filter_instance = [], None, None
+    refresh = user_params.pop('refresh', None) == '1'
+    stream = user_params.pop('stream', '1' if STREAM_RESULTS else '0') == '1'
+    results, error_message, notice, cached_age, scheduled, filter_instance = [], None, None, None, False, None
+    grouped_results, idle_members = None, None
 
     try:
         filter_instance = get_filter_by_id(filter_id, user_params, jira_client)
         current_app.logger.info(f"Generated JQL: {filter_instance.jql}")
-        issues = filter_instance.execute_search()
-        results = filter_instance.process_results(issues)
+        started = time.time()
+        identity = f"{session['jira_server']}|{session['jira_email'].lower()}"
+        # Results grouped by assignee can only be laid out once all of them are in.
+        if stream and filter_instance.group_members is None:
+            summary = {}
+            response = Response(stream_with_context(stream_template(
+                'results.html',
+                results=stream_filter_results(filter_instance, identity, refresh, summary),
+                streamed=True,
+                summary=summary,
+                refresh_url=url_for('main.run_filter', filter_id=filter_id, refresh='1', **user_params),
+                export_urls=export_urls(filter_id, user_params),
+                filter_name=filter_instance.config['name'],
+                result_title=filter_instance.config.get('result_title', ''),
+                filter_params_used=filter_instance.display_params(),
+                username=session.get('user_display_name', 'User'))))
+            # Ask reverse proxies not to hold the page back until it is complete.
+            response.headers['X-Accel-Buffering'] = 'no'
+            return response
+        with timed('filter'):
+            payload = filter_instance.run(identity, refresh=refresh)
+        results = payload['results']
+        scheduled = payload.get('scheduled', False)
+        if payload['generated_at'] < started:
+            cached_age = int(started - payload['generated_at'])
+        source = 'served from schedule' if scheduled else 'served from cache' if cached_age is not None else 'computed'
+        current_app.logger.info(f"Filter '{filter_id}' results {source}. "
+                                f"Result cache stats: {results_cache.stats}")
+        notice = truncation_notice(payload)
+        if filter_instance.group_members is not None:
+            grouped_results, idle_members = group_by_assignee(results, filter_instance.group_members)
         
     except Exception as e:
+        invalidate_jira_client_on_401(e)
         error_message = f"An unexpected error occurred: {e}"
         tb_str = traceback.format_exc()
         current_app.logger.error(f"Error running filter '{filter_id}': {e}\n{tb_str}")
         
-    return render_template('results.html',
-                           results=results,
-                           error=error_message,
-                           filter_name=filter_instance.config['name'] if filter_instance else "Error",
-                           result_title=filter_instance.config.get('result_title', '') if filter_instance else "Error",
-                           filter_params_used=filter_instance.effective_params if filter_instance else {},
-                           username=session.get('user_display_name', 'User'))
\ No newline at end of file
+    with timed('render'):
+        return render_template('results.html',
+                               results=results,
+                               grouped_results=grouped_results,
+                               idle_members=idle_members,
+                               error=error_message,
+                               notice=notice,
+                               cached_age=cached_age,
+                               scheduled=scheduled,
+                               refresh_url=url_for('main.run_filter', filter_id=filter_id, refresh='1', **user_params),
+                               export_urls=export_urls(filter_id, user_params) if filter_instance else None,
+                               filter_name=filter_instance.config['name'] if filter_instance else "Error",
+                               result_title=filter_instance.config.get('result_title', '') if filter_instance else "Error",
+                               filter_params_used=filter_instance.display_params() if filter_instance else {},
+                               username=session.get('user_display_name', 'User'))
+
+
+# --- Exports ---
+EXPORT_FORMATS = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+def _csv_cell(value):
+    """Keeps spreadsheet apps from evaluating issue text as a formula."""
+    value = "" if value is None else str(value)
+    return "'" + value if value[:1] in ('=', '+', '-', '@') else value
+
+def export_rows(filter_instance, batches, export_format):
+    """Yields the export body chunk by chunk, one chunk per batch of results."""
+    count = 0
+    buffer = io.StringIO()
+    if export_format == 'csv':
+        columns = filter_instance.export_columns
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+    try:
+        with request_metrics_bound():
+            for batch in batches:
+                for record in (row for result in batch for row in filter_instance.export_records(result)):
+                    if export_format == 'csv':
+                        writer.writerow([_csv_cell(record.get(column)) for column in columns])
+                    else:
+                        buffer.write(json.dumps(record, ensure_ascii=False) + "\n")
+                count += len(batch)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+    except Exception as e:
+        # Headers are already sent; dropping the connection marks the download as incomplete.
+        invalidate_jira_client_on_401(e)
+        current_app.logger.error(f"Error exporting filter '{filter_instance.filter_id}' after {count} rows: "
+                                 f"{e}\n{traceback.format_exc()}")
+        raise
+    search = filter_instance.search
+    if search is not None and search.truncated:
+        current_app.logger.warning(f"Export of '{filter_instance.filter_id}' stopped at {search.fetched} of "
+                                   f"{search.total or 'more'} issues (EXPORT_MAX_RESULTS).")
+    current_app.logger.info(f"Exported {count} results for '{filter_instance.filter_id}' as {export_format}.")
+
+@bp.route('/run_filter/<filter_id>/export')
+def export_filter(filter_id):
+    if 'jira_email' not in session:
+        return redirect(url_for('main.login'))
+
+    jira_client = get_jira_client()
+    if not jira_client:
+        return redirect(url_for('main.login'))
+
+    user_params = request.args.to_dict()
+    refresh = user_params.pop('refresh', None) == '1'
+    export_format = user_params.pop('format', 'csv')
+    user_params.pop('stream', None)
+    if export_format not in EXPORT_FORMATS:
+        flash(f"Unknown export format '{export_format}'. Use one of: {', '.join(EXPORT_FORMATS)}.", "error")
+        return redirect(url_for('main.run_filter', filter_id=filter_id, **user_params))
+
+    try:
+        filter_instance = get_filter_by_id(filter_id, user_params, jira_client)
+        identity = f"{session['jira_server']}|{session['jira_email'].lower()}"
+        batches = filter_instance.export_batches(identity, refresh=refresh)
+        # Fetch the first batch before answering, so bad credentials or JQL still end up as a flash message.
+        with timed('filter'):
+            first = next(batches, [])
+    except Exception as e:
+        invalidate_jira_client_on_401(e)
+        current_app.logger.error(f"Error exporting filter '{filter_id}': {e}\n{traceback.format_exc()}")
+        flash(f"Export failed: {e}", "error")
+        if filter_id not in FILTERS:
+            return redirect(url_for('main.select_filter'))
+        return redirect(url_for('main.run_filter', filter_id=filter_id, **user_params))
+
+    filename = f"{filter_id}-{time.strftime('%Y%m%d-%H%M%S')}.{export_format}"
+    response = Response(stream_with_context(export_rows(filter_instance, itertools.chain([first], batches), export_format)),
+                        mimetype=EXPORT_FORMATS[export_format])
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@bp.route('/dashboard')
+def dashboard():
+    if 'jira_email' not in session:
+        return redirect(url_for('main.login'))
+
+    jira_client = get_jira_client()
+    if not jira_client:
+        return redirect(url_for('main.login'))
+
+    filter_ids = [f for f in request.args.getlist('filters') if f in FILTERS] or list(FILTERS)
+    user_params = {k: v for k, v in request.args.items() if v and k not in ('filters', 'refresh')}
+    refresh = request.args.get('refresh') == '1'
+    sections, error_message = [], None
+
+    try:
+        filter_instances = [get_filter_by_id(filter_id, user_params, jira_client) for filter_id in filter_ids]
+        identity = f"{session['jira_server']}|{session['jira_email'].lower()}"
+        started = time.time()
+        with timed('filter'):
+            payloads = run_filters_shared(filter_instances, identity, refresh=refresh)
+        for filter_instance in filter_instances:
+            payload = payloads[filter_instance.filter_id]
+            sections.append({
+                'filter_id': filter_instance.filter_id,
+                'name': filter_instance.config['name'],
+                'result_title': filter_instance.config.get('result_title', ''),
+                'results': payload['results'],
+                'truncated': payload['truncated'],
+                'cached_age': int(started - payload['generated_at']) if payload['generated_at'] < started else None,
+                'scheduled': payload.get('scheduled', False),
+            })
+        current_app.logger.info(f"Dashboard ran {filter_ids}. Result cache stats: {results_cache.stats}")
+    except Exception as e:
+        invalidate_jira_client_on_401(e)
+        error_message = f"An unexpected error occurred: {e}"
+        tb_str = traceback.format_exc()
+        current_app.logger.error(f"Error running dashboard {filter_ids}: {e}\n{tb_str}")
+
+    with timed('render'):
+        return render_template('dashboard.html',
+                               sections=sections,
+                               error=error_message,
+                               filter_params_used=user_params,
+                               refresh_url=url_for('main.dashboard', filters=filter_ids, refresh='1', **user_params),
+                               username=session.get('user_display_name', 'User'))
+
+
+@bp.route('/webhooks/jira', methods=['POST'])
+def jira_webhook():
+    """Applies Jira issue and issue link webhooks to the local issue index."""
+    index = get_issue_index()
+    if index is None:
+        return Response("The issue index is not enabled.", status=404, mimetype='text/plain')
+    if not verify_webhook(request.get_data(), request.args.get('secret'), request.headers.get('X-Hub-Signature')):
+        current_app.logger.warning(f"Rejected Jira webhook from {request.remote_addr}: bad or missing secret.")
+        return Response("Forbidden", status=403, mimetype='text/plain')
+    event = request.get_json(silent=True)
+    if not isinstance(event, dict):
+        return Response("Expected a JSON webhook payload.", status=400, mimetype='text/plain')
+    try:
+        applied = index.apply_webhook(event)
+    except Exception as e:
+        current_app.logger.error(f"Error applying Jira webhook '{event.get('webhookEvent')}': {e}\n{traceback.format_exc()}")
+        return Response("Could not apply the event.", status=500, mimetype='text/plain')
+    return {'event': event.get('webhookEvent'), 'applied': applied}
+
+
+@bp.route('/warmup')
+def warmup():
+    """Startup probe target for new instances; see warmup.warm_up."""
+    if not WARMUP_ENABLED:
+        return Response("Warmup is not enabled.", status=404, mimetype='text/plain')
+    timings = warm_up(current_app._get_current_object())
+    current_app.logger.info(f"Warmup finished: {timings}")
+    return timings
+
+
+@bp.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint for this worker process."""
+    return Response(render_metrics(caches=[results_cache, snapshot_cache, materialized_cache, group_members_cache,
+                                           metadata_cache, changelog_cache, pushdown_plan_cache]),
+                    mimetype='text/plain; version=0.0.4')
\ No newline at end of file
@@ -0,0 +1,137 @@
+import json
+import os
+import threading
+import time
+import traceback
+from .client_pool import client_pool
+from .utils import try_lock_file
+from .filters import get_filter_by_id, materialized_cache
+from .config import (
+    FILTERS, SCHEDULER_ENABLED, SCHEDULER_JIRA_EMAIL, SCHEDULER_JIRA_TOKEN, SCHEDULED_FILTERS,
+    SCHEDULED_FILTERS_FILE, SCHEDULER_DEFAULT_INTERVAL_SECONDS, SCHEDULER_POLL_SECONDS, SCHEDULER_LOCK_PATH,
+    SCHEDULED_RESULT_MAX_INTERVALS
+)
+
+
+def load_schedule():
+    """Returns the valid SCHEDULED_FILTERS entries plus any listed in SCHEDULED_FILTERS_FILE."""
+    entries = list(SCHEDULED_FILTERS)
+    if SCHEDULED_FILTERS_FILE:
+        try:
+            with open(SCHEDULED_FILTERS_FILE, encoding='utf-8') as f:
+                entries.extend(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not read SCHEDULED_FILTERS_FILE '{SCHEDULED_FILTERS_FILE}': {e}")
+    valid = []
+    for entry in entries:
+        if entry.get('filter_id') not in FILTERS:
+            print(f"Warning: Ignoring scheduled entry for unknown filter '{entry.get('filter_id')}'.")
+            continue
+        valid.append({
+            'filter_id': entry['filter_id'],
+            'params': {key: str(value) for key, value in (entry.get('params') or {}).items()},
+            'interval_seconds': int(entry.get('interval_seconds') or SCHEDULER_DEFAULT_INTERVAL_SECONDS),
+        })
+    return valid
+
+
+class FilterScheduler:
+    """
+    Re-runs saved filter parameter sets on a daemon thread and materializes their payloads.
+
+    Each run goes through BaseFilter.run(refresh=True), so incremental filters only fetch
+    what changed since the previous run. The payload is stored in `materialized_cache`
+    under the same key /run_filter computes for this user and parameters, and served from
+    there until SCHEDULED_RESULT_MAX_INTERVALS intervals have passed.
+
+    With several gunicorn workers only the one holding SCHEDULER_LOCK_PATH runs entries;
+    the others read its results through the shared cache (CACHE_BACKEND=sqlite).
+    """
+
+    def __init__(self, entries, server, email, token, poll_seconds=SCHEDULER_POLL_SECONDS,
+                 lock_path=SCHEDULER_LOCK_PATH):
+        self.entries = entries
+        self.server = server
+        self.email = email
+        self.token = token
+        self.poll_seconds = poll_seconds
+        self.lock_path = lock_path
+        self._next_run = [0.0] * len(entries)
+        self._lock_file = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def identity(self):
+        # Must match the identity routes build from the session.
+        return f"{self.server}|{self.email.lower()}"
+
+    def run_entry(self, entry):
+        """Runs one entry now and materializes its payload. Returns the payload."""
+        jira_client = client_pool.get(self.server, self.email, self.token)
+        filter_instance = get_filter_by_id(entry['filter_id'], dict(entry['params']), jira_client)
+        payload = filter_instance.run(self.identity, refresh=True)
+        materialized_cache.set(filter_instance._snapshot_key, {
+            'payload': payload,
+            'fresh_until': payload['generated_at'] + entry['interval_seconds'] * SCHEDULED_RESULT_MAX_INTERVALS,
+        })
+        return payload
+
+    def run_due(self, now=None):
+        """Runs every entry whose interval has elapsed. Returns how many ran successfully."""
+        now = time.time() if now is None else now
+        ran = 0
+        for index, entry in enumerate(self.entries):
+            if now < self._next_run[index]:
+                continue
+            self._next_run[index] = now + entry['interval_seconds']
+            started = time.time()
+            try:
+                payload = self.run_entry(entry)
+            except Exception as e:
+                print(f"Warning: Scheduled run of '{entry['filter_id']}' failed: {e}\n{traceback.format_exc()}")
+                continue
+            ran += 1
+            print(f"Scheduled run of '{entry['filter_id']}' materialized {len(payload['results'])} results "
+                  f"in {time.time() - started:.1f}s.")
+        return ran
+
+    def _loop(self):
+        self._lock_file = try_lock_file(self.lock_path)
+        if self._lock_file is None:
+            print("Filter scheduler is running in another process; this one will only serve its results.")
+            return
+        while not self._stop.is_set():
+            self.run_due()
+            self._stop.wait(self.poll_seconds)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="filter-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+scheduler = None
+
+def init_app(app):
+    """Starts the process's filter scheduler when SCHEDULER_ENABLED and entries and credentials are configured."""
+    global scheduler
+    if not SCHEDULER_ENABLED or scheduler is not None:
+        return
+    entries = load_schedule()
+    server = os.getenv("JIRA_SERVER")
+    if not entries or not (server and SCHEDULER_JIRA_EMAIL and SCHEDULER_JIRA_TOKEN):
+        app.logger.warning("SCHEDULER_ENABLED is set but no scheduled filters or scheduler credentials are configured.")
+        return
+    scheduler = FilterScheduler(entries, server, SCHEDULER_JIRA_EMAIL, SCHEDULER_JIRA_TOKEN)
+    scheduler.start()
+    app.logger.info(f"Filter scheduler started for {len(entries)} saved filter(s).")
@@ -0,0 +1,202 @@
+from .config import SEARCH_PAGE_SIZE, SEARCH_PAGE_WORKERS, SEARCH_MAX_RESULTS, JQL_KEY_CHUNK_SIZE
+from .utils import sanitize_jql_list
+from .records import IssueRecord
+from .executor import jira_executor
+
+
+class IssueSearch:
+    """
+    Lazily walks every page of a JQL search and yields IssueRecords as they arrive.
+
+    On Jira Server/Data Center the first page tells us `total`, after which the
+    remaining pages are requested concurrently on the shared JiraExecutor and
+    yielded in order. Jira Cloud only offers token-based paging, so there the
+    next page is prefetched in the background while the caller is still
+    processing the current one. With `workers=1` every page is fetched in the
+    calling thread, which is what tasks already running on the executor need.
+
+    `total` and `truncated` are filled in once iteration has started. Issues are
+    yielded as IssueRecords unless `parse` says otherwise (e.g. raw JSON for the issue index).
+    """
+
+    def __init__(self, jira_client, jql, fields, expand=None, max_results=SEARCH_MAX_RESULTS,
+                 page_size=SEARCH_PAGE_SIZE, workers=SEARCH_PAGE_WORKERS, validate_query=None,
+                 parse=IssueRecord.from_raw):
+        self.jira_client = jira_client
+        self.jql = jql
+        self.fields = fields
+        self.expand = expand
+        self.max_results = max_results
+        self.page_size = page_size
+        self.workers = workers
+        self.validate_query = validate_query
+        self.parse = parse
+        self.total = None
+        self.truncated = False
+        self.fetched = 0
+
+    def __iter__(self):
+        if not self.jql:
+            return iter(())
+        if getattr(self.jira_client, '_is_cloud', False):
+            return self._iter_token_pages()
+        return self._iter_offset_pages()
+
+    def _params(self, max_results):
+        params = {"jql": self.jql, "maxResults": max_results, "fields": self.fields}
+        if self.expand:
+            params["expand"] = self.expand
+        if self.validate_query:
+            params["validateQuery"] = self.validate_query
+        return params
+
+    def _get(self, path, params):
+        return jira_executor.get_json(self.jira_client, path, params)
+
+    def _fetch_offset_page(self, start_at, max_results):
+        params = self._params(max_results)
+        params["startAt"] = start_at
+        return self._get("search", params)
+
+    def _to_issues(self, raw_issues):
+        for raw in raw_issues:
+            if self.max_results and self.fetched >= self.max_results:
+                self.truncated = True
+                return
+            self.fetched += 1
+            yield self.parse(raw)
+
+    def _iter_offset_pages(self):
+        first_page_size = min(self.page_size, self.max_results) if self.max_results else self.page_size
+        first = self._fetch_offset_page(0, first_page_size)
+        self.total = first.get('total', 0)
+        yield from self._to_issues(first.get('issues', []))
+
+        # Jira may cap maxResults below what we asked for; the response tells us the real stride.
+        stride = first.get('maxResults') or first_page_size
+        limit = min(self.total, self.max_results) if self.max_results else self.total
+        self.truncated = self.total > limit
+        offsets = range(stride, limit, stride)
+        if self.workers <= 1:
+            for start in offsets:
+                yield from self._to_issues(self._fetch_offset_page(start, min(stride, limit - start)).get('issues', []))
+            return
+        page_sizes = [min(stride, limit - start) for start in offsets]
+        for page in jira_executor.map(self._fetch_offset_page, offsets, page_sizes, window=self.workers):
+            yield from self._to_issues(page.get('issues', []))
+
+    def _fetch_token_page(self, next_page_token):
+        params = self._params(self.page_size)
+        if next_page_token:
+            params["nextPageToken"] = next_page_token
+        return self._get("search/jql", params)
+
+    def _iter_token_pages(self):
+        pending = None
+        try:
+            page = self._fetch_token_page(None)
+            while True:
+                token = page.get('nextPageToken')
+                more = token and not page.get('isLast', False)
+                if not more:
+                    pending = None
+                elif self.workers <= 1:
+                    pending = token
+                else:
+                    pending = jira_executor.submit(self._fetch_token_page, token)
+                yield from self._to_issues(page.get('issues', []))
+                if self.truncated or pending is None:
+                    break
+                page = self._fetch_token_page(pending) if isinstance(pending, str) else pending.result()
+            # Cloud reports no total; the count is only known when the walk reached the end.
+            if self.total is None and not self.truncated:
+                self.total = self.fetched
+        finally:
+            if pending is not None and not isinstance(pending, str):
+                pending.cancel()
+
+
+class ChainedSearch:
+    """
+    Several JQL searches walked one after another as one IssueSearch, e.g. the chunks of a
+    long `assignee in (...)` list. Each keeps its own order; `max_results` caps them together.
+    `total` adds up the chunks' totals, or stays None when the cap stopped the walk early.
+    """
+
+    def __init__(self, jira_client, jqls, fields, expand=None, max_results=SEARCH_MAX_RESULTS, **search_options):
+        self.jira_client = jira_client
+        self.jqls = jqls
+        self.fields = fields
+        self.expand = expand
+        self.max_results = max_results
+        self.search_options = search_options
+        self.total = None
+        self.truncated = False
+        self.fetched = 0
+
+    def __iter__(self):
+        total = 0
+        for position, jql in enumerate(self.jqls):
+            remaining = self.max_results - self.fetched if self.max_results else 0
+            if self.max_results and remaining <= 0:
+                self.truncated = True
+                return
+            search = IssueSearch(self.jira_client, jql, self.fields, expand=self.expand, max_results=remaining,
+                                 **self.search_options)
+            for issue in search:
+                self.fetched += 1
+                yield issue
+            total += search.total or 0
+            if search.truncated:
+                self.truncated = True
+                if position == len(self.jqls) - 1:
+                    self.total = total
+                return
+        self.total = total
+
+
+def search_issues_by_keys(jira_client, keys, fields, expand=None, chunk_size=JQL_KEY_CHUNK_SIZE, extra_jql=None):
+    """
+    Fetches the given issues with one `key in (...)` search per chunk of keys,
+    running the chunks concurrently on the shared JiraExecutor.
+    `extra_jql` is ANDed onto every chunk, e.g. to only return recently updated issues.
+    Unknown or inaccessible keys are skipped rather than failing the whole chunk.
+    """
+    return _search_in_chunks(jira_client, "key", keys, fields, expand, chunk_size, extra_jql)
+
+
+def search_issues_by_parents(jira_client, parent_keys, fields, expand=None, chunk_size=JQL_KEY_CHUNK_SIZE,
+                             extra_jql=None):
+    """
+    Fetches the children of the given issues (e.g. an Epic's Stories) with one `parent in (...)`
+    search per chunk of parent keys, like search_issues_by_keys.
+    """
+    return _search_in_chunks(jira_client, "parent", parent_keys, fields, expand, chunk_size, extra_jql)
+
+
+def _search_in_chunks(jira_client, field, values, fields, expand, chunk_size, extra_jql):
+    unique_values = list(dict.fromkeys(values))
+    chunks = [unique_values[start:start + chunk_size] for start in range(0, len(unique_values), chunk_size)]
+
+    def fetch_chunk(chunk):
+        jql = f"{field} in ({sanitize_jql_list(chunk)})"
+        if extra_jql:
+            jql += f" AND ({extra_jql})"
+        return list(IssueSearch(jira_client, jql, fields, expand=expand, max_results=0,
+                                page_size=chunk_size, workers=1, validate_query="warn"))
+
+    if len(chunks) == 1:
+        yield from fetch_chunk(chunks[0])
+        return
+    for issues in jira_executor.map(fetch_chunk, chunks, window=SEARCH_PAGE_WORKERS):
+        yield from issues
+
+
+def count_issues(jira_client, jql):
+    """
+    Returns how many issues match `jql` using a single maxResults=0 search, or None on
+    Jira Cloud, whose token-paged search does not report a total.
+    """
+    if getattr(jira_client, '_is_cloud', False):
+        return None
+    return jira_executor.get_json(jira_client, "search", {"jql": jql, "maxResults": 0, "fields": "key"}).get('total', 0)
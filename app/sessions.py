@@ -0,0 +1,61 @@
+import secrets
+import time
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+from .cache import SQLiteBackend
+from .config import SESSION_SQLITE_PATH, SESSION_MAX_ENTRIES
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.replaced_sid = None
+
+    def clear(self):
+        # Cleared on login and logout: issue a new id so an old cookie cannot pick up the new session.
+        super().clear()
+        if not self.new and self.replaced_sid is None:
+            self.replaced_sid = self.sid
+            self.sid = secrets.token_urlsafe(32)
+
+
+class SQLiteSessionInterface(SessionInterface):
+    """
+    Keeps session data in a SQLite file shared by every worker on the host, so the
+    Jira token never travels in the cookie. The cookie carries only a random id;
+    unknown or expired ids get a fresh, empty session.
+    """
+
+    def __init__(self, path=SESSION_SQLITE_PATH, max_entries=SESSION_MAX_ENTRIES):
+        self.store = SQLiteBackend(path, max_entries=max_entries)
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            entry = self.store.get(sid)
+            if entry is not None and time.time() - entry[1] < app.permanent_session_lifetime.total_seconds():
+                return ServerSession(entry[0], sid=sid)
+        return ServerSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if session.replaced_sid:
+            self.store.delete(session.replaced_sid)
+        if not session:
+            if session.modified:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if not self.should_set_cookie(app, session):
+            return
+        self.store.set(session.sid, dict(session), time.time())
+        response.set_cookie(name, session.sid, expires=self.get_expiration_time(app, session),
+                            httponly=self.get_cookie_httponly(app), domain=domain, path=path,
+                            secure=self.get_cookie_secure(app), samesite=self.get_cookie_samesite(app))
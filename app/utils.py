@@ -1,3 +1,18 @@
+import os
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; there we assume a single process.
+    fcntl = None
+
+def parse_jira_datetime(value):
+    """'2024-05-01T10:00:00.000+0000' -> epoch seconds, or None if missing or malformed."""
+    try:
+        return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%f%z').timestamp()
+    except (TypeError, ValueError):
+        return None
+
 def sanitize_jql_list(input_list):
     """Takes a list of strings and formats them for a JQL 'in' clause."""
     if not input_list:
@@ -5,4 +20,72 @@ def sanitize_jql_list(input_list):
     sanitized_items = [f'"{str(item).strip()}"' for item in input_list if str(item).strip()]
     if not sanitized_items:
         return ""
-    return ", ".join(sanitized_items)
\ No newline at end of file
+    return ", ".join(sanitized_items)
+
+def split_jql_conjuncts(jql_where):
+    """
+    Splits a JQL where-clause into its top-level AND terms, unwrapping redundant
+    parentheses, e.g. "(a AND b) AND c" -> ["a", "b", "c"]. Terms inside quotes or
+    nested OR groups are left intact.
+    """
+    terms = []
+    pending = [jql_where]
+    while pending:
+        expression = " ".join(pending.pop().split())
+        parts, depth, quote, start, i = [], 0, None, 0, 0
+        while i < len(expression):
+            char = expression[i]
+            if quote:
+                if char == quote:
+                    quote = None
+            elif char in '"\'':
+                quote = char
+            elif char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+            elif depth == 0 and expression[i:i + 5].upper() == ' AND ':
+                parts.append(expression[start:i])
+                start = i + 5
+                i += 4
+            i += 1
+        parts.append(expression[start:])
+        for part in parts:
+            part = part.strip()
+            if len(parts) == 1 and _is_wrapped_in_parens(part):
+                pending.append(part[1:-1])
+            elif len(parts) > 1:
+                pending.append(part)
+            elif part:
+                terms.append(part)
+    return terms
+
+
+def _is_wrapped_in_parens(expression):
+    if not (expression.startswith('(') and expression.endswith(')')):
+        return False
+    depth = 0
+    for i, char in enumerate(expression):
+        depth += char == '('
+        depth -= char == ')'
+        if depth == 0 and i < len(expression) - 1:
+            return False
+    return True
+
+
+def try_lock_file(path):
+    """
+    Takes an exclusive, non-blocking lock on `path` so only one process per host runs a
+    background job. Returns the open lock file (keep it open to hold the lock), or None
+    if another process holds it.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    lock_file = open(path, 'w')
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
@@ -0,0 +1,55 @@
+import os
+import time
+from . import jira_lib
+from .client_pool import client_pool
+from .metadata import get_jira_metadata
+from .config import TEMPLATE_CACHE_DIR, WARMUP_JIRA_EMAIL, WARMUP_JIRA_TOKEN
+
+
+def compile_templates(app):
+    """Loads every template once; with TEMPLATE_CACHE_DIR set, their compiled form is also written there."""
+    names = app.jinja_env.list_templates()
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+
+def warm_up(app):
+    """
+    Does up front what the first requests of a new instance would otherwise wait for: importing the
+    Jira client library, loading the templates and, when JIRA_SERVER and the warmup account are
+    configured, opening a pooled client and loading the server's metadata. Returns milliseconds per
+    step. A Jira failure is reported in 'jira_error' rather than raised; the instance can still serve.
+    """
+    timings = {}
+    started = time.perf_counter()
+    jira_lib.load()
+    timings['imports_ms'] = round((time.perf_counter() - started) * 1000, 1)
+
+    started = time.perf_counter()
+    timings['templates'] = compile_templates(app)
+    timings['templates_ms'] = round((time.perf_counter() - started) * 1000, 1)
+
+    server = os.getenv("JIRA_SERVER")
+    if server and WARMUP_JIRA_EMAIL and WARMUP_JIRA_TOKEN:
+        started = time.perf_counter()
+        try:
+            get_jira_metadata(client_pool.get(server, WARMUP_JIRA_EMAIL, WARMUP_JIRA_TOKEN))
+        except (jira_lib.JIRAError, jira_lib.RequestsConnectionError) as e:
+            print(f"Warning: Warmup could not reach Jira at {server}: {e}")
+            timings['jira_error'] = str(e)
+        timings['jira_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return timings
+
+
+def init_app(app):
+    """Adds the `flask precompile-templates` command, run while building the image."""
+
+    @app.cli.command('precompile-templates')
+    def precompile_templates_command():
+        """Compiles every template into TEMPLATE_CACHE_DIR."""
+        if not TEMPLATE_CACHE_DIR:
+            print("TEMPLATE_CACHE_DIR is not set; there is nowhere to keep compiled templates.")
+            return
+        count = compile_templates(app)
+        print(f"Compiled {count} templates into {TEMPLATE_CACHE_DIR}.")
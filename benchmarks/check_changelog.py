@@ -0,0 +1,108 @@
+"""
+Checks the Stale Tasks filter against time in status and time blocked computed directly from
+the mock dataset's histories, on a Server mock (`expand=changelog`) and a Cloud mock (paged
+/issue/{key}/changelog). Then reruns it to confirm unchanged issues are not read again and
+that only the changelogs of touched issues are.
+
+    python -m benchmarks.check_changelog --issues 2000
+"""
+import argparse
+import sys
+import time
+from .mock_jira import MockDataset, create_mock_app, serve_in_thread, add_dataset_arguments
+
+PARAMS = {'assignee': '__any__', 'stale_days': '7', 'blocked_statuses': 'In Progress'}
+BLOCKED_STATUSES = {'In Progress'}
+
+
+def expected_days(issue, now):
+    """(days in current status, days blocked) replayed from the dataset's own history."""
+    status, flagged, since, last, blocked = 'To Do', False, issue['created'], issue['created'], 0.0
+    for at, items in issue['history']:
+        if status in BLOCKED_STATUSES or flagged:
+            blocked += at - last
+        last = at
+        for item in items:
+            if item['field'] == 'status':
+                status, since = item['toString'], at
+            else:
+                flagged = item['toString'] == 'Impediment'
+    if status in BLOCKED_STATUSES or flagged:
+        blocked += now - last
+    return (now - since) / 86400, blocked / 86400
+
+
+def changelog_calls(dataset):
+    with dataset.lock:
+        calls = dataset.stats['calls']
+        return sum(count for endpoint, count in calls.items() if endpoint.startswith('/rest/api/2/issue/'))
+
+
+def reset_stats(dataset):
+    with dataset.lock:
+        dataset.stats = {'calls': {}, 'bytes': 0, 'throttled': 0}
+
+
+def check(args, deployment_type):
+    from app.client_pool import client_pool
+    from app.changelog import iter_changelog
+    from app.filters import get_filter_by_id
+
+    dataset = MockDataset(issues=args.issues, users=args.users, link_density=args.link_density,
+                          subtask_fanout=args.subtask_fanout, done_ratio=args.done_ratio,
+                          my_share=args.my_share, epic_share=args.epic_share, seed=args.seed)
+    server, base_url = serve_in_thread(create_mock_app(dataset, latency_ms=args.latency_ms,
+                                                       deployment_type=deployment_type))
+    failures = 0
+    try:
+        client_pool.login(base_url, 'check@example.com', 'token')
+        jira_client = client_pool.get(base_url, 'check@example.com', 'token')
+        for phase in ('cold', 'cached', 'touched'):
+            if phase == 'touched':
+                dataset.touch(args.changes)
+            reset_stats(dataset)
+            filter_instance = get_filter_by_id('stale_tasks', dict(PARAMS), jira_client)
+            started = time.perf_counter()
+            payload = filter_instance.execute_post_filter()
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            now = time.time()
+            wrong = 0
+            for result in payload['results']:
+                in_status, blocked = expected_days(dataset.issues[result['key']], now)
+                if abs(in_status - result['days_in_status']) > 0.1 or abs(blocked - result['days_blocked']) > 0.1:
+                    wrong += 1
+            missing = 0
+            if not payload['truncated']:
+                keys = {result['key'] for result in payload['results']}
+                missing = sum(1 for key in dataset.matches(filter_instance.jql)
+                              if expected_days(dataset.issues[key], now)[0] >= 7 and key not in keys)
+            failures += bool(wrong or missing)
+            print(f"{deployment_type:<8} {phase:<8} {payload['fetched']:>7} {len(payload['results']):>7} "
+                  f"{changelog_calls(dataset):>10} {elapsed_ms:>9.1f}  {'yes' if not (wrong or missing) else 'NO'}")
+        # Paging must not change what is read.
+        for key in list(dataset.issues)[:50]:
+            if list(iter_changelog(jira_client, key, page_size=1)) != list(iter_changelog(jira_client, key)):
+                print(f"{deployment_type}: changelog of {key} differs when paged one entry at a time.")
+                failures += 1
+    finally:
+        server.shutdown()
+        client_pool.clear()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_dataset_arguments(parser)
+    parser.add_argument('--changes', type=int, default=200, help="Issues touched before the last run.")
+    args = parser.parse_args()
+
+    print(f"{'mock':<8} {'phase':<8} {'fetched':>7} {'stale':>7} {'changelogs':>10} {'ms':>9}  ok")
+    failures = check(args, "Server") + check(args, "Cloud")
+    if failures:
+        print(f"{failures} check(s) failed.")
+        sys.exit(1)
+    print("Stale Tasks matches the dataset.")
+
+
+if __name__ == '__main__':
+    main()
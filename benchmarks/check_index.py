@@ -0,0 +1,135 @@
+"""
+Checks that filters evaluated on the local issue index match the same filters run against Jira.
+
+A mock Jira dataset is bulk-synced into a temporary index, every indexable filter is compared
+for a few parameter sets, then issues and links are changed in the mock and the matching
+webhooks are posted to /webhooks/jira before comparing again. Also prints both paths' timings.
+Results are compared as sets, since issues updated within the same second may come in any order.
+
+    python -m benchmarks.check_index --issues 2000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+PARAM_SETS = [
+    {},
+    {'projects': 'STM'},
+    {'assignee': '__any__'},
+    {'assignee': '__group__'},
+    {'assignee': 'user-3'},
+    {'include_types': 'Story,Task'},
+    {'blocker_depth': '3', 'assignee': '__any__'},
+]
+COMPARED = ('results', 'truncated', 'fetched', 'total')
+SECRET = 'check-index'
+
+
+def normalized(payload, field):
+    # `updated` has one-second resolution and issues touched together tie; Jira orders ties arbitrarily too.
+    if field == 'results':
+        return sorted(payload['results'], key=lambda result: result['key'])
+    return payload[field]
+
+
+def compare(filters, jira_client, identity, label):
+    from app.filters import get_filter_by_id
+    failures = 0
+    for filter_id in filters:
+        for params in PARAM_SETS:
+            remote = get_filter_by_id(filter_id, dict(params), jira_client)
+            started = time.perf_counter()
+            expected = remote.execute_post_filter()
+            remote_ms = (time.perf_counter() - started) * 1000
+            local_filter = get_filter_by_id(filter_id, dict(params), jira_client)
+            started = time.perf_counter()
+            local = local_filter.execute_local(identity)
+            local_ms = (time.perf_counter() - started) * 1000
+            if local is None:
+                print(f"{label:<10} {filter_id:<28} {str(params):<44} not answered by the index")
+                failures += 1
+                continue
+            ok = all(normalized(expected, field) == normalized(local, field) for field in COMPARED)
+            failures += not ok
+            print(f"{label:<10} {filter_id:<28} {str(params):<44} {len(local['results']):>5} "
+                  f"{remote_ms:>9.1f} {local_ms:>9.1f}  {'yes' if ok else 'NO'}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    from .mock_jira import MockDataset, create_mock_app, serve_in_thread, add_dataset_arguments, BLOCKS_LINK_TYPE
+    add_dataset_arguments(parser)
+    parser.add_argument('--changes', type=int, default=50, help="Issues changed between the two comparisons.")
+    args = parser.parse_args()
+
+    state_dir = tempfile.mkdtemp()
+    os.environ.update(ISSUE_INDEX_ENABLED='1', ISSUE_INDEX_PATH=os.path.join(state_dir, 'index.sqlite3'),
+                      ISSUE_INDEX_WEBHOOK_SECRET=SECRET, FLASK_SECRET_KEY='check')
+    dataset = MockDataset(issues=args.issues, users=args.users, link_density=args.link_density,
+                          subtask_fanout=args.subtask_fanout, done_ratio=args.done_ratio,
+                          my_share=args.my_share, epic_share=args.epic_share, seed=args.seed)
+    server, base_url = serve_in_thread(create_mock_app(dataset, latency_ms=args.latency_ms))
+    os.environ['JIRA_SERVER'] = base_url
+
+    from app import create_app
+    from app.client_pool import client_pool
+    from app.config import FILTERS
+    from app.filters import get_filter_by_id
+    from app.issue_index import get_issue_index
+    app = create_app()
+    client = app.test_client()
+    try:
+        client_pool.login(base_url, 'check@example.com', 'token')
+        jira_client = client_pool.get(base_url, 'check@example.com', 'token')
+        identity = f"{base_url}|check@example.com"
+        index = get_issue_index()
+        started = time.perf_counter()
+        count = index.sync(jira_client, ['STM', 'DEL'], base_url)
+        print(f"Synced {count} issues in {time.perf_counter() - started:.1f}s.\n")
+        print(f"{'phase':<10} {'filter':<28} {'params':<44} {'rows':>5} {'jira ms':>9} {'local ms':>9}  ok")
+        # Filters whose JQL goes beyond what the index understands always run against Jira.
+        filters = [f for f in FILTERS if get_filter_by_id(f, {}, jira_client).index_query(identity) is not None]
+        failures = compare(filters, jira_client, identity, 'synced')
+
+        def post(event):
+            response = client.post(f'/webhooks/jira?secret={SECRET}', json=event)
+            if response.status_code != 200:
+                raise RuntimeError(f"Webhook rejected with {response.status_code}: {response.data!r}")
+
+        for key in dataset.touch(args.changes):
+            post({'webhookEvent': 'jira:issue_updated', 'issue': dataset.to_json(key)})
+        # A new blocker between two open issues, and one existing link removed.
+        with dataset.lock:
+            open_keys = [k for k, i in dataset.issues.items() if i['status']['statusCategory']['name'] != 'Done']
+            blocker, blocked = open_keys[0], open_keys[1]
+            dataset.issues[blocked]['blockers'].append(blocker)
+            dataset.issues[blocker]['blocks'].append(blocked)
+            linked = next(k for k, i in dataset.issues.items() if i['blockers'] and k != blocked)
+            removed = dataset.issues[linked]['blockers'].pop()
+            dataset.issues[removed]['blocks'].remove(linked)
+        post({'webhookEvent': 'issuelink_created', 'issueLink': {
+            'id': f"{blocked}-{blocker}", 'sourceIssueId': blocker, 'destinationIssueId': blocked,
+            'issueLinkType': BLOCKS_LINK_TYPE}})
+        post({'webhookEvent': 'issuelink_deleted', 'issueLink': {
+            'id': f"{linked}-{removed}", 'sourceIssueId': removed, 'destinationIssueId': linked,
+            'issueLinkType': BLOCKS_LINK_TYPE}})
+        if client.post('/webhooks/jira?secret=wrong', json={}).status_code != 403:
+            print("Webhook without the right secret was not rejected.")
+            failures += 1
+        print()
+        failures += compare(filters, jira_client, identity, 'webhooks')
+    finally:
+        server.shutdown()
+        client_pool.clear()
+
+    if failures:
+        print(f"{failures} comparison(s) differ between the issue index and Jira.")
+        sys.exit(1)
+    print("Issue index and Jira results are identical.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Runs the same filter for many concurrent requests against a rate-limited mock Jira.
+
+The mock answers calls beyond --jira-rate per second with 429 and `Retry-After: 1`. Each
+executor setting below runs --concurrency identical filter evaluations for one user at
+once, and reports wall time, calls Jira received, 429s, retries and failed runs:
+
+    direct     no coalescing, no client-side rate limit
+    limited    a token bucket just under the mock's limit, bursts of half a second's calls
+    coalesce   identical in-flight GETs shared (the default)
+    both       coalescing and the token bucket (JIRA_RATE_LIMIT_PER_SECOND set)
+
+    python -m benchmarks.check_outbound --issues 2000 --latency-ms 30 --jira-rate 20
+"""
+import argparse
+import threading
+import time
+from .mock_jira import MockDataset, create_mock_app, serve_in_thread, add_dataset_arguments
+
+
+def settings(args):
+    return [
+        ('direct', {'coalesce': False, 'rate_limit': 0}),
+        ('limited', {'coalesce': False, 'rate_limit': args.jira_rate * 0.9}),
+        ('coalesce', {'coalesce': True, 'rate_limit': 0}),
+        ('both', {'coalesce': True, 'rate_limit': args.jira_rate * 0.9}),
+    ]
+
+
+def run_concurrently(filter_factory, concurrency):
+    """Starts all runs together; returns the number that raised."""
+    barrier = threading.Barrier(concurrency)
+    failures = []
+
+    def run():
+        filter_instance = filter_factory()
+        barrier.wait()
+        try:
+            filter_instance.execute_post_filter()
+        except Exception as e:
+            failures.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(failures)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_dataset_arguments(parser)
+    parser.add_argument('--jira-rate', type=int, default=20, help="Calls per second the mock allows before 429.")
+    parser.add_argument('--concurrency', type=int, default=8, help="Identical filter runs started at once.")
+    parser.add_argument('--filter', default='ready_tasks')
+    args = parser.parse_args()
+
+    from app.client_pool import client_pool
+    from app.executor import jira_executor
+    from app.filters import get_filter_by_id
+    from app.instrumentation import JIRA_RETRIES
+
+    dataset = MockDataset(issues=args.issues, users=args.users, link_density=args.link_density,
+                          subtask_fanout=args.subtask_fanout, done_ratio=args.done_ratio,
+                          my_share=args.my_share, epic_share=args.epic_share, seed=args.seed)
+    server, base_url = serve_in_thread(create_mock_app(dataset, latency_ms=args.latency_ms,
+                                                       rate_limit=args.jira_rate))
+    print(f"{'setting':<10} {'wall s':>8} {'calls':>6} {'429s':>6} {'retries':>8} {'failed':>7}")
+    try:
+        for label, options in settings(args):
+            jira_executor.coalesce = options['coalesce']
+            jira_executor.rate_limit = options['rate_limit']
+            jira_executor.rate_burst = max(1, args.jira_rate // 2)
+            jira_executor._server_buckets.clear()
+            jira_executor._held_until.clear()
+            time.sleep(1.5)  # let the mock's window and any earlier penalty pass
+            client_pool.login(base_url, 'check@example.com', 'token')
+            jira_client = client_pool.get(base_url, 'check@example.com', 'token')
+            with dataset.lock:
+                dataset.stats = {'calls': {}, 'bytes': 0, 'throttled': 0}
+            retries_before = sum(JIRA_RETRIES._values.values())
+            started = time.perf_counter()
+            failed = run_concurrently(lambda: get_filter_by_id(args.filter, {}, jira_client), args.concurrency)
+            elapsed = time.perf_counter() - started
+            with dataset.lock:
+                calls, throttled = sum(dataset.stats['calls'].values()), dataset.stats['throttled']
+            retries = sum(JIRA_RETRIES._values.values()) - retries_before
+            print(f"{label:<10} {elapsed:>8.2f} {calls:>6} {throttled:>6} {retries:>8} {failed:>7}")
+            client_pool.clear()
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
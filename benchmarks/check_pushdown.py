@@ -0,0 +1,80 @@
+"""
+Checks that JQL pushdown and the Python post-filter return identical results.
+
+Every filter with a pushdown probe is run both ways against the local mock Jira for
+a few parameter sets and datasets, and the results and truncation are compared (a pushdown
+run's counts cover only the narrowed search).
+Also prints what each path cost and which one the planner would pick ("pushdown" in FILTERS
+enables it for full runs).
+
+    python -m benchmarks.check_pushdown --issues 2000
+    python -m benchmarks.check_pushdown --issues 2000 --done-ratio 0.95 --link-density 0.1
+"""
+import argparse
+import sys
+from .mock_jira import MockDataset, create_mock_app, serve_in_thread, add_dataset_arguments
+
+PARAM_SETS = [
+    {},
+    {'projects': 'STM'},
+    {'assignee': '__any__'},
+    {'assignee': '__group__'},
+    {'blocker_depth': '3'},
+    {'assignee': '__any__', 'blocker_depth': '2', 'exclude_types': ''},
+]
+COMPARED = ('results', 'truncated')
+
+
+def run_path(dataset, execute):
+    with dataset.lock:
+        dataset.stats = {'calls': {}, 'bytes': 0}
+    payload = execute()
+    with dataset.lock:
+        return payload, sum(dataset.stats['calls'].values()), dataset.stats['bytes']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_dataset_arguments(parser)
+    parser.add_argument('--seeds', default='42,7,1234', help="Comma-separated dataset seeds to check.")
+    args = parser.parse_args()
+
+    from app.client_pool import client_pool
+    from app.config import FILTERS
+    from app.filters import get_filter_by_id
+
+    failures = 0
+    print(f"{'seed':>5} {'filter':<28} {'params':<44} {'plan':<12} {'post calls/KiB':>15} {'push calls/KiB':>15}  ok")
+    for seed in [int(s) for s in args.seeds.split(',') if s.strip()]:
+        dataset = MockDataset(issues=args.issues, users=args.users, link_density=args.link_density,
+                              subtask_fanout=args.subtask_fanout, done_ratio=args.done_ratio,
+                              my_share=args.my_share, epic_share=args.epic_share, seed=seed)
+        server, base_url = serve_in_thread(create_mock_app(dataset, latency_ms=args.latency_ms))
+        try:
+            client_pool.login(base_url, 'check@example.com', 'token')
+            jira_client = client_pool.get(base_url, 'check@example.com', 'token')
+            for filter_id in FILTERS:
+                for params in PARAM_SETS:
+                    filter_instance = get_filter_by_id(filter_id, dict(params), jira_client)
+                    if filter_instance.pushdown_probe() is None:
+                        continue
+                    plan = filter_instance.plan()
+                    post, post_calls, post_bytes = run_path(dataset, filter_instance.execute_post_filter)
+                    push, push_calls, push_bytes = run_path(dataset, filter_instance.execute_pushdown)
+                    ok = all(post[field] == push[field] for field in COMPARED)
+                    failures += not ok
+                    print(f"{seed:>5} {filter_id:<28} {str(params):<44} {plan:<12} "
+                          f"{post_calls:>6}/{post_bytes / 1024:>8.1f} {push_calls:>6}/{push_bytes / 1024:>8.1f}  "
+                          f"{'yes' if ok else 'NO'}")
+        finally:
+            server.shutdown()
+            client_pool.clear()
+
+    if failures:
+        print(f"{failures} parameter set(s) returned different results with pushdown.")
+        sys.exit(1)
+    print("Pushdown and post-filter results are identical.")
+
+
+if __name__ == '__main__':
+    main()
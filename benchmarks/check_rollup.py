@@ -0,0 +1,77 @@
+"""
+Checks the Epic Completion Rollup against counts computed directly from the mock dataset,
+and that each hierarchy level costs one batched `parent in (...)` search (per chunk of
+parents) instead of one search per parent.
+
+    python -m benchmarks.check_rollup --issues 2000
+"""
+import argparse
+import sys
+from .mock_jira import MockDataset, create_mock_app, serve_in_thread, add_dataset_arguments
+
+PARAM_SETS = [
+    {},
+    {'projects': 'STM'},
+    {'hierarchy_depth': '2'},
+    {'include_types': 'Epic,Story', 'hierarchy_depth': '2'},
+]
+
+
+def expected_rollup(dataset, key, depth, resolved_category='Done'):
+    """(done, total) over the issues below `key`, walking `depth` levels plus the sub-tasks of the last one."""
+    issues = dataset.issues
+    below = [k for k, i in issues.items() if i['parent'] == key and i['issuetype'] != 'Sub-task'] if depth else []
+    done = total = 0
+    for child in below + issues[key]['subtasks']:
+        child_done, child_total = expected_rollup(dataset, child, depth - 1) if child in below else (0, 0)
+        done += child_done + (issues[child]['status']['statusCategory']['name'] == resolved_category)
+        total += child_total + 1
+    return done, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_dataset_arguments(parser)
+    args = parser.parse_args()
+
+    from app.client_pool import client_pool
+    from app.filters import get_filter_by_id
+
+    dataset = MockDataset(issues=args.issues, users=args.users, link_density=args.link_density,
+                          subtask_fanout=args.subtask_fanout, done_ratio=args.done_ratio,
+                          my_share=args.my_share, epic_share=args.epic_share, seed=args.seed)
+    server, base_url = serve_in_thread(create_mock_app(dataset, latency_ms=args.latency_ms))
+    failures = 0
+    print(f"{'params':<56} {'roots':>5} {'rows':>5} {'calls':>5}  ok")
+    try:
+        client_pool.login(base_url, 'check@example.com', 'token')
+        jira_client = client_pool.get(base_url, 'check@example.com', 'token')
+        for params in PARAM_SETS:
+            filter_instance = get_filter_by_id('epic_rollup', dict(params), jira_client)
+            depth = filter_instance.effective_params['hierarchy_depth']
+            with dataset.lock:
+                dataset.stats = {'calls': {}, 'bytes': 0, 'throttled': 0}
+            payload = filter_instance.execute_post_filter()
+            with dataset.lock:
+                calls = sum(dataset.stats['calls'].values())
+            ok = True
+            rows = 0
+            for result in payload['results']:
+                for row in filter_instance.export_records(result):
+                    rows += 1
+                    done, total = expected_rollup(dataset, row['key'], depth - row['depth'])
+                    ok = ok and (row['done'], row['total']) == (done, total)
+            failures += not ok
+            print(f"{str(params):<56} {len(payload['results']):>5} {rows:>5} {calls:>5}  {'yes' if ok else 'NO'}")
+    finally:
+        server.shutdown()
+        client_pool.clear()
+
+    if failures:
+        print(f"{failures} rollup(s) differ from the dataset.")
+        sys.exit(1)
+    print("Rollups match the dataset.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""
+Concurrent load test of the app under gunicorn against a local mock Jira.
+
+For each worker configuration the app is started with gunicorn.conf.py (shared SQLite
+sessions and cache in a temporary directory), then N virtual users, each with its own
+cookie jar and login, request a weighted mix of pages for a fixed duration. Reports
+throughput, latency percentiles, errors and the Jira calls the mock received.
+
+    python -m benchmarks.load_test --clients 20 --duration 30 --configs sync:1:1,gthread:2:8,gthread:4:8
+"""
+import argparse
+import http.cookiejar
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from .mock_jira import add_dataset_arguments
+from .run_benchmarks import MockJiraProcess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# (weight, label, path) of what a virtual user requests next.
+MIX = [
+    (5, 'run_filter', '/run_filter/ready_tasks'),
+    (3, 'run_filter', '/run_filter/parents_resolved_children'),
+    (1, 'refresh', '/run_filter/ready_tasks?refresh=1'),
+    (1, 'configure', '/configure_filter/ready_tasks'),
+    (1, 'dashboard', '/dashboard'),
+]
+
+
+def parse_configs(value):
+    """'gthread:4:8' -> worker class, workers, threads."""
+    configs = []
+    for item in value.split(','):
+        worker_class, workers, threads = item.strip().split(':')
+        configs.append((worker_class, int(workers), int(threads)))
+    return configs
+
+
+def wait_until_up(base_url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("gunicorn exited during startup.")
+        try:
+            urllib.request.urlopen(f"{base_url}/", timeout=2).read()
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise RuntimeError("gunicorn did not start in time.")
+
+
+def start_app(config, port, mock_url, state_dir):
+    worker_class, workers, threads = config
+    env = dict(os.environ,
+               JIRA_SERVER=mock_url, PORT=str(port), FLASK_SECRET_KEY='load-test',
+               WEB_CONCURRENCY=str(workers), GUNICORN_WORKER_CLASS=worker_class, GUNICORN_THREADS=str(threads),
+               CACHE_SQLITE_PATH=os.path.join(state_dir, 'cache.sqlite3'),
+               SESSION_SQLITE_PATH=os.path.join(state_dir, 'sessions.sqlite3'),
+               SCHEDULER_ENABLED='0')
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'run:app'],
+                               cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_until_up(f"http://127.0.0.1:{port}", process)
+    return process
+
+
+class VirtualUser:
+    def __init__(self, base_url, index, rng):
+        self.base_url = base_url
+        self.rng = rng
+        self.email = f"user{index}@example.com"
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def login(self):
+        data = urllib.parse.urlencode({'jira_email': self.email, 'jira_api_token': 'token'}).encode()
+        with self.opener.open(f"{self.base_url}/authenticate", data=data, timeout=60) as response:
+            if '/select_filter' not in response.geturl():
+                raise RuntimeError(f"Login of {self.email} failed.")
+
+    def request(self, path):
+        """Returns (status, seconds). Redirects back to the login page count as errors."""
+        started = time.perf_counter()
+        try:
+            with self.opener.open(f"{self.base_url}{path}", timeout=120) as response:
+                response.read()
+                status = 401 if urllib.parse.urlsplit(response.geturl()).path == '/' else response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except (urllib.error.URLError, ConnectionError, TimeoutError):
+            status = 0
+        return status, time.perf_counter() - started
+
+
+def run_user(user, deadline, samples, lock):
+    weights = [weight for weight, _, _ in MIX]
+    while time.monotonic() < deadline:
+        _, label, path = user.rng.choices(MIX, weights=weights)[0]
+        status, seconds = user.request(path)
+        with lock:
+            samples.append((label, status, seconds))
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000 if ordered else 0.0
+
+
+def run_config(config, args, mock):
+    with tempfile.TemporaryDirectory() as state_dir:
+        process = start_app(config, args.port, mock.base_url, state_dir)
+        try:
+            base_url = f"http://127.0.0.1:{args.port}"
+            users = [VirtualUser(base_url, i, random.Random(args.seed + i)) for i in range(args.clients)]
+            for user in users:
+                user.login()
+            mock.reset()
+            samples, lock = [], threading.Lock()
+            started = time.monotonic()
+            threads = [threading.Thread(target=run_user, args=(user, started + args.duration, samples, lock))
+                       for user in users]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.monotonic() - started
+            stats = mock.stats()
+        finally:
+            process.terminate()
+            process.wait()
+    seconds = [s for _, status, s in samples if status == 200]
+    return {
+        'config': "{}:{}:{}".format(*config),
+        'requests': len(samples),
+        'rps': len(samples) / elapsed,
+        'p50_ms': percentile(seconds, 0.50),
+        'p95_ms': percentile(seconds, 0.95),
+        'p99_ms': percentile(seconds, 0.99),
+        'errors': sum(1 for _, status, _ in samples if status != 200),
+        'jira_calls': sum(stats['calls'].values()),
+        'by_page': {label: statistics.median([s for l, st, s in samples if l == label and st == 200] or [0]) * 1000
+                    for _, label, _ in MIX},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_dataset_arguments(parser)
+    parser.add_argument('--port', type=int, default=8090, help="Port for the app under test.")
+    parser.add_argument('--mock-port', type=int, default=8089)
+    parser.add_argument('--clients', type=int, default=20, help="Concurrent virtual users.")
+    parser.add_argument('--duration', type=float, default=30, help="Seconds of load per configuration.")
+    parser.add_argument('--configs', default='sync:1:1,gthread:2:8,gthread:4:8',
+                        help="Comma-separated worker_class:workers:threads to compare.")
+    args = parser.parse_args()
+
+    mock = MockJiraProcess(args, args.mock_port)
+    report = []
+    try:
+        for config in parse_configs(args.configs):
+            report.append(run_config(config, args, mock))
+    finally:
+        mock.stop()
+
+    labels = list(dict.fromkeys(label for _, label, _ in MIX))
+    print(f"{'config':<14} {'reqs':>6} {'rps':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6} "
+          f"{'calls':>6}  " + " ".join(f"{label + ' p50':>15}" for label in labels))
+    for row in report:
+        print(f"{row['config']:<14} {row['requests']:>6} {row['rps']:>7.1f} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+              f"{row['p99_ms']:>8.1f} {row['errors']:>6} {row['jira_calls']:>6}  "
+              + " ".join(f"{row['by_page'][label]:>15.1f}" for label in labels))
+
+
+if __name__ == '__main__':
+    main()
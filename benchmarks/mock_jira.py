@@ -0,0 +1,400 @@
+"""
+Local stand-in for the parts of the Jira REST API this app uses.
+
+Serves /rest/api/2/{serverInfo,myself,field,status,statuscategory,issuetype,issueLinkType,search,search/jql,
+issue/<key>,issue/<key>/changelog,group/member}
+from a generated, deterministic dataset. Only the JQL the app itself generates is
+understood (AND-ed terms over project, assignee, issuetype, statusCategory, key,
+parent, issueLinkType, subTaskIssueTypes(), relative `updated`/`created` and
+`NOT status CHANGED AFTER`), which is enough to benchmark filters end to end.
+
+Run standalone:  python -m benchmarks.mock_jira --issues 2000 --latency-ms 50
+"""
+import argparse
+import json
+import logging
+import random
+import re
+import threading
+import time
+from flask import Flask, Response, request
+from werkzeug.serving import make_server
+from app.utils import split_jql_conjuncts
+
+STATUSES = [
+    {'id': '1', 'name': 'To Do', 'statusCategory': {'id': 2, 'key': 'new', 'name': 'To Do'}},
+    {'id': '3', 'name': 'In Progress', 'statusCategory': {'id': 4, 'key': 'indeterminate', 'name': 'In Progress'}},
+    {'id': '10001', 'name': 'Done', 'statusCategory': {'id': 3, 'key': 'done', 'name': 'Done'}},
+]
+ISSUE_TYPES = ['Task', 'Story', 'Bug', 'Epic']
+BLOCKS_LINK_TYPE = {'id': '10000', 'name': 'Blocks', 'inward': 'is blocked by', 'outward': 'blocks'}
+CURRENT_USER = 'user-0'
+
+
+def jira_time(timestamp):
+    return time.strftime('%Y-%m-%dT%H:%M:%S.000+0000', time.gmtime(timestamp))
+
+
+class MockDataset:
+    """Generated issues, users and the request statistics of the mock server."""
+
+    def __init__(self, issues=1000, projects=("STM", "DEL"), users=40, link_density=0.4,
+                 subtask_fanout=3, subtask_ratio=0.3, done_ratio=0.5, my_share=0.3, epic_share=0.5, seed=42):
+        self.rnd = random.Random(seed)
+        self.users = [{'accountId': f'user-{i}', 'displayName': f'User {i:03d}'} for i in range(users)]
+        self.issues = {}
+        self.order = []
+        self.lock = threading.Lock()
+        self.stats = {'calls': {}, 'bytes': 0, 'throttled': 0}
+        now = time.time()
+        counters = dict.fromkeys(projects, 0)
+
+        def new_issue(project, issue_type, parent=None):
+            counters[project] += 1
+            key = f"{project}-{counters[project]}"
+            status = STATUSES[2] if self.rnd.random() < done_ratio else self.rnd.choice(STATUSES[:2])
+            self.issues[key] = {
+                'key': key, 'project': project, 'summary': f"{issue_type} {key}", 'issuetype': issue_type,
+                'status': status,
+                'assignee': CURRENT_USER if self.rnd.random() < my_share else self.rnd.choice(self.users)['accountId'],
+                'updated': now - self.rnd.uniform(3600, 90 * 86400), 'blockers': [], 'blocks': [], 'subtasks': [],
+                'parent': parent,
+            }
+            self.order.append(key)
+            return key
+
+        for _ in range(issues):
+            project = self.rnd.choice(projects)
+            issue_type = self.rnd.choice(ISSUE_TYPES)
+            key = new_issue(project, issue_type)
+            if issue_type != 'Epic' and self.rnd.random() < subtask_ratio:
+                for _ in range(self.rnd.randint(1, max(1, subtask_fanout))):
+                    self.issues[key]['subtasks'].append(new_issue(project, 'Sub-task', parent=key))
+        keys = list(self.issues)
+        for key in keys:
+            if self.rnd.random() < link_density:
+                self.issues[key]['blockers'] = self.rnd.sample(keys, self.rnd.randint(1, 2))
+                for blocker in self.issues[key]['blockers']:
+                    self.issues[blocker]['blocks'].append(key)
+        # Issues under Epics of their project; a separate generator keeps the rest of the data unchanged.
+        epic_rnd = random.Random(seed + 1)
+        epics = {project: [k for k in keys if self.issues[k]['issuetype'] == 'Epic' and self.issues[k]['project'] == project]
+                 for project in projects}
+        for key in keys:
+            issue = self.issues[key]
+            if (issue['issuetype'] not in ('Epic', 'Sub-task') and epics[issue['project']]
+                    and epic_rnd.random() < epic_share):
+                issue['parent'] = epic_rnd.choice(epics[issue['project']])
+        # Creation dates and status/flag histories, again from their own generator.
+        history_rnd = random.Random(seed + 2)
+        for issue in self.issues.values():
+            self._generate_history(issue, history_rnd)
+        self.order.sort(key=lambda k: self.issues[k]['updated'], reverse=True)
+
+    def _generate_history(self, issue, rnd):
+        """Walks an issue from 'To Do' to its current status, sometimes flagging it on the way."""
+        issue['created'] = issue['updated'] - rnd.uniform(0, 120 * 86400)
+        names = [status['name'] for status in STATUSES]
+        chain = [rnd.choice(names) for _ in range(rnd.randint(0, 4))] + [issue['status']['name']]
+        statuses, flags = [], []
+        previous = 'To Do'
+        for name in chain:
+            if name != previous:
+                statuses.append({'field': 'status', 'fieldtype': 'jira', 'fromString': previous, 'toString': name})
+                previous = name
+        if rnd.random() < 0.2:
+            flags.append({'field': 'Flagged', 'fieldtype': 'custom', 'fromString': None, 'toString': 'Impediment'})
+            if rnd.random() < 0.5:
+                flags.append({'field': 'Flagged', 'fieldtype': 'custom', 'fromString': 'Impediment', 'toString': None})
+        status_times = sorted(rnd.uniform(issue['created'], issue['updated']) for _ in statuses)
+        flag_times = sorted(rnd.uniform(issue['created'], issue['updated']) for _ in flags)
+        issue['history'] = sorted([(t, [e]) for t, e in zip(status_times, statuses)]
+                                  + [(t, [e]) for t, e in zip(flag_times, flags)], key=lambda entry: entry[0])
+        issue['status_changed'] = status_times[-1] if status_times else None
+
+    def histories(self, key):
+        return [{'id': f"{key}-{position}", 'created': jira_time(at), 'items': items}
+                for position, (at, items) in enumerate(self.issues[key]['history'])]
+
+    # --- Serialisation ---
+    def _ref(self, key):
+        issue = self.issues[key]
+        return {'id': key, 'key': key, 'fields': {'summary': issue['summary'], 'status': issue['status'],
+                                                  'issuetype': {'name': issue['issuetype']}}}
+
+    def to_json(self, key, fields=None):
+        issue = self.issues[key]
+        all_fields = {
+            'summary': lambda: issue['summary'],
+            'status': lambda: issue['status'],
+            'issuetype': lambda: {'name': issue['issuetype'], 'subtask': issue['issuetype'] == 'Sub-task'},
+            'project': lambda: {'key': issue['project']},
+            'assignee': lambda: {'accountId': issue['assignee'],
+                                 'displayName': issue['assignee'].replace('user-', 'User ')},
+            'updated': lambda: jira_time(issue['updated']),
+            'created': lambda: jira_time(issue['created']),
+            'issuelinks': lambda: [{'id': f"{key}-{b}", 'type': BLOCKS_LINK_TYPE, 'inwardIssue': self._ref(b)}
+                                   for b in issue['blockers']]
+                                  + [{'id': f"{b}-{key}", 'type': BLOCKS_LINK_TYPE, 'outwardIssue': self._ref(b)}
+                                     for b in issue['blocks']],
+            'subtasks': lambda: [self._ref(s) for s in issue['subtasks']],
+            'parent': lambda: self._ref(issue['parent']) if issue['parent'] else None,
+            'description': lambda: "Lorem ipsum dolor sit amet. " * 20,
+        }
+        wanted = all_fields.keys() if not fields or '*all' in fields else [f for f in fields if f in all_fields]
+        return {'id': key, 'key': key, 'self': f"/rest/api/2/issue/{key}",
+                'fields': {name: all_fields[name]() for name in wanted}}
+
+    # --- JQL ---
+    def matches(self, jql):
+        where = re.split(r"\s+ORDER\s+BY\s+", jql, maxsplit=1, flags=re.IGNORECASE)[0]
+        predicates = [self._predicate(term) for term in split_jql_conjuncts(where)] if where.strip() else []
+        return [key for key in self.order if all(p(self.issues[key]) for p in predicates)]
+
+    @staticmethod
+    def _values(text):
+        return {v.strip().strip('"\'') for v in text.split(',') if v.strip()}
+
+    def _predicate(self, term):
+        m = re.fullmatch(r"(issuetype|type)\s+(not in|in)\s+subTaskIssueTypes\(\)", term, re.IGNORECASE)
+        if m:
+            negate = m.group(2).lower() == 'not in'
+            return lambda i: (i['issuetype'] == 'Sub-task') != negate
+        m = re.fullmatch(r"issueLinkType\s*(!=|=)\s*(.+)", term, re.IGNORECASE)
+        if m:
+            negate, description = m.group(1) == '!=', m.group(2).strip().strip('"\'')
+            side = {'blocks': 'blocks', 'is blocked by': 'blockers'}.get(description)
+            return lambda i: bool(side and i[side]) != negate
+        m = re.fullmatch(r"(\w+)\s+(not in|in)\s+\((.*)\)", term, re.IGNORECASE)
+        if m:
+            field, op, values = m.group(1).lower(), m.group(2).lower(), self._values(m.group(3))
+            values = {CURRENT_USER if v == 'currentUser()' else v for v in values}
+            getter = self._getter(field)
+            return (lambda i: getter(i) in values) if op == 'in' else (lambda i: getter(i) not in values)
+        m = re.fullmatch(r"updated\s*>=\s*-(\d+)m", term, re.IGNORECASE)
+        if m:
+            return lambda i, since=time.time() - int(m.group(1)) * 60: i['updated'] >= since
+        m = re.fullmatch(r"created\s*<=\s*-(\d+)d", term, re.IGNORECASE)
+        if m:
+            return lambda i, until=time.time() - int(m.group(1)) * 86400: i['created'] <= until
+        m = re.fullmatch(r"NOT\s+status\s+CHANGED\s+AFTER\s+-(\d+)d", term, re.IGNORECASE)
+        if m:
+            return lambda i, since=time.time() - int(m.group(1)) * 86400: (i['status_changed'] or 0) <= since
+        m = re.fullmatch(r"(\w+)\s*(!=|=)\s*(.+)", term)
+        if m:
+            field, op, value = m.group(1).lower(), m.group(2), m.group(3).strip().strip('"\'')
+            value = CURRENT_USER if value == 'currentUser()' else value
+            getter = self._getter(field)
+            return (lambda i: getter(i) == value) if op == '=' else (lambda i: getter(i) != value)
+        print(f"mock_jira: ignoring unsupported JQL term: {term}")
+        return lambda i: True
+
+    @staticmethod
+    def _getter(field):
+        return {
+            'project': lambda i: i['project'],
+            'assignee': lambda i: i['assignee'],
+            'issuetype': lambda i: i['issuetype'],
+            'type': lambda i: i['issuetype'],
+            'key': lambda i: i['key'],
+            'issuekey': lambda i: i['key'],
+            'parent': lambda i: i['parent'],
+            'status': lambda i: i['status']['name'],
+            'statuscategory': lambda i: i['status']['statusCategory']['name'],
+        }.get(field, lambda i: None)
+
+    # --- Mutation (for incremental-refresh benchmarks) ---
+    def touch(self, count):
+        """Moves `count` random issues to a new status and bumps their `updated`."""
+        with self.lock:
+            keys = self.rnd.sample(list(self.issues), min(count, len(self.issues)))
+            for key in keys:
+                issue = self.issues[key]
+                previous = issue['status']['name']
+                issue['status'] = self.rnd.choice(STATUSES)
+                issue['updated'] = time.time()
+                if issue['status']['name'] != previous:
+                    issue['status_changed'] = issue['updated']
+                    issue['history'].append((issue['updated'], [{'field': 'status', 'fieldtype': 'jira',
+                                                                  'fromString': previous,
+                                                                  'toString': issue['status']['name']}]))
+            self.order.sort(key=lambda k: self.issues[k]['updated'], reverse=True)
+        return keys
+
+
+def create_mock_app(dataset, latency_ms=0, deployment_type="Server", max_page_size=100, rate_limit=0):
+    """`rate_limit` > 0 answers calls beyond that many per second with 429 and `Retry-After: 1`, like Jira Cloud."""
+    app = Flask("mock_jira")
+    window = {'second': 0, 'count': 0}
+
+    def respond(payload, status=200):
+        body = json.dumps(payload)
+        with dataset.lock:
+            dataset.stats['bytes'] += len(body)
+        return Response(body, status=status, mimetype='application/json')
+
+    @app.before_request
+    def account():
+        if request.path.startswith('/_mock/'):
+            return None
+        endpoint = re.sub(r"/issue/[^/]+", "/issue/{key}", request.path)
+        with dataset.lock:
+            dataset.stats['calls'][endpoint] = dataset.stats['calls'].get(endpoint, 0) + 1
+            if rate_limit:
+                second = int(time.monotonic())
+                if window['second'] != second:
+                    window['second'], window['count'] = second, 0
+                window['count'] += 1
+                if window['count'] > rate_limit:
+                    dataset.stats['throttled'] = dataset.stats.get('throttled', 0) + 1
+                    return Response(json.dumps({'errorMessages': ['Rate limit exceeded.']}), status=429,
+                                    mimetype='application/json', headers={'Retry-After': '1'})
+        if latency_ms:
+            time.sleep(latency_ms / 1000.0)
+        return None
+
+    @app.route('/rest/api/2/serverInfo')
+    def server_info():
+        return respond({'versionNumbers': [9, 12, 0], 'version': '9.12.0', 'deploymentType': deployment_type})
+
+    @app.route('/rest/api/2/myself')
+    def myself():
+        return respond({'accountId': CURRENT_USER, 'displayName': 'Benchmark User'})
+
+    @app.route('/rest/api/2/field')
+    def fields():
+        return respond([])
+
+    def requested_fields():
+        raw = request.args.getlist('fields')
+        return [f.strip() for value in raw for f in value.split(',') if f.strip()]
+
+    @app.route('/rest/api/2/status')
+    def statuses():
+        return respond(STATUSES)
+
+    @app.route('/rest/api/2/statuscategory')
+    def status_categories():
+        return respond([{'id': 1, 'key': 'undefined', 'name': 'No Category'}]
+                       + [status['statusCategory'] for status in STATUSES])
+
+    @app.route('/rest/api/2/issuetype')
+    def issue_types():
+        return respond([{'id': str(10000 + i), 'name': name, 'subtask': False} for i, name in enumerate(ISSUE_TYPES)]
+                       + [{'id': '10100', 'name': 'Sub-task', 'subtask': True}])
+
+    @app.route('/rest/api/2/issueLinkType')
+    def issue_link_types():
+        return respond({'issueLinkTypes': [BLOCKS_LINK_TYPE]})
+
+    @app.route('/rest/api/2/search')
+    def search():
+        keys = dataset.matches(request.args.get('jql', ''))
+        start_at = int(request.args.get('startAt', 0))
+        max_results = min(int(request.args.get('maxResults', 50)), max_page_size)
+        fields = requested_fields()
+        return respond({'startAt': start_at, 'maxResults': max_results, 'total': len(keys),
+                        'issues': [dataset.to_json(k, fields) for k in keys[start_at:start_at + max_results]]})
+
+    @app.route('/rest/api/2/search/jql')
+    def search_jql():
+        keys = dataset.matches(request.args.get('jql', ''))
+        start_at = int(request.args.get('nextPageToken') or 0)
+        max_results = min(int(request.args.get('maxResults', 50)), max_page_size)
+        fields = requested_fields()
+        end = start_at + max_results
+        payload = {'issues': [dataset.to_json(k, fields) for k in keys[start_at:end]], 'isLast': end >= len(keys)}
+        if end < len(keys):
+            payload['nextPageToken'] = str(end)
+        return respond(payload)
+
+    @app.route('/rest/api/2/issue/<key>')
+    def issue(key):
+        if key not in dataset.issues:
+            return respond({'errorMessages': ['Issue does not exist or you do not have permission to see it.']}, 404)
+        payload = dataset.to_json(key, requested_fields())
+        if 'changelog' in request.args.get('expand', ''):
+            histories = dataset.histories(key)
+            payload['changelog'] = {'startAt': 0, 'maxResults': len(histories), 'total': len(histories),
+                                    'histories': histories}
+        return respond(payload)
+
+    @app.route('/rest/api/2/issue/<key>/changelog')
+    def issue_changelog(key):
+        if key not in dataset.issues:
+            return respond({'errorMessages': ['Issue does not exist or you do not have permission to see it.']}, 404)
+        histories = dataset.histories(key)
+        start_at = int(request.args.get('startAt', 0))
+        max_results = min(int(request.args.get('maxResults', 100)), max_page_size)
+        return respond({'startAt': start_at, 'maxResults': max_results, 'total': len(histories),
+                        'isLast': start_at + max_results >= len(histories),
+                        'values': histories[start_at:start_at + max_results]})
+
+    @app.route('/rest/api/2/group/member')
+    def group_member():
+        start_at = int(request.args.get('startAt', 0))
+        max_results = min(int(request.args.get('maxResults', 50)), 50)
+        values = dataset.users[start_at:start_at + max_results]
+        return respond({'startAt': start_at, 'maxResults': max_results, 'total': len(dataset.users),
+                        'isLast': start_at + max_results >= len(dataset.users), 'values': values})
+
+    @app.route('/_mock/stats')
+    def stats():
+        with dataset.lock:
+            return json.dumps(dataset.stats)
+
+    @app.route('/_mock/reset', methods=['POST'])
+    def reset():
+        with dataset.lock:
+            dataset.stats = {'calls': {}, 'bytes': 0, 'throttled': 0}
+        return "ok"
+
+    @app.route('/_mock/touch', methods=['POST'])
+    def touch():
+        return json.dumps(dataset.touch(int(request.args.get('count', 10))))
+
+    return app
+
+
+def serve_in_thread(app, host='127.0.0.1', port=0):
+    """Starts a threaded WSGI server in the background; returns (server, base_url)."""
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server(host, port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="mock-jira", daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def add_dataset_arguments(parser):
+    parser.add_argument('--issues', type=int, default=1000, help="Top-level issues to generate (sub-tasks come on top).")
+    parser.add_argument('--users', type=int, default=40, help="Members of the mocked user group.")
+    parser.add_argument('--link-density', type=float, default=0.4, help="Share of issues with 'Blocks' links.")
+    parser.add_argument('--subtask-fanout', type=int, default=3, help="Maximum sub-tasks per parent.")
+    parser.add_argument('--epic-share', type=float, default=0.5, help="Share of non-Epic issues placed under an Epic.")
+    parser.add_argument('--done-ratio', type=float, default=0.5, help="Share of issues in the Done status category.")
+    parser.add_argument('--my-share', type=float, default=0.3, help="Share of issues assigned to the logged-in user.")
+    parser.add_argument('--latency-ms', type=float, default=0, help="Latency injected into every mocked call.")
+    parser.add_argument('--cloud', action='store_true', help="Report deploymentType Cloud (token-based search paging).")
+    parser.add_argument('--rate-limit', type=int, default=0, help="Calls per second before the mock answers 429.")
+    parser.add_argument('--seed', type=int, default=42)
+
+
+def dataset_from_args(args):
+    return MockDataset(issues=args.issues, users=args.users, link_density=args.link_density,
+                       subtask_fanout=args.subtask_fanout, done_ratio=args.done_ratio, my_share=args.my_share,
+                       epic_share=args.epic_share, seed=args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_dataset_arguments(parser)
+    parser.add_argument('--port', type=int, default=8089)
+    args = parser.parse_args()
+    dataset = dataset_from_args(args)
+    app = create_mock_app(dataset, latency_ms=args.latency_ms, deployment_type="Cloud" if args.cloud else "Server",
+                          rate_limit=args.rate_limit)
+    print(f"Mock Jira with {len(dataset.issues)} issues on http://127.0.0.1:{args.port}")
+    make_server('127.0.0.1', args.port, app, threaded=True).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+End-to-end benchmarks for the filter pages against a local mock Jira.
+
+The mock runs in a child process so the peak memory reported here belongs to the
+Flask app alone. Each scenario drives the app through Flask's test client and
+reports wall time, Jira calls, bytes served by the mock and peak traced memory.
+
+    python -m benchmarks.run_benchmarks --issues 2000 --latency-ms 30 --repeat 3
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import statistics
+import time
+import tracemalloc
+import urllib.request
+from .mock_jira import add_dataset_arguments, create_mock_app, dataset_from_args
+from werkzeug.serving import make_server
+
+
+def _serve_mock(args, port, ready):
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    dataset = dataset_from_args(args)
+    app = create_mock_app(dataset, latency_ms=args.latency_ms, deployment_type="Cloud" if args.cloud else "Server",
+                          rate_limit=args.rate_limit)
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    ready.set()
+    server.serve_forever()
+
+
+class MockJiraProcess:
+    def __init__(self, args, port):
+        self.base_url = f"http://127.0.0.1:{port}"
+        ready = multiprocessing.Event()
+        self.process = multiprocessing.Process(target=_serve_mock, args=(args, port, ready), daemon=True)
+        self.process.start()
+        if not ready.wait(timeout=120):
+            raise RuntimeError("Mock Jira did not start in time.")
+
+    def _call(self, path, method='GET'):
+        request = urllib.request.Request(f"{self.base_url}{path}", method=method, data=b'' if method == 'POST' else None)
+        with urllib.request.urlopen(request) as response:
+            return response.read().decode()
+
+    def reset(self):
+        self._call('/_mock/reset', 'POST')
+
+    def stats(self):
+        return json.loads(self._call('/_mock/stats'))
+
+    def touch(self, count):
+        return json.loads(self._call(f'/_mock/touch?count={count}', 'POST'))
+
+    def stop(self):
+        self.process.terminate()
+        self.process.join()
+
+
+def clear_app_caches():
+    from app.cache import clear_cache_backends
+    clear_cache_backends()
+
+
+def measure(client, mock, url, before=None):
+    """Runs one GET through the app and returns its metrics."""
+    if before:
+        before()
+    mock.reset()
+    tracemalloc.start()
+    started = time.perf_counter()
+    response = client.get(url, buffered=False)
+    # Streamed pages are only complete once the body has been read.
+    first_row, chunks = None, []
+    for chunk in response.response:
+        chunk = chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
+        if first_row is None and '<li>' in chunk:
+            first_row = time.perf_counter() - started
+        chunks.append(chunk)
+    elapsed = time.perf_counter() - started
+    response.close()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = mock.stats()
+    body = "".join(chunks)
+    return {
+        'status': response.status_code,
+        'wall_ms': elapsed * 1000,
+        'first_row_ms': first_row * 1000 if first_row is not None else None,
+        'jira_calls': sum(stats['calls'].values()),
+        'calls_by_endpoint': stats['calls'],
+        'bytes': stats['bytes'],
+        'peak_kib': peak / 1024,
+        'rows': body.count('<li>'),
+    }
+
+
+def summarize(samples):
+    summary = dict(samples[-1])
+    summary['wall_ms'] = statistics.median(s['wall_ms'] for s in samples)
+    first_rows = [s['first_row_ms'] for s in samples if s['first_row_ms'] is not None]
+    summary['first_row_ms'] = statistics.median(first_rows) if first_rows else None
+    summary['peak_kib'] = max(s['peak_kib'] for s in samples)
+    summary['runs'] = len(samples)
+    return summary
+
+
+def scenarios(filter_ids, mock, touch_count):
+    for filter_id in filter_ids:
+        yield filter_id, 'cold', f'/run_filter/{filter_id}', clear_app_caches
+        yield filter_id, 'warm-cache', f'/run_filter/{filter_id}', None
+        yield filter_id, 'incremental', f'/run_filter/{filter_id}?refresh=1', lambda: mock.touch(touch_count)
+        yield filter_id, 'configure-cold', f'/configure_filter/{filter_id}', clear_app_caches
+        yield filter_id, 'configure-warm', f'/configure_filter/{filter_id}', None
+    yield 'dashboard', 'cold', '/dashboard', clear_app_caches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_dataset_arguments(parser)
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--filters', default='', help="Comma-separated filter ids (default: all in FILTERS).")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per scenario; wall time is the median.")
+    parser.add_argument('--touch', type=int, default=10, help="Issues changed before each incremental run.")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON instead of a table.")
+    args = parser.parse_args()
+
+    mock = MockJiraProcess(args, args.port)
+    try:
+        os.environ['JIRA_SERVER'] = mock.base_url
+        os.environ.setdefault('FLASK_SECRET_KEY', 'benchmark')
+        from app import create_app
+        from app.config import FILTERS
+        app = create_app()
+        client = app.test_client()
+        login = client.post('/authenticate', data={'jira_email': 'bench@example.com', 'jira_api_token': 'token'})
+        if login.status_code != 302:
+            raise RuntimeError(f"Login against the mock failed with status {login.status_code}.")
+
+        filter_ids = [f.strip() for f in args.filters.split(',') if f.strip()] or list(FILTERS)
+        report = []
+        for filter_id, scenario, url, before in scenarios(filter_ids, mock, args.touch):
+            samples = [measure(client, mock, url, before) for _ in range(args.repeat)]
+            report.append({'filter': filter_id, 'scenario': scenario, **summarize(samples)})
+    finally:
+        mock.stop()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{'filter':<28} {'scenario':<16} {'status':>6} {'wall ms':>9} {'1st row':>9} {'calls':>6} {'KiB in':>9} "
+          f"{'peak KiB':>9} {'rows':>5}")
+    for row in report:
+        first_row = f"{row['first_row_ms']:.1f}" if row['first_row_ms'] is not None else "-"
+        print(f"{row['filter']:<28} {row['scenario']:<16} {row['status']:>6} {row['wall_ms']:>9.1f} {first_row:>9} "
+              f"{row['jira_calls']:>6} {row['bytes'] / 1024:>9.1f} {row['peak_kib']:>9.1f} {row['rows']:>5}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Cold-start benchmark: how long a fresh instance takes to import the app and to answer its
+first requests, as on Cloud Run.
+
+The app is copied into a temporary directory (no __pycache__, no instance state) and, for
+each variant, started with gunicorn.conf.py and one worker, as the Docker image does:
+
+    source       plain copy; the app's modules and templates are compiled on the way up
+    precompiled  bytecode from `compileall` and templates from `flask precompile-templates`,
+                 as built into the image
+    warmup       precompiled, and the startup probe is GET /warmup (WARMUP_ENABLED=1), which
+                 opens a client to the mock Jira and loads its metadata before traffic arrives
+
+Reports (medians over --runs): the time to import the app and run create_app() in a fresh
+interpreter, from spawning gunicorn to the probe's first 200, the first login page after
+that, and logging in and opening a filter page as a new user.
+
+    python -m benchmarks.startup --runs 5
+"""
+import argparse
+import http.cookiejar
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from .mock_jira import add_dataset_arguments
+from .run_benchmarks import MockJiraProcess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VARIANTS = ('source', 'precompiled', 'warmup')
+IMPORT_SNIPPET = """
+import sys, time
+started = time.perf_counter()
+from app import create_app
+create_app()
+print(round((time.perf_counter() - started) * 1000, 1), 'jira' in sys.modules)
+"""
+
+
+def copy_app(target, precompiled, env):
+    shutil.copytree(ROOT, target, ignore=shutil.ignore_patterns(
+        '__pycache__', '.git', 'instance', 'benchmarks', '*.log', '*.jsonl'))
+    if precompiled:
+        subprocess.run([sys.executable, '-m', 'compileall', '-q', 'app', 'run.py'], cwd=target, env=env, check=True)
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'run', 'precompile-templates'], cwd=target, env=env,
+                       check=True, stdout=subprocess.DEVNULL)
+
+
+def timed_get(opener, url, data=None):
+    started = time.perf_counter()
+    with opener.open(url, data=data, timeout=60) as response:
+        response.read()
+        return response, (time.perf_counter() - started) * 1000
+
+
+def wait_for(url, process, timeout=60):
+    """Polls `url` until it answers 200."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("gunicorn exited during startup.")
+        try:
+            with urllib.request.urlopen(url, timeout=10) as response:
+                if response.status == 200:
+                    response.read()
+                    return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.005)
+    raise RuntimeError(f"{url} did not answer in time.")
+
+
+def run_once(variant, directory, env, args, run):
+    result = subprocess.run([sys.executable, '-c', IMPORT_SNIPPET], cwd=directory, env=env, check=True,
+                            capture_output=True, text=True)
+    import_ms, jira_loaded = result.stdout.split()
+    base_url = f"http://127.0.0.1:{args.port}"
+    probe = '/warmup' if variant == 'warmup' else '/'
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'run:app'], cwd=directory,
+                               env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for(f"{base_url}{probe}", process)
+        ready_ms = (time.perf_counter() - started) * 1000
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        _, login_page_ms = timed_get(opener, f"{base_url}/")
+        data = urllib.parse.urlencode({'jira_email': f"user{run}@example.com", 'jira_api_token': 'token'}).encode()
+        response, login_ms = timed_get(opener, f"{base_url}/authenticate", data)
+        if '/select_filter' not in response.geturl():
+            raise RuntimeError("Login against the mock Jira failed.")
+        _, filter_ms = timed_get(opener, f"{base_url}/run_filter/ready_tasks")
+    finally:
+        process.terminate()
+        process.wait()
+    return {'import_ms': float(import_ms), 'jira_at_import': jira_loaded == 'True', 'ready_ms': ready_ms,
+            'login_page_ms': login_page_ms, 'first_filter_ms': login_ms + filter_ms}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_dataset_arguments(parser)
+    parser.add_argument('--runs', type=int, default=5, help="Cold starts per variant.")
+    parser.add_argument('--port', type=int, default=8091, help="Port for the app under test.")
+    parser.add_argument('--mock-port', type=int, default=8092)
+    args = parser.parse_args()
+
+    mock = MockJiraProcess(args, args.mock_port)
+    report = {}
+    try:
+        for variant in VARIANTS:
+            with tempfile.TemporaryDirectory() as workdir:
+                directory = os.path.join(workdir, 'app-copy')
+                env = dict(os.environ, JIRA_SERVER=mock.base_url, PORT=str(args.port), FLASK_SECRET_KEY='startup',
+                           WEB_CONCURRENCY='1', SCHEDULER_ENABLED='0', ISSUE_INDEX_ENABLED='0',
+                           CACHE_SQLITE_PATH=os.path.join(workdir, 'cache.sqlite3'),
+                           SESSION_SQLITE_PATH=os.path.join(workdir, 'sessions.sqlite3'))
+                env.pop('PYTHONPATH', None)
+                if variant == 'source':
+                    # Otherwise the first cold start would leave bytecode behind for the next ones.
+                    env['PYTHONDONTWRITEBYTECODE'] = '1'
+                else:
+                    env['TEMPLATE_CACHE_DIR'] = os.path.join(directory, 'instance', 'template_cache')
+                if variant == 'warmup':
+                    env.update(WARMUP_ENABLED='1', WARMUP_JIRA_EMAIL='warmup@example.com', WARMUP_JIRA_TOKEN='token')
+                copy_app(directory, variant != 'source', env)
+                runs = []
+                for run in range(args.runs):
+                    # Each cold start begins with empty shared caches, like a new Cloud Run instance.
+                    for name in ('cache.sqlite3', 'sessions.sqlite3'):
+                        if os.path.exists(os.path.join(workdir, name)):
+                            os.remove(os.path.join(workdir, name))
+                    runs.append(run_once(variant, directory, env, args, run))
+                report[variant] = runs
+    finally:
+        mock.stop()
+
+    print(f"{'variant':<12} {'import ms':>9} {'jira loaded':>11} {'ready ms':>9} {'login page ms':>13} "
+          f"{'first filter ms':>15}")
+    for variant, runs in report.items():
+        def median(field):
+            return statistics.median(run[field] for run in runs)
+        print(f"{variant:<12} {median('import_ms'):>9.1f} {str(any(run['jira_at_import'] for run in runs)):>11} "
+              f"{median('ready_ms'):>9.1f} {median('login_page_ms'):>13.1f} {median('first_filter_ms'):>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+"""
+gunicorn settings for the multi-worker deployment.
+
+    gunicorn -c gunicorn.conf.py run:app
+
+Workers share sessions and caches through SQLite files on the host (SESSION_STORE and
+CACHE_BACKEND default to "sqlite" here), so any worker can serve any request. The app is
+not preloaded: each worker builds its own Jira clients, thread pool and connections after fork.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv("WEB_CONCURRENCY", min(2 * multiprocessing.cpu_count(), 4)))
+# gthread keeps blocking Jira calls off the accept loop; "gevent" also works when it is installed.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+# Cold filter runs over large projects can take a while; streamed pages keep the worker busy until done.
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+graceful_timeout = 30
+keepalive = 5
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+
+os.environ.setdefault("SESSION_STORE", "sqlite")
+os.environ.setdefault("CACHE_BACKEND", "sqlite")
+# Keep the host's concurrent calls per Jira server at JIRA_MAX_CONCURRENCY_TOTAL, and its request rate at
+# JIRA_RATE_LIMIT_TOTAL when one is set, whatever the worker count.
+os.environ.setdefault(
+    "JIRA_MAX_CONCURRENCY_PER_SERVER",
+    str(max(1, int(os.getenv("JIRA_MAX_CONCURRENCY_TOTAL", 8)) // workers)),
+)
+if os.getenv("JIRA_RATE_LIMIT_TOTAL"):
+    os.environ.setdefault("JIRA_RATE_LIMIT_PER_SECOND", str(float(os.getenv("JIRA_RATE_LIMIT_TOTAL")) / workers))